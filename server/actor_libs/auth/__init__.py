@@ -1,11 +1,12 @@
-from collections import defaultdict
 from functools import partial, wraps
-from typing import List
+from typing import Iterable, List
 
-from flask import request
+from flask import g, request
 from werkzeug.datastructures import Authorization
 
-from app.services.base.models import Resource
+from ._activity import activity_tracker
+from ._permission_index import PermissionIndex
+from ._token_cache import token_cache
 from .base import basic_auth, token_auth
 from .resources import base_query_resources, parse_request_path
 from ..errors import AuthFailed, PermissionDenied
@@ -20,6 +21,11 @@ class HttpAuth:
             'token': token_auth,
         }
         self.query_resources = base_query_resources
+        self.permission_index = PermissionIndex()
+
+    @staticmethod
+    def init_app(app) -> None:
+        activity_tracker.register_exit_flush(app)
 
     def get_auth(self):
         """ Support basic auth, bearer token """
@@ -72,14 +78,10 @@ class HttpAuth:
     def _verify_request_permission(self) -> bool:
         """ Verify current request permission """
 
-        verify_status = True
         request_method, request_path = parse_request_path()
-        query = self.query_resources()
-        request_resource = query \
-            .filter(Resource.method == request_method,
-                    Resource.url == request_path).first()
-        if not request_resource:
-            verify_status = False
+        verify_status = self.permission_index.verify(
+            g.get('role_id'), g.get('tenant_uid'), request_method, request_path
+        )
         return verify_status
 
     def permission_resources(self, role_id: int = None, tenant_uid: str = None) -> List:
@@ -87,15 +89,31 @@ class HttpAuth:
         all_resources = query.all()
         return all_resources
 
+    def invalidate_permissions(self, roles_id: Iterable[int] = None) -> None:
+        """ Drop permission index of roles, drop all if roles_id is None """
+
+        self.permission_index.invalidate(roles_id)
+
+    @staticmethod
+    def invalidate_tokens(users_id: Iterable[int] = None) -> None:
+        """ Drop verified tokens of users, drop all if users_id is None """
+
+        token_cache.invalidate(users_id)
+
+    def invalidate_request_token(self) -> None:
+        """ Drop verified token of current request """
+
+        auth = self.get_auth()
+        if auth.type == 'token':
+            token_cache.pop(auth['token'])
+
     def _generate_permission(self):
         """
         Returns the permission dictionary for the role of the logged-in user
         Example: {'/users': ['GET', 'POST']}
         """
 
-        _permission_resources = self.permission_resources()
-        permission_dict = defaultdict(list)
-        for resource in _permission_resources:
-            if resource.method is not None:
-                permission_dict[resource.url].append(resource.method)
+        permission_dict = self.permission_index.permission_dict(
+            g.get('role_id'), g.get('tenant_uid')
+        )
         return permission_dict
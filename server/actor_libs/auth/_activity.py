@@ -0,0 +1,83 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+from flask import current_app
+from sqlalchemy import text
+
+from actor_libs.database.orm import db
+
+
+__all__ = ['activity_tracker']
+
+
+logger = logging.getLogger(__name__)
+
+
+update_users_activity_sql = text("""
+UPDATE users
+SET "lastRequestTime" = GREATEST(users."lastRequestTime", activity."lastRequestTime")
+FROM unnest(CAST(:users_id AS integer[]), CAST(:request_times AS timestamp[]))
+         AS activity(id, "lastRequestTime")
+WHERE users.id = activity.id
+""")
+
+
+class ActivityTracker:
+    """
+    Record users last request time in memory and flush them to users
+    in one statement every USER_ACTIVITY_FLUSH_INTERVAL seconds,
+    so a user is written at most once per interval
+    """
+
+    def __init__(self):
+        # {user_id: lastRequestTime}
+        self._activities: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, user_id: int, request_time: datetime) -> None:
+        with self._lock:
+            self._activities[user_id] = request_time
+            flush_interval = current_app.config.get('USER_ACTIVITY_FLUSH_INTERVAL', 60)
+            if time.monotonic() - self._last_flush < flush_interval:
+                return
+            activities, self._activities = self._activities, {}
+            self._last_flush = time.monotonic()
+        self._flush(activities)
+
+    def flush(self) -> None:
+        with self._lock:
+            activities, self._activities = self._activities, {}
+            self._last_flush = time.monotonic()
+        self._flush(activities)
+
+    def register_exit_flush(self, app) -> None:
+        """ Flush buffered activities when the worker exits (recycle, deploy) """
+
+        def flush_on_exit():
+            with app.app_context():
+                self.flush()
+
+        atexit.register(flush_on_exit)
+
+    @staticmethod
+    def _flush(activities: Dict[int, datetime]) -> None:
+        if not activities:
+            return
+        # separate connection, not commit the session of current request
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    update_users_activity_sql,
+                    users_id=list(activities.keys()),
+                    request_times=list(activities.values())
+                )
+        except Exception as error:
+            logger.error(f"flush users activity: {error}")
+
+
+activity_tracker = ActivityTracker()
@@ -0,0 +1,76 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from flask import current_app
+
+from actor_libs.cache import TTLCache
+from actor_libs.database.orm import db
+from app.services.base.models import Resource, Permission
+from ..errors import AuthFailed
+
+
+__all__ = ['PermissionIndex']
+
+
+class PermissionIndex:
+    """
+    Per-role permission index: {role_id: {(method, url), ...}},
+    built from resources and permissions once per role and held in memory.
+    Entries expire after PERMISSION_CACHE_TTL seconds as a bound for other workers
+    """
+
+    def __init__(self):
+        self._index = None
+
+    @property
+    def index(self) -> TTLCache:
+        if self._index is None:
+            self._index = TTLCache(
+                maxsize=current_app.config.get('PERMISSION_CACHE_SIZE', 10000),
+                ttl=current_app.config.get('PERMISSION_CACHE_TTL', 60)
+            )
+        return self._index
+
+    def get_permissions(self, role_id: int, tenant_uid: str) -> FrozenSet[Tuple[str, str]]:
+        if role_id == 1 and tenant_uid:
+            raise AuthFailed()
+        if role_id != 1 and not tenant_uid:
+            raise AuthFailed()
+        permissions = self.index.get(role_id)
+        if permissions is None:
+            permissions = self._load_permissions(role_id)
+            self.index.set(role_id, permissions)
+        return permissions
+
+    def verify(self, role_id: int, tenant_uid: str,
+               request_method: str, request_path: str) -> bool:
+        permissions = self.get_permissions(role_id, tenant_uid)
+        return (request_method, request_path) in permissions
+
+    def permission_dict(self, role_id: int, tenant_uid: str) -> Dict[str, List[str]]:
+        """ Example: {'/users': ['GET', 'POST']} """
+
+        permission_dict = defaultdict(list)
+        for method, url in sorted(self.get_permissions(role_id, tenant_uid)):
+            permission_dict[url].append(method)
+        return permission_dict
+
+    def invalidate(self, roles_id: Iterable[int] = None) -> None:
+        """ Drop index of roles, drop all if roles_id is None """
+
+        if self._index is None:
+            return
+        if roles_id is None:
+            self._index.clear()
+        else:
+            self._index.pop_many(roles_id)
+
+    @staticmethod
+    def _load_permissions(role_id: int) -> FrozenSet[Tuple[str, str]]:
+        query_results = db.session \
+            .query(Resource.method, Resource.url) \
+            .join(Permission, Permission.resourceIntID == Resource.id) \
+            .filter(Resource.enable == 1, Resource.method.isnot(None),
+                    Permission.roleIntID == role_id) \
+            .all()
+        return frozenset((method, url) for method, url in query_results)
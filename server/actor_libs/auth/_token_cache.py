@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from flask import current_app
+
+from actor_libs.cache import TTLCache
+
+
+__all__ = ['token_cache']
+
+
+class TokenCache:
+    """
+    Verified bearer tokens: {token digest: principal},
+    a cached token skips signature verify and user query until
+    TOKEN_CACHE_TTL seconds passed or the token expires
+    """
+
+    def __init__(self):
+        self._tokens = None
+        # {user_id: {token digest}}, for invalidate tokens of users
+        self._users_tokens: Dict[int, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> TTLCache:
+        if self._tokens is None:
+            self._tokens = TTLCache(
+                maxsize=current_app.config.get('TOKEN_CACHE_SIZE', 10000),
+                ttl=current_app.config.get('TOKEN_CACHE_TTL', 60)
+            )
+        return self._tokens
+
+    def get(self, token: str) -> Dict:
+        with self._lock:
+            principal = self.tokens.get(self._digest(token))
+        if principal and principal['expiresAt'] > time.time():
+            return principal
+        return {}
+
+    def set(self, token: str, principal: Dict) -> None:
+        """ principal: user_id, tenant_uid, role_id, user_auth_type, expiresAt """
+
+        token_digest = self._digest(token)
+        with self._lock:
+            self.tokens.set(token_digest, principal)
+            # drop digests expired or evicted from cache
+            user_tokens = {
+                user_token for user_token in self._users_tokens[principal['user_id']]
+                if user_token in self.tokens
+            }
+            user_tokens.add(token_digest)
+            self._users_tokens[principal['user_id']] = user_tokens
+
+    def pop(self, token: str) -> None:
+        with self._lock:
+            self.tokens.pop(self._digest(token))
+
+    def invalidate(self, users_id: Iterable[int] = None) -> None:
+        """ Drop cached tokens of users, drop all if users_id is None """
+
+        with self._lock:
+            if self._tokens is None:
+                return
+            if users_id is None:
+                self._tokens.clear()
+                self._users_tokens.clear()
+                return
+            for user_id in users_id:
+                self._tokens.pop_many(self._users_tokens.pop(user_id, ()))
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+token_cache = TokenCache()
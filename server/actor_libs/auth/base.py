@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from typing import Dict
+
 import arrow
 from flask import current_app, g
 from itsdangerous import TimedJSONWebSignatureSerializer as JWT
@@ -7,6 +9,8 @@ from itsdangerous import TimedJSONWebSignatureSerializer as JWT
 from actor_libs.errors import AuthFailed
 from app.services.applications.models import Application
 from app.services.base.models import User
+from ._activity import activity_tracker
+from ._token_cache import token_cache
 
 
 __all__ = ['basic_auth', 'token_auth']
@@ -33,20 +37,36 @@ def basic_auth(username, password) -> bool:
     g.tenant_uid: str = user.tenantID
     g.role_id: int = application.roleIntID
     g.app_uid: str = application.appID
-    user.lastRequestTime = date_now  # Update user active time
-    user.update()
+    activity_tracker.record(user.id, date_now)  # Update user active time
     return True
 
 
 def token_auth(token) -> bool:
     """ HTTP bearer token authorization """
 
+    principal = token_cache.get(token)
+    if not principal:
+        principal = _verify_token(token)
+    if principal:
+        g.user_id: int = principal['user_id']
+        g.tenant_uid: str = principal['tenant_uid']
+        g.role_id: int = principal['role_id']
+        g.app_uid: str = None
+        g.user_auth_type: int = principal['user_auth_type']
+        activity_tracker.record(principal['user_id'], arrow.now().naive)
+    return True
+
+
+def _verify_token(token) -> Dict:
+    """ Verify token signature and query user, cache the verified principal """
+
     jwt = JWT(current_app.config['SECRET_KEY'])
     try:
-        data = jwt.loads(token)
+        data, header = jwt.loads(token, return_header=True)
     except Exception:
         raise AuthFailed(field='token')
 
+    principal = {}
     if data.get('consumer_id'):
         # todo consumer user auth ?
         ...
@@ -61,11 +81,12 @@ def token_auth(token) -> bool:
                     User.tenantID == data['tenant_uid']).first()
         if not user:
             raise AuthFailed(field='token')
-        g.user_id: int = user.id
-        g.tenant_uid: str = user.tenantID
-        g.role_id: int = user.roleIntID
-        g.app_uid: str = None
-        g.user_auth_type: int = user.userAuthType
-        user.lastRequestTime = arrow.now().naive
-        user.update()
-    return True
+        principal = {
+            'user_id': user.id,
+            'tenant_uid': user.tenantID,
+            'role_id': user.roleIntID,
+            'user_auth_type': user.userAuthType,
+            'expiresAt': header['exp']
+        }
+        token_cache.set(token, principal)
+    return principal
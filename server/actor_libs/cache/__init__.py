@@ -1,4 +1,10 @@
 from .base import Cache
+from ._dict_code import DictCodeCache, dict_code_cache, bump_cache_version
+from ._product_meta import ProductMetaCache, product_meta_cache
+from ._ttl_cache import TTLCache
 
 
-__all__ = ['Cache']
+__all__ = [
+    'Cache', 'TTLCache', 'ProductMetaCache', 'product_meta_cache',
+    'DictCodeCache', 'dict_code_cache', 'bump_cache_version'
+]
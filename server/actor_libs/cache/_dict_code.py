@@ -1,22 +1,147 @@
+import logging
+import time
 from collections import defaultdict
+from typing import Any, Dict, Iterable
 
-from actor_libs.types import DictCodeCache
+from sqlalchemy import text
 
+from actor_libs.database.async_db import db as async_db
 
-__all__ = ['cache_dict_code']
 
+__all__ = ['DictCodeCache', 'dict_code_cache', 'bump_cache_version']
 
-def cache_dict_code() -> DictCodeCache:
-    from app.services.base.models import DictCode
 
-    record = defaultdict(dict)
-    dict_code_values = DictCode.query.all()
+logger = logging.getLogger(__name__)
 
-    for dict_code in dict_code_values:
-        int_value = dict_code.codeValue
-        code_value = int_value if int_value is not None else dict_code.codeStringValue
-        record[dict_code.code][code_value] = {
-            'enLabel': dict_code.enLabel,
-            'zhLabel': dict_code.zhLabel
-        }
-    return record
+query_cache_version_sql = text("""
+SELECT version FROM cache_versions WHERE name = :name
+""")
+
+bump_cache_version_sql = text("""
+INSERT INTO cache_versions(name, version, "updateAt")
+VALUES (:name, 1, now())
+ON CONFLICT (name) DO UPDATE
+    SET version = cache_versions.version + 1, "updateAt" = now()
+""")
+
+query_dict_codes_sql = """
+SELECT code, "codeValue", "codeStringValue", "enLabel", "zhLabel" FROM dict_code
+"""
+
+query_dict_code_version_statement = async_db.register_statement(
+    'dict_code_version', 'SELECT version FROM cache_versions WHERE name = $1'
+)
+query_dict_codes_statement = async_db.register_statement(
+    'dict_codes', query_dict_codes_sql
+)
+
+
+class DictCodeCache:
+    """
+    Dict code shared by flask, async tasks and timer tasks:
+    {code: {value: {'enLabel': 'xxx', 'zhLabel': 'yyy'}}}.
+    The dict_code version of cache_versions is bumped by init_dict_code,
+    workers check the version at most once per check_interval seconds
+    and reload dict code when it is changed
+    """
+
+    name = 'dict_code'
+
+    def __init__(self, check_interval: int = 10):
+        self.codes: Dict[str, Dict] = {}
+        self.version = None
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        # {(code, language): {value: label}}
+        self._labels: Dict = {}
+        # {(code, language): {label: value}}
+        self._values: Dict = {}
+
+    def refresh(self) -> Dict[str, Dict]:
+        """ Check version and reload by flask sqlalchemy engine """
+
+        if not self._is_check_due():
+            return self.codes
+        from actor_libs.database.orm import db
+
+        try:
+            version = db.engine.execute(
+                query_cache_version_sql, name=self.name
+            ).scalar() or 0
+            if version != self.version:
+                self.load(db.engine.execute(text(query_dict_codes_sql)).fetchall(), version)
+        except Exception as error:
+            logger.error(f"Refresh dict code: {error}")
+        return self.codes
+
+    async def refresh_async(self) -> Dict[str, Dict]:
+        """ Check version and reload by async postgres """
+
+        if not self._is_check_due():
+            return self.codes
+        try:
+            version = await async_db.fetch_val(
+                query_dict_code_version_statement, self.name
+            ) or 0
+            if version != self.version:
+                dict_code_rows = await async_db.fetch_many(query_dict_codes_statement)
+                # query error is logged by async_db, retry at the next check
+                if dict_code_rows is not None:
+                    self.load(dict_code_rows, version)
+        except Exception as error:
+            logger.error(f"Refresh dict code: {error}")
+        return self.codes
+
+    def load(self, dict_code_rows: Iterable, version: int) -> None:
+        codes = defaultdict(dict)
+        for code, int_value, string_value, en_label, zh_label in dict_code_rows:
+            code_value = int_value if int_value is not None else string_value
+            codes[code][code_value] = {'enLabel': en_label, 'zhLabel': zh_label}
+        self.codes = dict(codes)
+        self._labels = {}
+        self._values = {}
+        self.version = version
+
+    def get(self, code: str) -> Dict[Any, Dict]:
+        return self.codes.get(code, {})
+
+    def labels(self, code: str, language: str) -> Dict[Any, str]:
+        """ {value: label} of language """
+
+        labels = self._labels.get((code, language))
+        if labels is None:
+            label_key = 'zhLabel' if language == 'zh' else 'enLabel'
+            labels = {
+                code_value: code_labels[label_key]
+                for code_value, code_labels in self.get(code).items()
+            }
+            self._labels[(code, language)] = labels
+        return labels
+
+    def values(self, code: str, language: str) -> Dict[str, Any]:
+        """ {label: value} of language """
+
+        values = self._values.get((code, language))
+        if values is None:
+            values = {
+                label: code_value
+                for code_value, label in self.labels(code, language).items()
+            }
+            self._values[(code, language)] = values
+        return values
+
+    def _is_check_due(self) -> bool:
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return True
+
+
+def bump_cache_version(session, name: str) -> None:
+    """ Bump version of cache in session, workers reload it after commit """
+
+    session.execute(bump_cache_version_sql, {'name': name})
+
+
+dict_code_cache = DictCodeCache()
@@ -0,0 +1,203 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from actor_libs.database.async_db import db as async_db
+from ._dict_code import dict_code_cache
+from ._ttl_cache import TTLCache
+
+
+__all__ = ['ProductMetaCache', 'product_meta_cache']
+
+
+query_products_sql = async_db.register_statement('product_meta_products', """
+SELECT products."productID", products."cloudProtocol"
+FROM products
+WHERE products."productID" = ANY($1::varchar[])
+""")
+
+query_data_streams_sql = async_db.register_statement('product_meta_data_streams', """
+SELECT "productID", "streamID", "streamName", "streamType", topic
+FROM data_streams
+WHERE "productID" = ANY($1::varchar[])
+ORDER BY id
+""")
+
+query_stream_points_sql = async_db.register_statement('product_meta_stream_points', """
+SELECT data_streams."productID", data_streams."streamID", data_streams."streamName",
+       data_points."dataPointID", data_points."dataPointName", data_points."pointDataType"
+FROM data_points
+JOIN streams_points ON streams_points."dataPointIntID" = data_points.id
+JOIN data_streams ON data_streams.id = streams_points."dataStreamIntID"
+WHERE data_streams."productID" = ANY($1::varchar[])
+""")
+
+
+class ProductMetaCache:
+    """
+    Metadata of products keyed by productID:
+    {
+        'productID': 'xxx', 'cloudProtocol': 1, 'protocol': 'mqtt',
+        'dataStreams': {'stream_id': {'streamName': 'xxx', 'streamType': 1, 'topic': 'yyy'}},
+        'streamPoints': {'stream_id:data_point_id': {
+            'streamName': 'xxx', 'dataPointName': 'yyy', 'pointDataType': 1
+        }}
+    }
+    Products missing in cache are loaded in one query per table, by sqlalchemy
+    in flask or by async postgres in task services. Entries are dropped on
+    product, data stream and data point edits of the process and expire after ttl
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: int = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._products = None
+        # {(objectID, itemID): itemType}, lwm2m items are only changed on deploy
+        self._lwm2m_items = None
+
+    @property
+    def products(self) -> TTLCache:
+        if self._products is None:
+            self._products = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        return self._products
+
+    def get_product(self, product_uid: str) -> Optional[Dict]:
+        return self.get_products([product_uid]).get(product_uid)
+
+    def get_products(self, products_uid: Iterable[str]) -> Dict[str, Dict]:
+        products, missing_products = self._get_cached_products(products_uid)
+        if missing_products:
+            dict_code_cache.refresh()
+            products.update(self._set_products(self._load_products(missing_products)))
+        return products
+
+    async def get_products_async(self, products_uid: Iterable[str]) -> Dict[str, Dict]:
+        products, missing_products = self._get_cached_products(products_uid)
+        if missing_products:
+            await dict_code_cache.refresh_async()
+            loaded_products = await self._load_products_async(missing_products)
+            products.update(self._set_products(loaded_products))
+        return products
+
+    def get_stream_points(self, products_uid: Iterable[str]) -> Dict[str, Dict]:
+        """
+        :return: {
+            'stream_id:data_point_id': {
+                'streamName': 'xxx', 'dataPointName': 'yyy', 'pointDataType': 1
+            }
+        }
+        """
+
+        stream_points = {}
+        for product in self.get_products(products_uid).values():
+            stream_points.update(product['streamPoints'])
+        return stream_points
+
+    def get_lwm2m_item_type(self, object_id: int, item_id: int) -> Optional[str]:
+        if self._lwm2m_items is None:
+            from app.services.devices.models import Lwm2mItem
+
+            query_results = Lwm2mItem.query \
+                .with_entities(Lwm2mItem.objectID, Lwm2mItem.itemID, Lwm2mItem.itemType) \
+                .all()
+            self._lwm2m_items = {
+                (object_id, item_id): item_type
+                for object_id, item_id, item_type in query_results
+            }
+        return self._lwm2m_items.get((object_id, item_id))
+
+    def invalidate(self, products_uid: Iterable[str] = None) -> None:
+        """ Drop metadata of products, drop all if products_uid is None """
+
+        if self._products is None:
+            return
+        if products_uid is None:
+            self._products.clear()
+        else:
+            self._products.pop_many(products_uid)
+
+    def _get_cached_products(self, products_uid: Iterable[str]):
+        products = {}
+        missing_products = []
+        for product_uid in set(products_uid):
+            product = self.products.get(product_uid)
+            if product is None:
+                missing_products.append(product_uid)
+            else:
+                products[product_uid] = product
+        return products, missing_products
+
+    def _set_products(self, loaded_products: Dict[str, Dict]) -> Dict[str, Dict]:
+        for product_uid, product in loaded_products.items():
+            self.products.set(product_uid, product)
+        return loaded_products
+
+    @staticmethod
+    def _load_products(products_uid: List[str]) -> Dict[str, Dict]:
+        from app.services.products.models import (
+            Product, DataPoint, DataStream, StreamPoint
+        )
+
+        query_products = Product.query \
+            .with_entities(Product.productID, Product.cloudProtocol) \
+            .filter(Product.productID.in_(products_uid)) \
+            .all()
+        query_streams = DataStream.query \
+            .with_entities(DataStream.productID, DataStream.streamID,
+                           DataStream.streamName, DataStream.streamType,
+                           DataStream.topic) \
+            .filter(DataStream.productID.in_(products_uid)) \
+            .order_by(DataStream.id) \
+            .all()
+        query_stream_points = DataPoint.query \
+            .join(StreamPoint, StreamPoint.c.dataPointIntID == DataPoint.id) \
+            .join(DataStream, DataStream.id == StreamPoint.c.dataStreamIntID) \
+            .with_entities(DataStream.productID, DataStream.streamID,
+                           DataStream.streamName, DataPoint.dataPointID,
+                           DataPoint.dataPointName, DataPoint.pointDataType) \
+            .filter(DataStream.productID.in_(products_uid)) \
+            .all()
+        return _build_products(query_products, query_streams, query_stream_points)
+
+    @staticmethod
+    async def _load_products_async(products_uid: List[str]) -> Dict[str, Dict]:
+        query_products = await async_db.fetch_many(query_products_sql, products_uid)
+        query_streams = await async_db.fetch_many(query_data_streams_sql, products_uid)
+        query_stream_points = await async_db.fetch_many(query_stream_points_sql, products_uid)
+        if None in (query_products, query_streams, query_stream_points):
+            # query error is logged by async_db, products are loaded next time
+            return {}
+        return _build_products(query_products, query_streams, query_stream_points)
+
+
+def _build_products(query_products, query_streams, query_stream_points) -> Dict[str, Dict]:
+    cloud_protocols = dict_code_cache.labels('cloudProtocol', 'en')
+    products = {}
+    for product_uid, cloud_protocol in query_products:
+        protocol = cloud_protocols.get(cloud_protocol)
+        products[product_uid] = {
+            'productID': product_uid,
+            'cloudProtocol': cloud_protocol,
+            'protocol': protocol.lower() if protocol else None,
+            'dataStreams': {},
+            'streamPoints': {}
+        }
+    product_streams = defaultdict(dict)
+    for product_uid, stream_uid, stream_name, stream_type, topic in query_streams:
+        product_streams[product_uid][stream_uid] = {
+            'streamName': stream_name, 'streamType': stream_type, 'topic': topic
+        }
+    product_stream_points = defaultdict(dict)
+    for product_uid, stream_uid, stream_name, \
+            point_uid, point_name, point_data_type in query_stream_points:
+        product_stream_points[product_uid][f'{stream_uid}:{point_uid}'] = {
+            'streamName': stream_name,
+            'dataPointName': point_name,
+            'pointDataType': point_data_type
+        }
+    for product_uid, product in products.items():
+        product['dataStreams'] = product_streams.get(product_uid, {})
+        product['streamPoints'] = product_stream_points.get(product_uid, {})
+    return products
+
+
+product_meta_cache = ProductMetaCache()
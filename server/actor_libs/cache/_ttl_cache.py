@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+
+__all__ = ['TTLCache']
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache, entries expire after ttl seconds and
+    the least recently used entry is evicted when maxsize is reached
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expire_at, value = item
+        if expire_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            del self._data[key]
+        elif len(self._data) >= self.maxsize:
+            self._expire()
+            while len(self._data) >= self.maxsize:
+                self._data.popitem(last=False)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+
+    def pop_many(self, keys: Iterable[Hashable]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _expire(self) -> None:
+        """ Remove expired entries """
+
+        time_now = time.monotonic()
+        expired_keys = [
+            key for key, (expire_at, _) in self._data.items()
+            if expire_at < time_now
+        ]
+        for key in expired_keys:
+            del self._data[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
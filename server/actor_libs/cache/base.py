@@ -1,11 +1,10 @@
-from actor_libs.types import DictCodeCache
-from ._dict_code import cache_dict_code
+from ._dict_code import dict_code_cache
 
 
 class Cache:
     _instance = None
-    _dict_code_cache: DictCodeCache = {}
     models_schema_cache = {}
+    models_serializer_cache = {}
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -14,6 +13,6 @@ class Cache:
 
     @property
     def dict_code(self):
-        if not self._dict_code_cache:
-            self._dict_code_cache = cache_dict_code()
-        return self._dict_code_cache
+        """ Shared dict code, reloaded when its version is bumped """
+
+        return dict_code_cache.refresh()
@@ -1,6 +1,7 @@
 from .base import AsyncPostgres
+from .statement import Statement
 
 
-__all__ = ['db']
+__all__ = ['db', 'Statement']
 
 db = AsyncPostgres()
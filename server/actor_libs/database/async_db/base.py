@@ -1,5 +1,8 @@
 import logging
-from typing import List, Deque, Tuple, Any
+import time
+from typing import List, Deque, Tuple, Any, AsyncIterator, Union
+
+from .statement import Statement, StatementRegistry
 
 
 __all__ = ['AsyncPostgres']
@@ -11,6 +14,7 @@ logger = logging.getLogger(__name__)
 class AsyncPostgres:
     _instance = None
     pool = None
+    statements = StatementRegistry()
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -25,14 +29,25 @@ class AsyncPostgres:
             return
         await self.pool.close()
 
-    async def execute(self, sql: str, *args) -> bool:
+    def register_statement(self, name: str, sql: str) -> Statement:
+        """ Declare a parameterized statement ($n placeholders) """
+
+        return self.statements.register(name, sql)
+
+    def statements_stats(self) -> dict:
+        return self.statements.stats()
+
+    async def execute(self, sql: Union[str, Statement], *args) -> bool:
         """
         insert/update/delete SQL
         """
 
+        query_sql, statement = self._get_query_sql(sql)
+        if not statement:
+            query_sql = query_sql.replace("'NULL'", "NULL")
         async with self.pool.acquire() as conn:
             async with conn.transaction():
-                query_sql = sql.replace("'NULL'", "NULL")
+                start_time = time.perf_counter()
                 try:
                     await conn.execute(query_sql, *args)
                     logger.info(query_sql)
@@ -41,36 +56,107 @@ class AsyncPostgres:
                     logger.error(e)
                     logger.error(query_sql)
                     execute_status = False
+                if statement:
+                    statement.record(
+                        time.perf_counter() - start_time, error=not execute_status
+                    )
         return execute_status
 
-    async def fetch(self, sql: str, fetch_type: str) -> Any:
+    async def fetch(self, sql: Union[str, Statement], fetch_type: str, *args) -> Any:
         """
         :param sql: sql statement
         :param fetch_type: row or many or val
+        :param args: statement bound args
         """
 
+        query_sql, statement = self._get_query_sql(sql)
+        result = None
         async with self.pool.acquire() as conn:
             async with conn.transaction():
+                start_time = time.perf_counter()
+                fetch_error = False
                 try:
                     if fetch_type == 'row':
-                        result = await conn.fetchrow(sql)
+                        result = await conn.fetchrow(query_sql, *args)
                     elif fetch_type == 'many':
-                        result = await conn.fetch(sql)
+                        result = await conn.fetch(query_sql, *args)
                     elif fetch_type == 'val':
-                        result = await conn.fetchval(sql)
-                    return result
+                        result = await conn.fetchval(query_sql, *args)
                 except Exception as e:
-                    logger.error(sql)
+                    fetch_error = True
+                    logger.error(query_sql)
                     logger.error(e)
+                if statement:
+                    statement.record(
+                        time.perf_counter() - start_time, error=fetch_error
+                    )
+        return result
 
-    async def fetch_many(self, sql: str) -> list:
-        return await self.fetch(sql, 'many')
+    async def conn_execute(self, conn, sql: Union[str, Statement], *args,
+                           fetch_type: str = None) -> Any:
+        """
+        Run a statement on an acquired connection, for callers that need
+        several statements in their own transaction. Latency and errors are
+        recorded like execute/fetch, errors are raised to the caller
 
-    async def fetch_row(self, sql: str) -> Any:
-        return await self.fetch(sql, 'row')
+        :param conn: connection acquired from pool
+        :param fetch_type: row or many or val, execute if None
+        """
+
+        query_sql, statement = self._get_query_sql(sql)
+        start_time = time.perf_counter()
+        error = False
+        try:
+            if fetch_type == 'row':
+                return await conn.fetchrow(query_sql, *args)
+            elif fetch_type == 'many':
+                return await conn.fetch(query_sql, *args)
+            elif fetch_type == 'val':
+                return await conn.fetchval(query_sql, *args)
+            return await conn.execute(query_sql, *args)
+        except Exception:
+            error = True
+            raise
+        finally:
+            if statement:
+                statement.record(time.perf_counter() - start_time, error)
+
+    async def fetch_many(self, sql: Union[str, Statement], *args) -> list:
+        return await self.fetch(sql, 'many', *args)
+
+    async def fetch_row(self, sql: Union[str, Statement], *args) -> Any:
+        return await self.fetch(sql, 'row', *args)
+
+    async def fetch_val(self, sql: Union[str, Statement], *args) -> Any:
+        return await self.fetch(sql, 'val', *args)
+
+    async def iterate(self, sql: Union[str, Statement], *args,
+                      prefetch: int = 1000) -> AsyncIterator:
+        """
+        Iterate query results with a server-side cursor,
+        fetch prefetch rows per round trip, memory not grow with results
+        """
 
-    async def fetch_val(self, sql: str) -> Any:
-        return await self.fetch(sql, 'val')
+        query_sql, statement = self._get_query_sql(sql)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                start_time = time.perf_counter()
+                error = False
+                try:
+                    async for record in conn.cursor(query_sql, *args, prefetch=prefetch):
+                        yield record
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    if statement:
+                        statement.record(time.perf_counter() - start_time, error)
+
+    @staticmethod
+    def _get_query_sql(sql: Union[str, Statement]) -> Tuple[str, Statement]:
+        if isinstance(sql, Statement):
+            return sql.sql, sql
+        return sql, None
 
     async def insert_records(self, table_name: str, columns: List[str],
                              deque: Deque) -> None:
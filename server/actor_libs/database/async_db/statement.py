@@ -0,0 +1,73 @@
+from typing import Dict
+
+
+__all__ = ['Statement', 'StatementRegistry']
+
+
+class Statement:
+    """
+    A SQL statement declared once with $n placeholders,
+    asyncpg prepares it once per connection and reuses it with bound args
+    """
+
+    __slots__ = ('name', 'sql', 'calls', 'errors', 'total_time', 'max_time')
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float, error: bool = False) -> None:
+        """ Record a execution latency (seconds) """
+
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if error:
+            self.errors += 1
+
+    def stats(self) -> Dict:
+        avg_time = self.total_time / self.calls if self.calls else 0
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'totalTime': round(self.total_time * 1000, 3),  # ms
+            'avgTime': round(avg_time * 1000, 3),
+            'maxTime': round(self.max_time * 1000, 3),
+        }
+
+    def __repr__(self):
+        return f"<Statement {self.name}>"
+
+
+class StatementRegistry:
+    def __init__(self):
+        self._statements: Dict[str, Statement] = {}
+
+    def register(self, name: str, sql: str) -> Statement:
+        statement = self._statements.get(name)
+        if statement and statement.sql != sql:
+            raise ValueError(f"statement {name} has been registered")
+        if not statement:
+            statement = Statement(name, sql)
+            self._statements[name] = statement
+        return statement
+
+    def stats(self) -> Dict[str, Dict]:
+        """ Statements latency stats, sort by total time """
+
+        statements = sorted(
+            self._statements.values(),
+            key=lambda x: x.total_time, reverse=True
+        )
+        return {
+            statement.name: statement.stats()
+            for statement in statements
+        }
+
+    def __len__(self):
+        return len(self._statements)
@@ -1,4 +1,5 @@
 from ._model import db, BaseModel, ModelMixin
+from ._scope import groups_scope
 
 
-__all__ = ['db', 'BaseModel', 'ModelMixin']
+__all__ = ['db', 'BaseModel', 'ModelMixin', 'groups_scope']
@@ -1,11 +1,11 @@
-from flask import g
+from flask import g, request
 from sqlalchemy import inspection
 
 from actor_libs.types.orm import BaseQueryT
 from actor_libs.errors import DataNotFound
 from .utils import (
     base_filter_tenant, filter_api, filter_group, filter_request_args,
-    sort_query, dumps_query_result, paginate, get_model_schema
+    sort_query, dumps_query_result, paginate, cursor_paginate, get_model_schema
 )
 
 
@@ -51,12 +51,20 @@ class ExtendQuery(BaseQueryT):
         record = dumps_query_result(query_result, **kwargs)
         return record
 
-    def pagination(self, code_list=None, is_filter_tenant=True):
+    def pagination(self, code_list=None, is_filter_tenant=True, cursor_sort: str = None):
+        """
+        :param cursor_sort: default sort key of cursor pagination,
+                            opt-in by request args _cursor if not None
+        """
+
         model = self._get_query_model()
         if is_filter_tenant:
             query = self.filter_tenant()  # filter tenant
         else:
             query = self
+        if cursor_sort and '_cursor' in request.args:
+            query = filter_request_args(model=model, query=query)
+            return cursor_paginate(model, query, cursor_sort, code_list)
         query = sort_query(model=model, query=query)  # sort query
         query = filter_request_args(model=model, query=query)  # filter request args
         return paginate(query, code_list)
@@ -0,0 +1,99 @@
+from typing import Iterable, Tuple
+
+from flask import current_app, g
+from sqlalchemy import join, select
+
+from actor_libs.cache import TTLCache
+
+
+__all__ = ['GroupsScope', 'groups_scope']
+
+
+class GroupsScope:
+    """
+    Groups uid which a user (group auth user or application) can access,
+    cached in request and across requests, devices of groups are filtered
+    with a semi-join subquery instead of materialized id lists
+    """
+
+    def __init__(self):
+        self._scopes = None
+
+    @property
+    def scopes(self) -> TTLCache:
+        if self._scopes is None:
+            self._scopes = TTLCache(
+                maxsize=current_app.config.get('GROUPS_SCOPE_CACHE_SIZE', 10000),
+                ttl=current_app.config.get('GROUPS_SCOPE_CACHE_TTL', 60)
+            )
+        return self._scopes
+
+    def get_groups(self, scope_type: str) -> Tuple[str, ...]:
+        """
+        :param scope_type: user -> user groups, app -> application groups
+        """
+
+        request_scopes = g.setdefault('_groups_scopes', {})
+        if scope_type in request_scopes:
+            return request_scopes[scope_type]
+        scope_key = (scope_type, g.user_id)
+        groups_uid = self.scopes.get(scope_key)
+        if groups_uid is None:
+            groups_uid = self._query_groups(scope_type, g.user_id)
+            self.scopes.set(scope_key, groups_uid)
+        request_scopes[scope_type] = groups_uid
+        return groups_uid
+
+    def filter_query(self, model, query, scope_type: str):
+        from app.services.devices.models import GroupDevice, Device
+
+        if not any(hasattr(model, attr) for attr in ('groupID', 'deviceID', 'deviceIntID')):
+            return query
+        groups_uid = self.get_groups(scope_type)
+        if hasattr(model, 'groupID'):
+            query = query.filter(model.groupID.in_(groups_uid))
+        elif hasattr(model, 'deviceID'):
+            devices_uid = select([Device.deviceID]) \
+                .select_from(
+                    join(Device.__table__, GroupDevice, GroupDevice.c.deviceIntID == Device.id)
+                ) \
+                .where(GroupDevice.c.groupID.in_(groups_uid))
+            query = query.filter(model.deviceID.in_(devices_uid))
+        elif hasattr(model, 'deviceIntID'):
+            devices_id = select([GroupDevice.c.deviceIntID]) \
+                .where(GroupDevice.c.groupID.in_(groups_uid))
+            query = query.filter(model.deviceIntID.in_(devices_id))
+        return query
+
+    def invalidate(self, users_id: Iterable[int] = None) -> None:
+        """ Drop groups scope of users, drop all if users_id is None """
+
+        if self._scopes is None:
+            return
+        if users_id is None:
+            self._scopes.clear()
+        else:
+            self._scopes.pop_many(
+                (scope_type, user_id)
+                for user_id in users_id for scope_type in ('user', 'app')
+            )
+
+    @staticmethod
+    def _query_groups(scope_type: str, user_id: int) -> Tuple[str, ...]:
+        from app.services.base.models import UserGroup
+        from app.services.devices.models import Group
+        from app.services.applications.models import ApplicationGroup
+
+        if scope_type == 'app':
+            query = Group.query \
+                .join(ApplicationGroup, ApplicationGroup.c.groupID == Group.groupID) \
+                .filter(Group.userIntID == user_id)
+        else:
+            query = Group.query \
+                .join(UserGroup, UserGroup.c.groupID == Group.groupID) \
+                .filter(UserGroup.c.userIntID == user_id)
+        query_results = query.with_entities(Group.groupID).distinct().all()
+        return tuple(group_uid for group_uid, in query_results)
+
+
+groups_scope = GroupsScope()
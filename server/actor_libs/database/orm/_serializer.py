@@ -0,0 +1,132 @@
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List
+
+from marshmallow import fields, missing, ValidationError
+
+
+__all__ = ['SchemaSerializer', 'ResultSerializer']
+
+
+class SchemaSerializer:
+    """
+    Compiled dump of a model schema, output is the same as schema.dump(obj).data:
+    fields, getters and formatters are resolved once from the bound schema fields,
+    rows are dumped in one pass without the marshmallow marshaller.
+    Schema with dump processors or extra falls back to schema.dump
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._field_getters = None
+        self.is_compiled = not any([
+            schema._has_processors, schema.extra, schema.prefix
+        ])
+
+    def dump(self, obj) -> Dict:
+        if not self.is_compiled:
+            return self.schema.dump(obj).data
+        if self._field_getters is None or type(obj) not in self.schema._types_seen:
+            # implicit fields of schema are bound by the first dumped object
+            record = self.schema.dump(obj).data
+            self._field_getters = self._compile_fields()
+            return record
+        record = {}
+        try:
+            for key, attr, default, serialize in self._field_getters:
+                if attr is None:
+                    # value is pulled by the field itself
+                    value = serialize(obj)
+                    if value is not missing:
+                        record[key] = value
+                    continue
+                value = getattr(obj, attr, missing)
+                if value is missing:
+                    if default is missing:
+                        continue
+                    record[key] = default() if callable(default) else default
+                else:
+                    record[key] = serialize(value, attr, obj)
+        except ValidationError:
+            # let marshmallow collect and handle errors
+            record = self.schema.dump(obj).data
+        return record
+
+    def _compile_fields(self) -> List:
+        accessor = self.schema.get_attribute
+        field_getters = []
+        for field_name, field_obj in self.schema.fields.items():
+            if getattr(field_obj, 'load_only', False):
+                continue
+            key = field_obj.dump_to or field_name
+            attr = field_obj.attribute or field_name
+            if not field_obj._CHECK_ATTRIBUTE or '.' in attr:
+                serialize = partial(field_obj.serialize, field_name, accessor=accessor)
+                field_getters.append((key, None, missing, serialize))
+            else:
+                field_getters.append(
+                    (key, attr, field_obj.default, _get_formatter(field_obj))
+                )
+        return field_getters
+
+
+class ResultSerializer:
+    """
+    Compiled dump of query results with entities (sqlalchemy result rows),
+    entities are dumped by their schema, datetime values are formatted
+    """
+
+    def __init__(self, keys, get_schema_serializer: Callable):
+        # same keys as mapping result, the last value of duplicated key wins
+        self.keys = list(dict.fromkeys(keys))
+        self.get_schema_serializer = get_schema_serializer
+
+    def dump(self, query_result) -> Dict:
+        record = {}
+        for key in self.keys:
+            value = getattr(query_result, key)
+            if hasattr(value, '__tablename__'):
+                record.update(self.get_schema_serializer(value.__class__.__name__).dump(value))
+            elif isinstance(value, datetime):
+                record[key] = value.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                record[key] = value
+        return record
+
+
+def _get_formatter(field_obj) -> Callable:
+    """ Fast path of common field types, others call field._serialize """
+
+    field_class = type(field_obj)
+    _serialize = field_obj._serialize
+    if field_class._serialize is fields.Field._serialize:
+        return _serialize_raw
+    if field_class._serialize is fields.String._serialize:
+        def serialize_string(value, attr, obj):
+            return value if value.__class__ is str else _serialize(value, attr, obj)
+        return serialize_string
+    if field_class._serialize is fields.Number._serialize and \
+            field_class._format_num is fields.Number._format_num and \
+            not field_obj.as_string:
+        num_type = field_obj.num_type
+
+        def serialize_number(value, attr, obj):
+            return value if value.__class__ is num_type else _serialize(value, attr, obj)
+        return serialize_number
+    if field_class._serialize is fields.DateTime._serialize and field_obj.dateformat and \
+            field_obj.dateformat not in field_obj.DATEFORMAT_SERIALIZATION_FUNCS:
+        dateformat = field_obj.dateformat
+
+        def serialize_datetime(value, attr, obj):
+            if value is None:
+                return None
+            try:
+                return value.strftime(dateformat)
+            except AttributeError:
+                return _serialize(value, attr, obj)
+        return serialize_datetime
+    return _serialize
+
+
+def _serialize_raw(value, attr, obj):
+    return value
@@ -1,51 +1,93 @@
+import json
+from collections import defaultdict
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
 from typing import List, Dict
 
-from flask import g, request
-from sqlalchemy import asc, desc, inspect, or_
-from sqlalchemy.sql.sqltypes import Integer, String
+from flask import g, request, current_app
+from sqlalchemy import asc, desc, inspect, or_, func, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.sqltypes import Integer, String, DateTime
 
 from actor_libs.cache import Cache
 from actor_libs.errors import ParameterInvalid
+from ._scope import groups_scope
+from ._serializer import SchemaSerializer, ResultSerializer
 
 
 def dumps_query_result(query_result, **kwargs):
     """ Dump a query result """
 
-    record = {}
-    if query_result.__class__.__name__ == 'result':
-        query_result_dict = mapping_result(query_result)
-        for key, value in query_result_dict.items():
-            # When query has with_entities
-            if hasattr(value, '__tablename__'):
-                schema = get_model_schema(value.__class__.__name__)
-                dump_dict = schema.dump(value).data
-                record.update(dump_dict)
-            elif isinstance(value, datetime):
-                record[key] = value.strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                record[key] = value
-    else:
-        schema = get_model_schema(query_result.__class__.__name__)
-        record = schema.dump(query_result).data
+    record = get_result_serializer(query_result).dump(query_result)
     if kwargs.get('code_list'):
         record = dict_code_label(record, kwargs['code_list'])
     return record
 
 
 def dumps_query_results(query_results: List, **kwargs):
-    """ Dump multiple query results """
+    """ Dump multiple query results in one pass with compiled serializers """
 
     records = []
+    if not query_results:
+        return records
     records_append = records.append
+    load_schema_batches(query_results)
+    serializer_dump = get_result_serializer(query_results[0]).dump
+    code_labels = _get_code_labels(kwargs.get('code_list'))
     for query_result in query_results:
-        record = dumps_query_result(query_result)
-        if kwargs.get('code_list'):
-            record = dict_code_label(record, kwargs['code_list'])
+        record = serializer_dump(query_result)
+        for code, code_value_dict, label_key in code_labels:
+            code_value = record.get(code)
+            if code_value is None:
+                continue
+            code_value_labels = code_value_dict.get(code_value)
+            record[f'{code}Label'] = code_value_labels.get(label_key) if code_value_labels else None
         records_append(record)
     return records
 
 
+def load_schema_batches(query_results: List) -> None:
+    """ Run batch loaders of entity schemas for all entities of query results """
+
+    loaders_entities = defaultdict(list)
+    models_loaders = {}
+    for query_result in query_results:
+        if query_result.__class__.__name__ == 'result':
+            entities = [value for value in query_result if hasattr(value, '__tablename__')]
+        else:
+            entities = [query_result]
+        for entity in entities:
+            model_name = entity.__class__.__name__
+            if model_name not in models_loaders:
+                schema = get_model_schema(model_name)
+                models_loaders[model_name] = getattr(schema, 'batch_loaders', None) or []
+            for loader in models_loaders[model_name]:
+                loaders_entities[loader].append(entity)
+    for loader, entities in loaders_entities.items():
+        loader.load(entities)
+
+
+def get_result_serializer(query_result):
+    """ Serializer of query result, rows of one query share the same serializer """
+
+    if query_result.__class__.__name__ == 'result':
+        # When query has with_entities
+        serializer = ResultSerializer(query_result.keys(), get_model_serializer)
+    else:
+        serializer = get_model_serializer(query_result.__class__.__name__)
+    return serializer
+
+
+def get_model_serializer(model_name):
+    cache = Cache()
+    models_serializer_cache = cache.models_serializer_cache
+    model_serializer = models_serializer_cache.get(model_name)
+    if model_serializer is None:
+        model_serializer = SchemaSerializer(get_model_schema(model_name))
+        models_serializer_cache[model_name] = model_serializer
+    return model_serializer
+
+
 def paginate(query, code_list=None):
     """ Result display by paging of query """
 
@@ -58,17 +100,143 @@ def paginate(query, code_list=None):
         page, limit = 0, 10000
     else:
         query_results = query.limit(limit).offset(offset).all()
+    count_type = get_count_type()
     # paginate items count
     if page == 1 and len(query_results) < limit:
         total_count = len(query_results)
     else:
-        total_count = query.order_by(None).count()
+        total_count = query_count(query, count_type)
     records = dumps_query_results(query_results, code_list=code_list)
     meta = {'page': page, 'limit': limit, 'count': total_count}  # build paginate schema
+    if count_type != 'exact':
+        meta['countType'] = count_type
+    result = {'items': records, 'meta': meta}
+    return result
+
+
+def cursor_paginate(model, query, sort_key, code_list=None):
+    """
+    Keyset pagination of query by the opaque _cursor of request args,
+    rows are sorted by sort key and primary key, next page starts after
+    the last row of the current page instead of skipping offset rows.
+    Count is only queried when request args has _count
+    """
+
+    limit = request.args.get('_limit', 10, type=int)
+    if limit > 1000 or limit <= 0:
+        raise ParameterInvalid(field='_limit')
+    order = request.args.get('_order', 'desc', type=str)
+    sort_key = request.args.get('_sort', sort_key, type=str)
+    if not hasattr(model, sort_key):
+        raise ParameterInvalid(field='_sort')
+    mapper = inspect(model)
+    key_attrs = [getattr(model, sort_key)]
+    for column in mapper.primary_key:
+        attr = getattr(model, mapper.get_property_by_column(column).key)
+        if attr.key != sort_key:
+            key_attrs.append(attr)
+
+    cursor_query = query.order_by(None)
+    cursor_values = _decode_cursor(request.args.get('_cursor'), key_attrs)
+    if cursor_values:
+        keys_tuple = tuple_(*key_attrs)
+        if order == 'asc':
+            cursor_query = cursor_query.filter(keys_tuple > tuple_(*cursor_values))
+        else:
+            cursor_query = cursor_query.filter(keys_tuple < tuple_(*cursor_values))
+    if order == 'asc':
+        cursor_query = cursor_query.order_by(*[asc(attr) for attr in key_attrs])
+    else:
+        cursor_query = cursor_query.order_by(*[desc(attr) for attr in key_attrs])
+    # one more row to know whether there is a next page
+    query_results = cursor_query.limit(limit + 1).all()
+    next_cursor = None
+    if len(query_results) > limit:
+        query_results = query_results[:limit]
+        next_cursor = _encode_cursor(
+            _get_cursor_values(model, query_results[-1], key_attrs)
+        )
+    records = dumps_query_results(query_results, code_list=code_list)
+    meta = {'limit': limit, 'cursor': request.args.get('_cursor'), 'nextCursor': next_cursor}
+    if request.args.get('_count'):
+        count_type = get_count_type()
+        meta['count'] = query_count(query, count_type)
+        meta['countType'] = count_type
     result = {'items': records, 'meta': meta}
     return result
 
 
+def _get_cursor_values(model, query_result, key_attrs) -> List:
+    entity = query_result
+    if not isinstance(query_result, model):
+        # When query has with_entities
+        entity = next(
+            (value for value in query_result if isinstance(value, model)), query_result
+        )
+    return [getattr(entity, attr.key) for attr in key_attrs]
+
+
+def _encode_cursor(values: List) -> str:
+    cursor_values = [
+        value.strftime('%Y-%m-%d %H:%M:%S.%f') if isinstance(value, datetime) else value
+        for value in values
+    ]
+    cursor = urlsafe_b64encode(json.dumps(cursor_values).encode()).decode()
+    return cursor
+
+
+def _decode_cursor(cursor: str, key_attrs) -> List:
+    if not cursor:
+        return []
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(key_attrs):
+            raise ValueError
+        cursor_values = []
+        for value, attr in zip(values, key_attrs):
+            if value is not None and isinstance(attr.type, DateTime):
+                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
+            cursor_values.append(value)
+    except Exception:
+        raise ParameterInvalid(field='_cursor')
+    return cursor_values
+
+
+def get_count_type() -> str:
+    """
+    Count type of request args _count:
+    exact -> count(*), estimated -> rows of planner statistics,
+    capped -> count(*) up to PAGINATE_COUNT_CAP rows
+    """
+
+    count_type = request.args.get('_count', 'exact', type=str) or 'exact'
+    if count_type not in ['exact', 'estimated', 'capped']:
+        raise ParameterInvalid(field='_count')
+    return count_type
+
+
+def query_count(query, count_type: str = 'exact') -> int:
+    """ Count query by count type """
+
+    count_query = query.order_by(None)
+    if count_type == 'estimated':
+        compiled = count_query.statement.compile(dialect=postgresql.dialect())
+        explain_result = count_query.session.connection() \
+            .execute(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params) \
+            .scalar()
+        if isinstance(explain_result, str):
+            explain_result = json.loads(explain_result)
+        total_count = int(explain_result[0]['Plan']['Plan Rows'])
+    elif count_type == 'capped':
+        count_cap = current_app.config.get('PAGINATE_COUNT_CAP', 10000)
+        capped_query = count_query.limit(count_cap).subquery()
+        total_count = count_query.session \
+            .query(func.count()).select_from(capped_query).scalar()
+    else:
+        total_count = count_query.count()
+    return total_count
+
+
 def sort_query(model, query):
     """ sort query """
 
@@ -125,33 +293,7 @@ def filter_api(model, query):
         not app_uid, model.__name__ in exclude_models
     ]):
         return query
-    group_uid_attr = hasattr(model, 'groupID')
-    device_uid_attr = hasattr(model, 'deviceID')
-    device_id_attr = hasattr(model, 'deviceIntID')
-    if not any([group_uid_attr, device_uid_attr, device_id_attr]):
-        return query
-
-    from app.services.devices.models import Group, GroupDevice, Device
-    from app.services.applications.models import ApplicationGroup
-
-    app_groups = Group.query \
-        .join(ApplicationGroup, ApplicationGroup.c.groupID == Group.groupID) \
-        .filter(Group.userIntID == g.user_id) \
-        .with_entities(Group.groupID).all()
-    if group_uid_attr:
-        query = query.filter(model.groupID.in_(app_groups))
-    elif device_uid_attr:
-        devices_uid = Device.query \
-            .join(GroupDevice, GroupDevice.c.deviceIntID == Device.id) \
-            .filter(GroupDevice.c.groupID.in_(app_groups)) \
-            .with_entities(Device.deviceID).all()
-        query = query.filter(model.deviceID.in_(devices_uid))
-    elif device_id_attr:
-        devices_id = Device.query \
-            .join(GroupDevice, GroupDevice.c.deviceIntID == Device.id) \
-            .filter(GroupDevice.c.groupID.in_(app_groups)) \
-            .with_entities(Device.id).all()
-        query = query.filter(model.deviceIntID.in_(devices_id))
+    query = groups_scope.filter_query(model, query, scope_type='app')
     return query
 
 
@@ -165,33 +307,7 @@ def filter_group(model, query):
         model.__name__ in exclude_models
     ]):
         return query
-    group_uid_attr = hasattr(model, 'groupID')
-    device_uid_attr = hasattr(model, 'deviceID')
-    device_id_attr = hasattr(model, 'deviceIntID')
-    if not any([group_uid_attr, device_uid_attr, device_id_attr]):
-        return query
-
-    from app.services.base.models import UserGroup
-    from app.services.devices.models import GroupDevice, Device, Group
-
-    user_groups = Group.query \
-        .join(UserGroup, UserGroup.c.groupID == Group.groupID) \
-        .filter(UserGroup.c.userIntID == g.user_id) \
-        .with_entities(Group.groupID).all()
-    if group_uid_attr:
-        query = query.filter(model.groupID.in_(user_groups))
-    elif device_uid_attr:
-        devices_uid = Device.query \
-            .join(GroupDevice, GroupDevice.c.deviceIntID == Device.id) \
-            .filter(GroupDevice.c.groupID.in_(user_groups)) \
-            .with_entities(Device.deviceID).all()
-        query = query.filter(model.deviceID.in_(devices_uid))
-    elif device_id_attr:
-        devices_id = Device.query \
-            .join(GroupDevice, GroupDevice.c.deviceIntID == Device.id) \
-            .filter(GroupDevice.c.groupID.in_(user_groups)) \
-            .with_entities(Device.id).all()
-        query = query.filter(model.deviceIntID.in_(devices_id))
+    query = groups_scope.filter_query(model, query, scope_type='user')
     return query
 
 
@@ -199,7 +315,7 @@ def filter_request_args(model, query):
     """ Query by request args """
 
     exclude_args = [
-        '_page', '_limit', 'paginate', '_sort', '_order', 'startTime',
+        '_page', '_limit', 'paginate', '_sort', '_order', '_cursor', '_count', 'startTime',
         'endTime', 'createAt', 'msgTime', 'password', 'token', 'id',
         'userIntID', 'tenantID'
     ]
@@ -241,12 +357,21 @@ def filter_request_args(model, query):
     return query
 
 
-def mapping_result(query_result):
-    convert_dict = {
-        key: getattr(query_result, key)
-        for key in query_result.keys()
-    }
-    return convert_dict
+def _get_code_labels(code_list: List = None) -> List:
+    """ Dict code label mapping of code list: [(code, code_value_dict, label_key)] """
+
+    if not code_list:
+        return []
+    cache = Cache()
+    dict_code_cache = cache.dict_code
+    if not dict_code_cache:
+        return []
+    label_key = f'{g.language}Label'
+    code_labels = [
+        (code, dict_code_cache[code], label_key)
+        for code in code_list if dict_code_cache.get(code)
+    ]
+    return code_labels
 
 
 def dict_code_label(record: Dict, code_list: List = None):
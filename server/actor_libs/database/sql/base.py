@@ -1,8 +1,10 @@
+import json
 from typing import AnyStr, Union, Tuple, Optional
 
 from flask import request, current_app
 
 from actor_libs.database.orm import db
+from actor_libs.database.orm.utils import get_count_type
 from actor_libs.errors import ParameterInvalid
 
 
@@ -54,9 +56,9 @@ def _get_paginate_meta(query_sql: AnyStr) -> Tuple[str, dict]:
         raise ParameterInvalid(field='_page')
     offset = (page - 1) * limit
 
-    count_sql = f'SELECT COUNT(*) FROM ({query_sql}) AS query_count'
+    count_type = get_count_type()
     try:
-        query_count = db.engine.execute(count_sql).scalar()
+        query_count = _query_count(query_sql, count_type)
     except Exception as error:
         current_app.logger.error(error)
         query_count = 0
@@ -67,4 +69,22 @@ def _get_paginate_meta(query_sql: AnyStr) -> Tuple[str, dict]:
         "limit": limit,
         "page": page
     }
+    if count_type != 'exact':
+        paginate_meta['countType'] = count_type
     return paginate_sql, paginate_meta
+
+
+def _query_count(query_sql: AnyStr, count_type: str) -> int:
+    if count_type == 'estimated':
+        explain_result = db.engine.execute(f'EXPLAIN (FORMAT JSON) {query_sql}').scalar()
+        if isinstance(explain_result, str):
+            explain_result = json.loads(explain_result)
+        query_count = int(explain_result[0]['Plan']['Plan Rows'])
+    elif count_type == 'capped':
+        count_cap = current_app.config.get('PAGINATE_COUNT_CAP', 10000)
+        count_sql = f'SELECT COUNT(*) FROM ({query_sql} LIMIT {count_cap}) AS query_count'
+        query_count = db.engine.execute(count_sql).scalar()
+    else:
+        count_sql = f'SELECT COUNT(*) FROM ({query_sql}) AS query_count'
+        query_count = db.engine.execute(count_sql).scalar()
+    return query_count
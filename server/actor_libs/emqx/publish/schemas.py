@@ -2,17 +2,15 @@ import json
 
 from flask import g
 from marshmallow import pre_load, post_load
-from sqlalchemy import func
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
-from actor_libs.errors import FormInvalid
+from actor_libs.errors import DataNotFound, FormInvalid
 from actor_libs.schemas import BaseSchema
 from actor_libs.schemas.fields import (
     EmqString, EmqInteger
 )
-from app.services.devices.models import Device, Lwm2mItem
-from app.services.products.models import Product
-from app.services.base.models import DictCode
+from app.services.devices.models import Device
 
 __all__ = [
     'PublishSchema'
@@ -40,13 +38,14 @@ class PublishSchema(BaseSchema):
         if not isinstance(device_uid, str):
             raise FormInvalid(field='deviceID')
         client_info = db.session \
-            .query(Device.id.label('deviceIntID'), Device.productID, Device.tenantID,
-                   DictCode.codeValue.label('cloudProtocol'),
-                   func.lower(DictCode.enLabel).label('protocol')) \
-            .join(Product, Product.productID == Device.productID) \
-            .join(DictCode, DictCode.codeValue == Product.cloudProtocol) \
-            .filter(Device.deviceID == device_uid, Device.tenantID == g.tenant_uid,
-                    DictCode.code == 'cloudProtocol').to_dict()
+            .query(Device.id.label('deviceIntID'), Device.productID, Device.tenantID) \
+            .filter(Device.deviceID == device_uid, Device.tenantID == g.tenant_uid) \
+            .to_dict()
+        product = product_meta_cache.get_product(client_info['productID'])
+        if not product:
+            raise DataNotFound(field='productID')
+        client_info['cloudProtocol'] = product['cloudProtocol']
+        client_info['protocol'] = product['protocol']
         data.update(client_info)
         data['prefixTopic'] = (
             f"/{data['protocol']}/{data['tenantID']}"
@@ -108,10 +107,8 @@ def _validate_lwm2m_topic(topic: str) -> dict:
             raise FormInvalid(field='topic')
         # item_id/xx/object_id/ or item_id/xx/object_id/xxx
         object_id, item_id = product_item_info[0], product_item_info[2]
-        lwm2m_item = Lwm2mItem.query \
-            .filter(Lwm2mItem.objectID == object_id, Lwm2mItem.itemID == item_id) \
-            .with_entities(Lwm2mItem.objectItem, Lwm2mItem.itemType).first()
-        if not lwm2m_item:
+        item_type = product_meta_cache.get_lwm2m_item_type(int(object_id), int(item_id))
+        if not item_type:
             raise FormInvalid(field='topic')
-        handled_payload['type'] = lwm2m_item.itemType
+        handled_payload['type'] = item_type
     return handled_payload
@@ -1,9 +1,10 @@
+import asyncio
 import logging
 from asyncio import TimeoutError, gather
 from logging import Logger
 from typing import List, AnyStr
 
-from aiohttp import BasicAuth, ClientSession
+from aiohttp import BasicAuth, ClientSession, ClientTimeout, TCPConnector
 from aiohttp.client_exceptions import ClientConnectionError
 
 from .responses import ActorResponse
@@ -13,38 +14,85 @@ logger = logging.getLogger('AsyncHttp')
 
 
 class AsyncHttp:
-    def __init__(self, auth: BasicAuth = None):
+    """
+    Use it as a context manager for one-off requests, or create it with
+    lazy=True, open() it on app startup and close() it on shutdown to
+    share the keep-alive connection pool across requests
+    """
+
+    def __init__(self, auth: BasicAuth = None, *,
+                 limit: int = 100, limit_per_host: int = 0,
+                 keepalive_timeout: float = 30, timeout: float = 3,
+                 retries: int = 0, retry_backoff: float = 0.5,
+                 lazy: bool = False):
+        """
+        :param limit: max connections of the pool, 0 is unlimited
+        :param limit_per_host: max connections of the same host, 0 is unlimited
+        :param timeout: request total timeout(seconds)
+        :param retries: retry times on connection error or timeout
+        :param retry_backoff: retry sleep is retry_backoff * 2 ** attempt
+        """
         self.auth = auth
-        self.session = self.request_session()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.session = None if lazy else self.request_session()
 
     def request_session(self) -> ClientSession:
         headers = {
             'content-type': 'application/json',
             'cache-control': 'no-cache'
         }
-        session = ClientSession(headers=headers, auth=self.auth)
+        connector = TCPConnector(
+            limit=self.limit, limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        session = ClientSession(
+            headers=headers, auth=self.auth, connector=connector,
+            timeout=ClientTimeout(total=self.timeout)
+        )
         return session
 
+    async def open(self) -> None:
+        if self.session is None or self.session.closed:
+            self.session = self.request_session()
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
     async def _fetch(self, method_session, url: AnyStr, **kwargs):
         request_json = kwargs.get('json')
-        try:
-            logger.debug(f"{url} -> kwargs:{kwargs}")
-            async with method_session(url, timeout=3, **kwargs) as response:
-                response_content = await response.read()
-                response_code = response.status
-            logger.debug(f"{url} -> response:{response_content}")
-        except ClientConnectionError:
-            response_content = 'client connection error!'
-            response_code = 500
-            logger.error(f"{url} -> {response_content}", exc_info=True)
-        except TimeoutError:
-            response_content = f'timeout error!'
-            response_code = 500
-            logger.error(f"{url} -> {response_content}", exc_info=True)
-        except Exception as e:
-            response_content = f'{e}'
-            response_code = 500
-            logger.error(f"{url} -> {response_content}", exc_info=True)
+        attempt = 0
+        while True:
+            retryable = False
+            try:
+                logger.debug(f"{url} -> kwargs:{kwargs}")
+                async with method_session(url, **kwargs) as response:
+                    response_content = await response.read()
+                    response_code = response.status
+                logger.debug(f"{url} -> response:{response_content}")
+            except ClientConnectionError:
+                response_content = 'client connection error!'
+                response_code = 500
+                retryable = True
+                logger.error(f"{url} -> {response_content}", exc_info=True)
+            except TimeoutError:
+                response_content = f'timeout error!'
+                response_code = 500
+                retryable = True
+                logger.error(f"{url} -> {response_content}", exc_info=True)
+            except Exception as e:
+                response_content = f'{e}'
+                response_code = 500
+                logger.error(f"{url} -> {response_content}", exc_info=True)
+            if not retryable or attempt >= self.retries:
+                break
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
         if request_json:
             task_id = request_json.get('taskID') or request_json.get('task_id')
         else:
@@ -124,7 +172,8 @@ class AsyncHttp:
         return responses
 
     async def __aenter__(self):
+        await self.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.close()
+        await self.close()
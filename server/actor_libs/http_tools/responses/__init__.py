@@ -1,8 +1,8 @@
-from .base import ActorResponse
+from .base import ActorResponse, handle_base_response
 from .emqx import handle_emqx_publish_response, handle_emqx_rule_response
 from .task_scheduler import handle_task_scheduler_response
 
 __all__ = [
-    'ActorResponse', 'handle_emqx_publish_response',
+    'ActorResponse', 'handle_base_response', 'handle_emqx_publish_response',
     'handle_emqx_rule_response', 'handle_task_scheduler_response'
 ]
@@ -1,7 +1,8 @@
 from .data_init import (
     db_operate, convert_timescaledb, init_services, init_resources,
     init_default_roles, update_default_roles, init_admin_account,
-    init_dict_code, init_system_info, init_lwm2m_info, create_triggers
+    init_dict_code, init_system_info, init_lwm2m_info, create_triggers,
+    create_continuous_aggregates
 )
 from .supervisord import supervisord_config
 
@@ -16,6 +17,7 @@ class ProjectManage:
         db_operate(execute_type='deploy')
         convert_timescaledb()
         create_triggers()
+        create_continuous_aggregates()
         init_services()
         init_resources()
         init_default_roles()
@@ -28,6 +30,7 @@ class ProjectManage:
     @staticmethod
     def project_upgrade():
         db_operate(execute_type='upgrade')
+        create_continuous_aggregates()
         init_services()
         init_resources()
         update_default_roles()
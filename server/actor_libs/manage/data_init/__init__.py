@@ -1,13 +1,15 @@
 from .db_base import db_operate
 from .default_roles import init_default_roles, update_default_roles
 from .table_init import (
-    convert_timescaledb, create_triggers, init_services, init_resources,
+    convert_timescaledb, create_triggers, create_continuous_aggregates,
+    init_services, init_resources,
     init_admin_account, init_dict_code, init_system_info, init_lwm2m_info
 )
 
 
 __all__ = [
     'db_operate', 'convert_timescaledb', 'create_triggers',
+    'create_continuous_aggregates',
     'init_resources', 'init_services', 'init_default_roles',
     'update_default_roles', 'init_admin_account',
     'init_dict_code', 'init_system_info', 'init_lwm2m_info'
@@ -8,6 +8,7 @@ from flask import current_app
 from sqlalchemy import text
 from yaml.loader import FullLoader
 
+from actor_libs.cache import bump_cache_version
 from actor_libs.database.orm import db
 from actor_libs.utils import get_cwd, get_services_path
 from app.services.base.models import (
@@ -16,7 +17,8 @@ from app.services.devices.models import Lwm2mObject, Lwm2mItem
 
 
 __all__ = [
-    'convert_timescaledb', 'create_triggers', 'init_services',
+    'convert_timescaledb', 'create_triggers', 'create_continuous_aggregates',
+    'init_services',
     'init_resources', 'init_admin_account', 'init_dict_code',
     'init_system_info', 'init_lwm2m_info'
 ]
@@ -98,6 +100,137 @@ def create_triggers():
         connection.execute(create_latest_events_trigger)
 
 
+def create_continuous_aggregates():
+    """
+    Continuous aggregate mode: emqx_bills_hour_cagg is refreshed by timescaledb
+    and device_status_counts is maintained by statement triggers of devices
+    """
+
+    if not current_app.config.get('CONTINUOUS_AGGREGATE'):
+        return
+
+    emqx_bills_hour_cagg = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS emqx_bills_hour_cagg
+    WITH (timescaledb.continuous) AS
+    SELECT time_bucket(INTERVAL '1 hour', "msgTime") AS "countTime",
+           "msgType",
+           COUNT(*)                                AS "msgCount",
+           SUM("msgSize")                          AS "msgSize",
+           "tenantID"
+    FROM emqx_bills
+    GROUP BY 1, "msgType", "tenantID"
+    WITH NO DATA;
+    """
+
+    # real time aggregate for the buckets not materialized yet
+    emqx_bills_hour_cagg_options = """
+    ALTER MATERIALIZED VIEW emqx_bills_hour_cagg
+        SET (timescaledb.materialized_only = false);
+    """
+
+    emqx_bills_hour_cagg_policy = """
+    SELECT add_continuous_aggregate_policy(
+        'emqx_bills_hour_cagg',
+        start_offset => INTERVAL '3 hours',
+        end_offset => INTERVAL '1 hour',
+        schedule_interval => INTERVAL '10 minutes',
+        if_not_exists => true
+    );
+    """
+
+    emqx_bills_hour_cagg_refresh = """
+    CALL refresh_continuous_aggregate('emqx_bills_hour_cagg', NULL, NULL);
+    """
+
+    device_status_counts_fn = """
+    CREATE OR REPLACE FUNCTION device_status_counts_fn()
+        RETURNS TRIGGER
+        LANGUAGE PLPGSQL AS
+    $BODY$
+    BEGIN
+        -- devices without tenant (created by admin) or status are not counted
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO device_status_counts("tenantID", "deviceStatus", "deviceCount")
+            SELECT "tenantID", "deviceStatus", COUNT(*)
+            FROM new_devices
+            WHERE "tenantID" IS NOT NULL AND "deviceStatus" IS NOT NULL
+            GROUP BY "tenantID", "deviceStatus"
+            ON CONFLICT ("tenantID", "deviceStatus")
+                DO UPDATE SET "deviceCount" = device_status_counts."deviceCount"
+                                              + excluded."deviceCount";
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE device_status_counts
+            SET "deviceCount" = device_status_counts."deviceCount" - changes.count
+            FROM (SELECT "tenantID", "deviceStatus", COUNT(*) AS count
+                  FROM old_devices
+                  WHERE "tenantID" IS NOT NULL AND "deviceStatus" IS NOT NULL
+                  GROUP BY "tenantID", "deviceStatus") changes
+            WHERE device_status_counts."tenantID" = changes."tenantID"
+              AND device_status_counts."deviceStatus" = changes."deviceStatus";
+        ELSE
+            -- most updates don't change status, only net changes are written
+            INSERT INTO device_status_counts("tenantID", "deviceStatus", "deviceCount")
+            SELECT "tenantID", "deviceStatus", SUM(delta)
+            FROM (SELECT "tenantID", "deviceStatus", -1 AS delta FROM old_devices
+                  UNION ALL
+                  SELECT "tenantID", "deviceStatus", 1 AS delta FROM new_devices) changes
+            WHERE "tenantID" IS NOT NULL AND "deviceStatus" IS NOT NULL
+            GROUP BY "tenantID", "deviceStatus"
+            HAVING SUM(delta) != 0
+            ON CONFLICT ("tenantID", "deviceStatus")
+                DO UPDATE SET "deviceCount" = device_status_counts."deviceCount"
+                                              + excluded."deviceCount";
+        END IF;
+        RETURN NULL;
+    END
+    $BODY$;
+    """
+
+    device_status_counts_triggers = """
+    DROP TRIGGER IF EXISTS device_status_counts_insert_trigger ON devices;
+    DROP TRIGGER IF EXISTS device_status_counts_update_trigger ON devices;
+    DROP TRIGGER IF EXISTS device_status_counts_delete_trigger ON devices;
+    CREATE TRIGGER device_status_counts_insert_trigger
+        AFTER INSERT ON devices
+        REFERENCING NEW TABLE AS new_devices
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE device_status_counts_fn();
+    CREATE TRIGGER device_status_counts_update_trigger
+        AFTER UPDATE ON devices
+        REFERENCING OLD TABLE AS old_devices NEW TABLE AS new_devices
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE device_status_counts_fn();
+    CREATE TRIGGER device_status_counts_delete_trigger
+        AFTER DELETE ON devices
+        REFERENCING OLD TABLE AS old_devices
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE device_status_counts_fn();
+    """
+
+    # devices are locked while counts are rebuilt and triggers are created
+    device_status_counts_init = """
+    LOCK TABLE devices IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM device_status_counts;
+    INSERT INTO device_status_counts("tenantID", "deviceStatus", "deviceCount")
+    SELECT "tenantID", "deviceStatus", COUNT(*)
+    FROM devices
+    WHERE "tenantID" IS NOT NULL AND "deviceStatus" IS NOT NULL
+    GROUP BY "tenantID", "deviceStatus";
+    """
+
+    # continuous aggregate can't be created or refreshed in a transaction
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        connection.execute(emqx_bills_hour_cagg)
+        connection.execute(emqx_bills_hour_cagg_options)
+        connection.execute(emqx_bills_hour_cagg_policy)
+        connection.execute(emqx_bills_hour_cagg_refresh)
+    with db.engine.begin() as connection:
+        connection.execute(device_status_counts_fn)
+        connection.execute(device_status_counts_init)
+        connection.execute(device_status_counts_triggers)
+
+
 def init_services() -> None:
     """ services table init """
 
@@ -197,6 +330,8 @@ def init_dict_code() -> None:
                 if hasattr(dict_code, key):
                     setattr(dict_code, key, value)
                 db.session.add(dict_code)
+    # workers reload dict code by the new version
+    bump_cache_version(db.session, 'dict_code')
     db.session.commit()
     info = "dict_code table init successfully!"
     print(info)
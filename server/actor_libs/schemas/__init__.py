@@ -1,7 +1,10 @@
+from typing import List
+
 from flask import request, g
 from marshmallow import Schema, SchemaOpts, fields, post_load
 
 from actor_libs.errors import APIException, FormInvalid
+from .loaders import BatchLoader
 
 
 __all__ = ['BaseSchema']
@@ -19,6 +22,8 @@ class CustomOptions(SchemaOpts):
 class BaseSchema(Schema):
     OPTIONS_CLASS = CustomOptions
     is_private = False
+    # per-row lookups loaded for all objects of a page before dumping
+    batch_loaders: List[BatchLoader] = []
 
     id = fields.Int(dump_only=True)
     createAt = fields.DateTime(dump_only=True)
@@ -0,0 +1,49 @@
+from collections import defaultdict
+from typing import Any, Callable, Iterable, List, Tuple
+
+
+__all__ = ['BatchLoader']
+
+
+class BatchLoader:
+    """
+    Per-row lookup of a schema loaded for all objects of a page in one query.
+    The loaded value is attached to each object as attr before dumping,
+    post_dump(pass_original=True) reads it by get_value, a single dumped
+    object without loaded value is loaded on demand
+    """
+
+    def __init__(self, attr: str, load_func: Callable[[List], Iterable[Tuple[Any, Any]]],
+                 key: str = 'id', many: bool = True):
+        """
+        :param attr: attribute of object to attach the loaded value
+        :param load_func: load (key, value) rows of the keys in one query
+        :param key: attribute of object to load by
+        :param many: list of values for a key if True else single value
+        """
+
+        self.attr = attr
+        self.load_func = load_func
+        self.key = key
+        self.many = many
+
+    def load(self, objs: List) -> None:
+        keys = {getattr(obj, self.key) for obj in objs}
+        keys.discard(None)
+        loaded_values = defaultdict(list) if self.many else {}
+        if keys:
+            for key, value in self.load_func(list(keys)):
+                if self.many:
+                    loaded_values[key].append(value)
+                else:
+                    loaded_values[key] = value
+        for obj in objs:
+            value = loaded_values.get(getattr(obj, self.key))
+            if value is None and self.many:
+                value = []
+            setattr(obj, self.attr, value)
+
+    def get_value(self, obj):
+        if not hasattr(obj, self.attr):
+            self.load([obj])
+        return getattr(obj, self.attr)
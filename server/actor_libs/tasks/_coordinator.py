@@ -0,0 +1,80 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from actor_libs.database.async_db import db
+from actor_libs.utils import generate_uuid
+from ._sql_statement import (
+    heartbeat_node_sql, query_live_nodes_sql, delete_node_sql, claim_fire_sql
+)
+
+
+__all__ = ['NodeCoordinator']
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeCoordinator:
+    """
+    Coordinate timer task nodes through postgres:
+    live nodes heartbeat to timer_nodes, partition of a node is its index
+    in live nodes, a node is failed over after node_ttl without heartbeat.
+    A crontab fire is claimed by one node in timer_fires
+    """
+
+    def __init__(self, node_name: str, node_ttl: int = 30):
+        self.node_id = f"{node_name}@{socket.gethostname()}:{os.getpid()}:{generate_uuid(6)}"
+        self.node_ttl = timedelta(seconds=node_ttl)
+        # (index, count), a node without heartbeat handles all partitions
+        self.partition: Tuple[int, int] = (0, 1)
+
+    async def heartbeat(self) -> None:
+        try:
+            await self._heartbeat()
+        except Exception as error:
+            logger.error(f"{self.node_id} heartbeat: {error}")
+
+    async def _heartbeat(self) -> None:
+        async with db.pool.acquire() as conn:
+            await db.conn_execute(conn, heartbeat_node_sql, self.node_id, self.node_ttl)
+            live_nodes = [
+                node['nodeID']
+                for node in await db.conn_execute(
+                    conn, query_live_nodes_sql, self.node_ttl, fetch_type='many'
+                )
+            ]
+        if self.node_id in live_nodes:
+            partition = (live_nodes.index(self.node_id), len(live_nodes))
+        else:
+            partition = (0, 1)
+        if partition != self.partition:
+            logger.info(f"{self.node_id} partition: {partition}")
+        self.partition = partition
+
+    async def leave(self) -> None:
+        """ Leave on stop, partitions are taken over at the next heartbeat """
+
+        try:
+            async with db.pool.acquire() as conn:
+                await db.conn_execute(conn, delete_node_sql, self.node_id)
+        except Exception as error:
+            logger.error(f"{self.node_id} leave: {error}")
+
+    async def claim_fire(self, job_name: str, fire_time: datetime) -> bool:
+        """ Return True if the fire of job is claimed by this node """
+
+        if fire_time.tzinfo:
+            fire_time = fire_time.astimezone(timezone.utc).replace(tzinfo=None)
+        try:
+            async with db.pool.acquire() as conn:
+                claimed_node = await db.conn_execute(
+                    conn, claim_fire_sql, job_name, fire_time, self.node_id,
+                    fetch_type='val'
+                )
+        except Exception as error:
+            logger.error(f"{job_name} claim fire {fire_time}: {error}")
+            return False
+        return claimed_node == self.node_id
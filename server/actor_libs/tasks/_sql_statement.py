@@ -1,14 +1,51 @@
-insert_task_sql = """
- INSERT INTO actor_tasks
- ("createAt", "taskID", "taskStatus", "taskName", "taskInfo")
- VALUES('{createAt}', '{taskID}', {taskStatus}, '{taskName}', '{taskInfo}')
-"""
-
-update_task_sql = """
-UPDATE "actor_tasks" 
-  SET "updateAt"='{updateAt}', 
-      "taskStatus"={taskStatus},
-      "taskProgress"={taskProgress},
-      "taskResult"='{taskResult}'
-WHERE "taskID"='{taskID}'
-"""
+from actor_libs.database.async_db import db
+
+
+insert_task_sql = db.register_statement('insert_task', """
+INSERT INTO actor_tasks
+    ("createAt", "taskID", "taskStatus", "taskName", "taskInfo")
+VALUES ($1, $2, $3, $4, $5)
+""")
+
+update_task_sql = db.register_statement('update_task', """
+UPDATE "actor_tasks"
+  SET "updateAt" = $1,
+      "taskStatus" = $2,
+      "taskProgress" = $3,
+      "taskResult" = $4
+WHERE "taskID" = $5
+""")
+
+# $1: nodeID, $2: node ttl, dead nodes are removed
+heartbeat_node_sql = db.register_statement('heartbeat_node', """
+WITH dead_nodes AS (
+    DELETE FROM timer_nodes
+    WHERE "heartbeatAt" < localtimestamp - $2::interval * 10
+      AND "nodeID" != $1
+)
+INSERT INTO timer_nodes("nodeID", "heartbeatAt")
+VALUES ($1, localtimestamp)
+ON CONFLICT ("nodeID") DO UPDATE SET "heartbeatAt" = excluded."heartbeatAt"
+""")
+
+query_live_nodes_sql = db.register_statement('query_live_nodes', """
+SELECT "nodeID"
+FROM timer_nodes
+WHERE "heartbeatAt" > localtimestamp - $1::interval
+ORDER BY "nodeID"
+""")
+
+delete_node_sql = db.register_statement('delete_node', """
+DELETE FROM timer_nodes
+WHERE "nodeID" = $1
+""")
+
+# $1: jobName, $2: fireTime, $3: nodeID, return a row if the fire is claimed
+claim_fire_sql = db.register_statement('claim_fire', """
+INSERT INTO timer_fires("jobName", "fireTime", "nodeID")
+VALUES ($1, $2, $3)
+ON CONFLICT ("jobName") DO UPDATE
+    SET "fireTime" = excluded."fireTime", "nodeID" = excluded."nodeID"
+    WHERE timer_fires."fireTime" < excluded."fireTime"
+RETURNING "nodeID"
+""")
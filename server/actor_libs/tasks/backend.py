@@ -48,9 +48,9 @@ async def store_task(func, *, func_args=None, func_kwargs=None):
         'kwargs': func_kwargs if func_kwargs else {}
     }
     task.taskInfo = json.dumps(task_info)
-    _actor_task = task.to_dict()
     await db.execute(
-        insert_task_sql.format(**_actor_task)
+        insert_task_sql,
+        task.createAt, task.taskID, task.taskStatus, task.taskName, task.taskInfo
     )
     return task.taskID
 
@@ -58,15 +58,13 @@ async def store_task(func, *, func_args=None, func_kwargs=None):
 async def update_task(task_id, update_dict: Dict = None) -> bool:
     if not update_dict:
         update_dict = {}
-    task_update_dict = {
-        'taskID': task_id,
-        'updateAt': datetime.now(),
-        'taskStatus': update_dict['status'] if update_dict.get('status') else 2,
-        'taskProgress': update_dict['progress'] if update_dict.get('progress') else 0,
-        'taskResult': json.dumps(update_dict['result']) if update_dict.get('result') else 'NULL'
-    }
-    update_sql = update_task_sql.format(**task_update_dict)
-    execute_result = await db.execute(update_sql)
+    task_status = update_dict['status'] if update_dict.get('status') else 2
+    task_progress = update_dict['progress'] if update_dict.get('progress') else 0
+    task_result = json.dumps(update_dict['result']) if update_dict.get('result') else None
+    execute_result = await db.execute(
+        update_task_sql,
+        datetime.now(), task_status, task_progress, task_result, task_id
+    )
     return execute_result
 
 
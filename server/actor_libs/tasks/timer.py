@@ -1,12 +1,14 @@
 import asyncio
+from datetime import datetime
 from functools import wraps, partial
 
 from mode import Service
 from mode.timers import timer_intervals
 from mode.utils.objects import qualname
+from ._coordinator import NodeCoordinator
 from .backend import store_task, update_task
 
-from .utils import secs_for_next
+from .utils import next_fire_time
 
 
 class App(Service):
@@ -15,8 +17,11 @@ class App(Service):
     _startup_events = []
     _stop_events = []
 
-    def __init__(self, node_id, *, loop=None):
+    def __init__(self, node_id, *, loop=None,
+                 heartbeat_interval: int = 10, node_ttl: int = 30):
         self.node_id = node_id
+        self.heartbeat_interval = heartbeat_interval
+        self.coordinator = NodeCoordinator(node_id, node_ttl=node_ttl)
         super().__init__(loop=loop)
 
     def on_event(self, event_type):
@@ -65,15 +70,21 @@ class App(Service):
         return self._timer_tasks.append(decorated)
 
     def crontab(self, func=None, cron_format: str = None, timezone=None):
+        """ Each fire of crontab is run by the node which claims it """
+
         if func is None:
             return partial(self.crontab, cron_format=cron_format, timezone=timezone)
 
+        job_name = qualname(func)
+
         @wraps(func)
         async def decorated(*args, **kwargs):
             while not self.should_stop:
-                next_time = secs_for_next(cron_format, timezone)
-                await asyncio.sleep(next_time)
-                await func(*args, **kwargs)
+                fire_time = next_fire_time(cron_format, timezone)
+                next_time = (fire_time - datetime.now(fire_time.tzinfo)).total_seconds()
+                await asyncio.sleep(max(next_time, 0))
+                if await self.coordinator.claim_fire(job_name, fire_time):
+                    await func(*args, **kwargs)
 
         return self._timer_tasks.append(decorated)
 
@@ -86,12 +97,20 @@ class App(Service):
     def _agent(self):
         ...
 
+    async def _heartbeat(self):
+        while not self.should_stop:
+            await self.sleep(self.heartbeat_interval)
+            await self.coordinator.heartbeat()
+
     async def on_started(self):
         for _event in self._startup_events:
             await _event()
+        await self.coordinator.heartbeat()
+        self.add_future(self._heartbeat())
         for task in self._timer_tasks:
             self.add_future(task())
 
     async def on_stop(self):
+        await self.coordinator.leave()
         for _event in self._stop_events:
             await _event()
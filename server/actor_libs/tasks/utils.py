@@ -15,3 +15,10 @@ def secs_for_next(cron_format: str, tz: tzinfo = None) -> float:
     now = datetime.now(tz) if tz else now_ts
     cron_it = croniter(cron_format, start_time=now)
     return cron_it.get_next(float) - now_ts
+
+
+def next_fire_time(cron_format: str, tz: tzinfo = None) -> datetime:
+    """Return the next execution time given crontab style format."""
+    now = datetime.now(tz) if tz else datetime.now().astimezone()
+    cron_it = croniter(cron_format, start_time=now)
+    return cron_it.get_next(datetime)
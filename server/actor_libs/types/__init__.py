@@ -1,4 +1,4 @@
-from .base import EventLoop, JSONDecoder, JSONEncoder, StrOrURL, DictCodeCache
+from .base import EventLoop, JSONDecoder, JSONEncoder, StrOrURL
 from .task import TaskRegistry, TaskResult
 
 
@@ -8,7 +8,6 @@ __all__ = [
     'JSONEncoder',
     'JSONDecoder',
     'StrOrURL',
-    'DictCodeCache',
 
     # types.task
     'TaskResult',
@@ -1,13 +1,12 @@
 from asyncio import AbstractEventLoop
-from typing import Any, Callable, Union, Dict
+from typing import Any, Callable, Union
 
 from yarl import URL
 
 
-__all__ = ['EventLoop', 'JSONDecoder', 'JSONEncoder', 'StrOrURL', 'DictCodeCache']
+__all__ = ['EventLoop', 'JSONDecoder', 'JSONEncoder', 'StrOrURL']
 
 EventLoop = AbstractEventLoop
 JSONEncoder = Callable[[Any], str]
 JSONDecoder = Callable[[str], Any]
 StrOrURL = Union[str, URL]
-DictCodeCache = Dict
@@ -4,7 +4,8 @@ import random
 import socket
 import subprocess
 import uuid
-from typing import AnyStr, Set, Dict
+from datetime import datetime, timedelta
+from typing import AnyStr, Set, Dict, Optional
 
 import arrow
 from flask import request
@@ -170,6 +171,37 @@ def check_interval_time(interval_time: Dict):
     return check_status
 
 
+def get_next_fire_time(timer_type: int, after: datetime,
+                       crontab_time: datetime = None,
+                       interval_time: Dict = None) -> Optional[datetime]:
+    """
+    Next fire time of a timer publish later than after (wall clock of TIMEZONE),
+    None if a schedule timer has fired
+    :param timer_type: 1 schedule time, 2 interval time
+    :param interval_time: {'weekday': 0, 'hour': 0, 'minute': 1}
+    """
+
+    if timer_type == 1 and crontab_time:
+        fire_time = crontab_time.replace(second=0, microsecond=0)
+        return fire_time if fire_time > after else None
+    if timer_type != 2 or not interval_time or interval_time.get('minute') is None:
+        return None
+    fire_time = after.replace(minute=interval_time['minute'], second=0, microsecond=0)
+    if interval_time.get('hour') is None:
+        period = timedelta(hours=1)
+    elif interval_time.get('weekday') is None:
+        fire_time = fire_time.replace(hour=interval_time['hour'])
+        period = timedelta(days=1)
+    else:
+        fire_time = fire_time.replace(hour=interval_time['hour']) + timedelta(
+            days=(interval_time['weekday'] - after.weekday()) % 7
+        )
+        period = timedelta(days=7)
+    if fire_time <= after:
+        fire_time += period
+    return fire_time
+
+
 def get_host_ip() -> str:
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
@@ -9,6 +9,7 @@ from sqlalchemy import exc, event
 from sqlalchemy.pool import Pool
 
 from actor_libs.auth import HttpAuth
+from actor_libs.cache import dict_code_cache, product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import DataNotFound
 from actor_libs.logs import create_logger
@@ -38,6 +39,7 @@ def create_app():
     app.config.update(app_config)
     # init app
     db.init_app(app)
+    auth.init_app(app)
     migrate.init_app(app, db, compare_type=True)
     cros.init_app(app)
     # mail.init_app(app)
@@ -110,6 +112,15 @@ def ping_connection(dbapi_connection, connectidon_record, connection_proxy):
     cursor.close()
 
 
+@app.before_first_request
+def warm_dict_code_cache():
+    """ Load shared dict code and set product meta cache once per worker """
+    dict_code_cache.check_interval = current_app.config.get('DICT_CODE_CHECK_INTERVAL', 10)
+    product_meta_cache.maxsize = current_app.config.get('PRODUCT_META_CACHE_SIZE', 1000)
+    product_meta_cache.ttl = current_app.config.get('PRODUCT_META_CACHE_TTL', 300)
+    dict_code_cache.refresh()
+
+
 @app.before_request
 def before_request():
     accept_language = request.headers.get('Accept-Language')
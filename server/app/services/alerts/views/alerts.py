@@ -30,7 +30,7 @@ def list_current_alerts():
     device_name = request.args.get('deviceName_like')
     if device_name:
         query = query.filter(Device.deviceName.ilike(u'%{0}%'.format(device_name)))
-    records = query.pagination(code_list=['alertSeverity'])
+    records = query.pagination(code_list=['alertSeverity'], cursor_sort='startTime')
     return jsonify(records)
 
 
@@ -103,7 +103,7 @@ def list_history_alerts():
     device_name = request.args.get('deviceName_like')
     if device_name:
         query = query.filter(Device.deviceName.ilike(u'%{0}%'.format(device_name)))
-    records = query.pagination(code_list=['alertSeverity'])
+    records = query.pagination(code_list=['alertSeverity'], cursor_sort='endTime')
     return jsonify(records)
 
 
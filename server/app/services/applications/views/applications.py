@@ -1,7 +1,7 @@
 from flask import jsonify
 from sqlalchemy.exc import IntegrityError
 
-from actor_libs.database.orm import db
+from actor_libs.database.orm import db, groups_scope
 from actor_libs.errors import ReferencedError
 from actor_libs.utils import get_delete_ids
 from app import auth
@@ -47,6 +47,7 @@ def create_application():
     request_dict = ApplicationSchema.validate_request()
     application = Application()
     created_app = application.create(request_dict)
+    groups_scope.invalidate([created_app.userIntID])
     record = created_app.to_dict()
     return jsonify(record), 201
 
@@ -58,6 +59,7 @@ def update_application(application_id):
         .filter(Application.id == application_id).first_or_404()
     request_dict = ApplicationSchema.validate_request(obj=application)
     updated_app = application.update(request_dict)
+    groups_scope.invalidate([updated_app.userIntID])
     record = updated_app.to_dict()
     return jsonify(record)
 
@@ -69,10 +71,12 @@ def delete_application():
     applications = Application.query \
         .filter(Application.id.in_(app_ids)) \
         .many(allow_none=False, expect_result=len(app_ids))
+    users_id = [app.userIntID for app in applications]
     try:
         for app in applications:
             app.delete()
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    groups_scope.invalidate(users_id)
     return '', 204
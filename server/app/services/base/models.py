@@ -3,14 +3,15 @@ from flask import current_app
 from itsdangerous import TimedJSONWebSignatureSerializer as JWT
 from sqlalchemy.dialects.postgresql import JSONB
 
-from actor_libs.database.orm import BaseModel, db
+from actor_libs.database.orm import BaseModel, ModelMixin, db
 from config import BaseConfig
 
 
 __all__ = [
     'User', 'UserGroup', 'Role', 'Resource', 'Permission', 'Tenant',
-    'DictCode', 'SystemInfo', 'Invitation', 'LoginLog',
-    'Message', 'ActorTask', 'Service', 'UploadInfo'
+    'DictCode', 'CacheVersion', 'SystemInfo', 'Invitation', 'LoginLog',
+    'Message', 'ActorTask', 'RollupWatermark', 'TimerNode', 'TimerFire',
+    'Service', 'UploadInfo'
 ]
 
 
@@ -172,6 +173,14 @@ class DictCode(BaseModel):
     zhLabel = db.Column(db.String(50))  # zh label
 
 
+class CacheVersion(ModelMixin, db.Model):
+    """ Version of shared caches, bumped when cached data is changed """
+    __tablename__ = 'cache_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, server_default='0')
+    updateAt = db.Column(db.DateTime)
+
+
 class SystemInfo(BaseModel):
     __tablename__ = 'system_info'
     key = db.Column(db.String(50))
@@ -234,6 +243,29 @@ class ActorTask(BaseModel):
     taskResult = db.Column(JSONB)
 
 
+class RollupWatermark(ModelMixin, db.Model):
+    """ Rows before watermark are aggregated to the rollup table """
+    __tablename__ = 'rollup_watermarks'
+    rollupName = db.Column(db.String(50), primary_key=True)  # rollup table name
+    watermark = db.Column(db.DateTime)
+    updateAt = db.Column(db.DateTime)
+
+
+class TimerNode(ModelMixin, db.Model):
+    """ Live timer task nodes, timer publish is partitioned by nodes """
+    __tablename__ = 'timer_nodes'
+    nodeID = db.Column(db.String(100), primary_key=True)
+    heartbeatAt = db.Column(db.DateTime)
+
+
+class TimerFire(ModelMixin, db.Model):
+    """ Last fire time of a crontab, claimed by one timer task node """
+    __tablename__ = 'timer_fires'
+    jobName = db.Column(db.String(100), primary_key=True)
+    fireTime = db.Column(db.DateTime)  # utc
+    nodeID = db.Column(db.String(100))
+
+
 class Service(BaseModel):
     __tablename__ = 'services'
     serviceName = db.Column(db.String(50))
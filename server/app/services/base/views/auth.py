@@ -93,6 +93,13 @@ def login():
     }), 201
 
 
+@bp.route('/logout', methods=['POST'])
+@auth.login_required(permission_required=False)
+def logout():
+    auth.invalidate_request_token()
+    return '', 204
+
+
 @bp.route('/signup', methods=['POST'])
 def signup():
     user_dict = UserSchema.validate_request()
@@ -2,18 +2,18 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 
-from flask import g, request, jsonify
+from flask import current_app, g, request, jsonify
 from sqlalchemy import func, cast, Integer
 
-from actor_libs.cache import Cache
+from actor_libs.cache import dict_code_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import ParameterInvalid
 from actor_libs.utils import get_charts_config
 from app import auth
 from app.services.devices.models import (
     Device, EndDevice, Gateway, Group,
-    DeviceCountHour, DeviceCountDay, DeviceCountMonth,
-    EmqxBillHour, EmqxBillDay, EmqxBillMonth
+    DeviceCountHour, DeviceCountDay, DeviceCountMonth, DeviceStatusCount,
+    EmqxBillHour, EmqxBillDay, EmqxBillMonth, EmqxBillHourAggr
 )
 from app.services.products.models import Product
 from app.services.device_data.models import ConnectLog
@@ -58,6 +58,13 @@ def overview_devices_count():
         .group_by(func.to_char(model.countTime, time_format)) \
         .order_by(func.to_char(model.countTime, time_format)).all()
     devices_count_dict = dict(time_devices_count)
+    if current_app.config.get('CONTINUOUS_AGGREGATE') and x_data \
+            and x_data[-1] not in devices_count_dict:
+        # the latest bucket is not counted yet, read current counts
+        current_count = db.session \
+            .query(func.sum(DeviceStatusCount.deviceCount)) \
+            .filter_tenant(tenant_uid=g.tenant_uid).scalar()
+        devices_count_dict[x_data[-1]] = current_count or 0
     records = {
         'time': x_data,
         'value': [devices_count_dict.get(date, 0) for date in x_data]
@@ -72,18 +79,23 @@ def overview_messages_count():
         'hour': EmqxBillHour, 'day': EmqxBillDay, 'month': EmqxBillMonth
     }
     time_unit, time_format = _validate_time_unit()
-    model = time_unit_models[time_unit]
     charts_config = get_charts_config(time_unit=time_unit)
     start_time = charts_config['start_time']
     x_data = charts_config['x_data']
-    # Query different models according to time unit
-    time_messages_count = db.session \
-        .query(func.to_char(model.countTime, time_format).label('msgTime'),
-               model.msgType, func.sum(model.msgCount)) \
-        .filter_tenant(tenant_uid=g.tenant_uid) \
-        .filter(model.countTime > start_time) \
-        .group_by(func.to_char(model.countTime, time_format), model.msgType) \
-        .order_by(func.to_char(model.countTime, time_format)).all()
+    if current_app.config.get('CONTINUOUS_AGGREGATE'):
+        time_messages_count = _query_messages_aggr(
+            func.sum(EmqxBillHourAggr.c.msgCount), time_format, start_time
+        )
+    else:
+        # Query different models according to time unit
+        model = time_unit_models[time_unit]
+        time_messages_count = db.session \
+            .query(func.to_char(model.countTime, time_format).label('msgTime'),
+                   model.msgType, func.sum(model.msgCount)) \
+            .filter_tenant(tenant_uid=g.tenant_uid) \
+            .filter(model.countTime > start_time) \
+            .group_by(func.to_char(model.countTime, time_format), model.msgType) \
+            .order_by(func.to_char(model.countTime, time_format)).all()
     records = _convert_query_message(time_messages_count, x_data)
     return jsonify(records)
 
@@ -95,23 +107,45 @@ def overview_messages_flow():
         'hour': EmqxBillHour, 'day': EmqxBillDay, 'month': EmqxBillMonth
     }
     time_unit, time_format = _validate_time_unit()
-    model = time_unit_models[time_unit]
     charts_config = get_charts_config(time_unit=time_unit)
     start_time = charts_config['start_time']
     x_data = charts_config['x_data']
-    # Query different models according to time unit
-    time_messages_flow = db.session \
-        .query(func.to_char(model.countTime, time_format).label('msgTime'),
-               model.msgType,
-               cast(func.sum(model.msgSize) / 1024, Integer)) \
-        .filter_tenant(tenant_uid=g.tenant_uid) \
-        .filter(model.countTime > start_time) \
-        .group_by(func.to_char(model.countTime, time_format), model.msgType) \
-        .order_by(func.to_char(model.countTime, time_format)).all()
+    if current_app.config.get('CONTINUOUS_AGGREGATE'):
+        time_messages_flow = _query_messages_aggr(
+            cast(func.sum(EmqxBillHourAggr.c.msgSize) / 1024, Integer),
+            time_format, start_time
+        )
+    else:
+        # Query different models according to time unit
+        model = time_unit_models[time_unit]
+        time_messages_flow = db.session \
+            .query(func.to_char(model.countTime, time_format).label('msgTime'),
+                   model.msgType,
+                   cast(func.sum(model.msgSize) / 1024, Integer)) \
+            .filter_tenant(tenant_uid=g.tenant_uid) \
+            .filter(model.countTime > start_time) \
+            .group_by(func.to_char(model.countTime, time_format), model.msgType) \
+            .order_by(func.to_char(model.countTime, time_format)).all()
     records = _convert_query_message(time_messages_flow, x_data)
     return jsonify(records)
 
 
+def _query_messages_aggr(value_column, time_format, start_time) -> List[Tuple]:
+    """ Query emqx bills of every time unit from the hour continuous aggregate """
+
+    bill_aggr = EmqxBillHourAggr.c
+    msg_time = func.to_char(bill_aggr.countTime, time_format)
+    query = db.session \
+        .query(msg_time.label('msgTime'), bill_aggr.msgType, value_column) \
+        .filter(bill_aggr.countTime > start_time)
+    if g.get('tenant_uid'):
+        query = query.filter(bill_aggr.tenantID == g.tenant_uid)
+    query_results = query \
+        .group_by(msg_time, bill_aggr.msgType) \
+        .order_by(msg_time).all()
+    return query_results
+
+
 def _query_object_count(model) -> int:
     tenant_uid = g.tenant_uid
     object_count = db.session.query(func.count(model.id)) \
@@ -163,18 +197,17 @@ def _convert_query_message(query_results, x_data):
     for message in query_results:
         msg_time, msg_type, msg_obj = message
         message_type_dict[msg_type][msg_time] = msg_obj
-    msg_type_dict_code = Cache().dict_code['msgType']
-    msg_types: List[int] = list(msg_type_dict_code.keys())
+    dict_code_cache.refresh()
+    msg_type_labels = dict_code_cache.labels('msgType', 'en')
+    msg_types: List[int] = list(msg_type_labels.keys())
     records = {}
     query_types = []
     for msg_type, msg_dict in message_type_dict.items():
         y_data = [msg_dict.get(date, 0) for date in x_data]
-        if msg_type_dict_code.get(msg_type):
-            code_label = msg_type_dict_code[msg_type]['enLabel']
-            records[code_label] = {'time': x_data, 'value': y_data}
+        if msg_type in msg_type_labels:
+            records[msg_type_labels[msg_type]] = {'time': x_data, 'value': y_data}
             query_types.append(msg_type)
     defect_types = set(msg_types) ^ set(query_types)
     for defect_type in defect_types:
-        code_label = msg_type_dict_code[defect_type]['enLabel']
-        records[code_label] = {'time': x_data, 'value': [0] * len(x_data)}
+        records[msg_type_labels[defect_type]] = {'time': x_data, 'value': [0] * len(x_data)}
     return records
@@ -60,6 +60,7 @@ def create_role():
     new_role = role.create(request_dict)
     record = new_role.to_dict()
     insert_permissions(record.get('id'), request_permissions)
+    auth.invalidate_permissions([record.get('id')])
     return jsonify(record), 201
 
 
@@ -86,6 +87,7 @@ def update_role(role_id):
     for old_permission in old_permissions:
         db.session.delete(old_permission)
     insert_permissions(role_id, request_permissions)
+    auth.invalidate_permissions([role_id])
     return jsonify(record)
 
 
@@ -107,6 +109,7 @@ def delete_role():
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    auth.invalidate_permissions(ids)
     return '', 204
 
 
@@ -3,8 +3,9 @@ from collections import defaultdict
 from flask import jsonify, g, request
 from sqlalchemy import or_
 
+from actor_libs.cache import Cache
 from app import auth
-from app.services.base.models import DictCode, Role
+from app.services.base.models import Role
 from app.services.base.views import bp
 
 
@@ -12,18 +13,10 @@ from app.services.base.views import bp
 @auth.login_required(permission_required=False)
 def list_dict_code():
     record = defaultdict(list)
-    query_dict_code = DictCode.query.all()
-    for dict_code in query_dict_code:
-        if dict_code.codeValue is not None:
-            code_value = dict_code.codeValue
-        else:
-            code_value = dict_code.codeStringValue
-        option = {
-            'value': code_value,
-            'enLabel': dict_code.enLabel,
-            'zhLabel': dict_code.zhLabel
-        }
-        record[dict_code.code].append(option)
+    for code, code_values in Cache().dict_code.items():
+        for code_value, code_labels in code_values.items():
+            option = {'value': code_value, **code_labels}
+            record[code].append(option)
     return jsonify(record)
 
 
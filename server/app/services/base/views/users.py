@@ -3,7 +3,7 @@ from datetime import datetime
 from flask import jsonify, g, request, current_app
 from sqlalchemy.exc import IntegrityError
 
-from actor_libs.database.orm import db
+from actor_libs.database.orm import db, groups_scope
 from actor_libs.errors import ReferencedError, ParameterInvalid, AuthFailed
 from actor_libs.send_mails import send_html
 from actor_libs.utils import get_delete_ids
@@ -70,6 +70,9 @@ def update_user(user_id):
     request_dict = UpdateUserSchema.validate_request(obj=user)
     updated_user = user.update(request_dict)
     record = updated_user.to_dict()
+    # role, enable or groups may be changed
+    auth.invalidate_tokens([user_id])
+    groups_scope.invalidate([user_id])
     return jsonify(record)
 
 
@@ -93,6 +96,8 @@ def delete_user():
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    auth.invalidate_tokens(user_ids)
+    groups_scope.invalidate(user_ids)
     return '', 204
 
 
@@ -109,6 +114,7 @@ def reset_password():
         raise AuthFailed(field='oldPassword')
     updated_user = user.update(request_dict)
     record = updated_user.to_dict()
+    auth.invalidate_tokens([user.id])
     return jsonify(record)
 
 
@@ -44,7 +44,7 @@ class DeviceEventsHour(BaseAggr):
     deviceID = db.Column(db.String(100), primary_key=True)
     streamID = db.Column(db.String(100), primary_key=True)
     dataPointID = db.Column(db.String(100), primary_key=True)
-    count = db.Column(db.Integer)
+    count = db.Column(db.Integer)  # count of numeric values
 
 
 class DeviceEventsDay(BaseAggr):
@@ -0,0 +1,257 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, column, cast, case, extract, Numeric, Text
+
+from actor_libs.database.orm import db
+from app.services.base.models import RollupWatermark
+from app.services.device_data.models import DeviceEvent, DeviceEventsHour
+
+
+__all__ = ['query_downsampled_charts', 'CHART_POINTS_LIMIT']
+
+
+CHART_POINTS_LIMIT = 2048
+# buckets of lttb candidates per output point
+LTTB_OVERSAMPLE = 4
+
+
+def query_downsampled_charts(device, series_keys: Iterable[str],
+                             start_time: datetime, end_time: datetime,
+                             points: int, aggregate: str = 'avg') -> Dict[str, Dict]:
+    """
+    Aggregate device events to exactly points buckets of window / points,
+    aligned to start_time. Wide window (bucket >= 1 hour) is aggregated from
+    device_events_hour before the rollup watermark and from device_events after it
+    :param series_keys: "streamID:dataPointID" of charts, series without data
+                        are filled with None
+    :param aggregate: avg -> min/max/avg of every bucket,
+                      lttb -> avg of finer buckets downsampled by lttb
+    :return: {"streamID:dataPointID": chartData}, points values per chart
+    """
+
+    query_points = points * LTTB_OVERSAMPLE if aggregate == 'lttb' else points
+    bucket_width = (end_time - start_time) / query_points
+    series_buckets = _query_series_buckets(
+        device, start_time, end_time, bucket_width, query_points
+    )
+    if aggregate == 'lttb':
+        chart_width = bucket_width * LTTB_OVERSAMPLE
+    else:
+        chart_width = bucket_width
+    buckets_time = [start_time + chart_width * index for index in range(points)]
+    charts_data = {}
+    for _key in series_keys:
+        index_buckets = series_buckets.get(_key, {})
+        if aggregate == 'lttb':
+            charts_data[_key] = _lttb_chart_data(
+                index_buckets, start_time, bucket_width, buckets_time
+            )
+        else:
+            charts_data[_key] = _bucket_chart_data(index_buckets, buckets_time)
+        charts_data[_key]['interval'] = round(chart_width.total_seconds(), 3)
+    return charts_data
+
+
+def _query_series_buckets(device, start_time: datetime, end_time: datetime,
+                          bucket_width: timedelta, buckets_count: int) -> Dict:
+    """
+    :return: {"streamID:dataPointID": {bucket index: {
+        'minValue': x, 'maxValue': y, 'sumValue': z, 'count': n
+    }}}
+    """
+
+    queries_buckets = []
+    raw_start_time = start_time
+    if bucket_width >= timedelta(hours=1):
+        # hour rollup covers events before the watermark, the tail is read from raw events
+        watermark = RollupWatermark.query \
+            .with_entities(RollupWatermark.watermark) \
+            .filter(RollupWatermark.rollupName == 'device_events_hour') \
+            .scalar()
+        if watermark and watermark > start_time:
+            queries_buckets.append(
+                _query_hour_buckets(device, start_time, end_time, bucket_width)
+            )
+            raw_start_time = min(watermark, end_time)
+    if raw_start_time < end_time:
+        queries_buckets.append(_query_event_buckets(
+            device, start_time, raw_start_time, end_time, bucket_width
+        ))
+    series_buckets = defaultdict(dict)
+    for buckets in queries_buckets:
+        for bucket in buckets:
+            # float rounding of the last bucket
+            index = min(int(bucket.bucketIndex), buckets_count - 1)
+            index_buckets = series_buckets[f"{bucket.streamID}:{bucket.dataPointID}"]
+            _merge_bucket(index_buckets, index, bucket)
+    return series_buckets
+
+
+def _bucket_index(time_column, start_time: datetime, bucket_width: timedelta):
+    return func.floor(
+        extract('epoch', time_column - start_time) / bucket_width.total_seconds()
+    )
+
+
+def _query_event_buckets(device, start_time, query_start_time, end_time, bucket_width):
+    point_value = func.coalesce(column('value').op('->')('value'), column('value'))
+    numeric_value = case(
+        [(func.jsonb_typeof(point_value) == 'number', cast(cast(point_value, Text), Numeric))]
+    )
+    bucket_index = _bucket_index(DeviceEvent.msgTime, start_time, bucket_width)
+    buckets = db.session \
+        .query(bucket_index.label('bucketIndex'), DeviceEvent.streamID,
+               column('key').label('dataPointID'),
+               func.min(numeric_value).label('minValue'),
+               func.max(numeric_value).label('maxValue'),
+               func.sum(numeric_value).label('sumValue'),
+               func.count(numeric_value).label('count')) \
+        .select_from(DeviceEvent, func.jsonb_each(DeviceEvent.data)) \
+        .filter(DeviceEvent.dataType == 1,
+                DeviceEvent.tenantID == device.tenantID,
+                DeviceEvent.deviceID == device.deviceID,
+                DeviceEvent.msgTime >= query_start_time,
+                DeviceEvent.msgTime < end_time) \
+        .group_by(bucket_index, DeviceEvent.streamID, column('key')) \
+        .all()
+    return buckets
+
+
+def _query_hour_buckets(device, start_time, end_time, bucket_width):
+    bucket_index = _bucket_index(DeviceEventsHour.countTime, start_time, bucket_width)
+    buckets = db.session \
+        .query(bucket_index.label('bucketIndex'), DeviceEventsHour.streamID,
+               DeviceEventsHour.dataPointID,
+               func.min(DeviceEventsHour.minValue).label('minValue'),
+               func.max(DeviceEventsHour.maxValue).label('maxValue'),
+               func.sum(DeviceEventsHour.sumValue).label('sumValue'),
+               func.sum(DeviceEventsHour.count).label('count')) \
+        .filter(DeviceEventsHour.tenantID == device.tenantID,
+                DeviceEventsHour.deviceID == device.deviceID,
+                DeviceEventsHour.countTime >= start_time,
+                DeviceEventsHour.countTime < end_time) \
+        .group_by(bucket_index, DeviceEventsHour.streamID, DeviceEventsHour.dataPointID) \
+        .all()
+    return buckets
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+
+def _merge_bucket(index_buckets: Dict, index: int, bucket) -> None:
+    """ Merge partial aggregates of a bucket (hour rollup, raw events) """
+
+    min_value, max_value = _to_float(bucket.minValue), _to_float(bucket.maxValue)
+    sum_value, count = _to_float(bucket.sumValue), bucket.count or 0
+    merged = index_buckets.get(index)
+    if merged is None:
+        index_buckets[index] = {
+            'minValue': min_value, 'maxValue': max_value,
+            'sumValue': sum_value, 'count': count
+        }
+        return
+    if min_value is not None:
+        merged['minValue'] = min(v for v in (merged['minValue'], min_value) if v is not None)
+    if max_value is not None:
+        merged['maxValue'] = max(v for v in (merged['maxValue'], max_value) if v is not None)
+    if sum_value is not None:
+        merged['sumValue'] = (merged['sumValue'] or 0) + sum_value
+    merged['count'] += count
+
+
+def _avg_value(bucket: Dict):
+    if not bucket['count'] or bucket['sumValue'] is None:
+        return None
+    return bucket['sumValue'] / bucket['count']
+
+
+def _bucket_chart_data(index_buckets: Dict, buckets_time: List[datetime]) -> Dict:
+    """ One point per bucket of window, None for empty bucket """
+
+    chart_data = {'time': buckets_time, 'value': [], 'min': [], 'max': []}
+    for index in range(len(buckets_time)):
+        bucket = index_buckets.get(index)
+        if bucket is None:
+            chart_data['value'].append(None)
+            chart_data['min'].append(None)
+            chart_data['max'].append(None)
+        else:
+            chart_data['value'].append(_avg_value(bucket))
+            chart_data['min'].append(bucket['minValue'])
+            chart_data['max'].append(bucket['maxValue'])
+    return chart_data
+
+
+def _lttb_chart_data(index_buckets: Dict, start_time: datetime,
+                     bucket_width: timedelta, buckets_time: List[datetime]) -> Dict:
+    """
+    Downsample the finer bucket averages to len(buckets_time) points by lttb,
+    series with fewer values are returned as the averages of buckets_time
+    """
+
+    points = len(buckets_time)
+    series = []
+    for index, bucket in sorted(index_buckets.items()):
+        value = _avg_value(bucket)
+        if value is not None:
+            series.append((start_time + bucket_width * index, value))
+    if len(series) >= points:
+        sampled = _lttb(series, points)
+        return {
+            'time': [bucket_time for bucket_time, _ in sampled],
+            'value': [value for _, value in sampled]
+        }
+    chart_buckets = {}
+    for index, bucket in index_buckets.items():
+        chart_index = index // LTTB_OVERSAMPLE
+        chart_bucket = chart_buckets.setdefault(chart_index, {'sumValue': None, 'count': 0})
+        if bucket['sumValue'] is not None:
+            chart_bucket['sumValue'] = (chart_bucket['sumValue'] or 0) + bucket['sumValue']
+        chart_bucket['count'] += bucket['count']
+    chart_data = {
+        'time': buckets_time,
+        'value': [
+            _avg_value(chart_buckets[index]) if index in chart_buckets else None
+            for index in range(points)
+        ]
+    }
+    return chart_data
+
+
+def _lttb(series: List[Tuple[datetime, float]], threshold: int) -> List[Tuple[datetime, float]]:
+    """ Largest-Triangle-Three-Buckets downsampling, keep the first and last point """
+
+    if threshold >= len(series):
+        return series
+    if threshold < 3:
+        return [series[0], series[-1]][-threshold:]
+    xs = [point_time.timestamp() for point_time, _ in series]
+    sampled = [series[0]]
+    every = (len(series) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average point of the next bucket
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(series))
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(value for _, value in series[next_start:next_end]) / next_count
+        # point of the current bucket with the largest triangle
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        point_ax, point_ay = xs[a], series[a][1]
+        max_area, max_index = -1.0, range_start
+        for j in range(range_start, range_end):
+            area = abs(
+                (point_ax - avg_x) * (series[j][1] - point_ay) -
+                (point_ax - xs[j]) * (avg_y - point_ay)
+            )
+            if area > max_area:
+                max_area, max_index = area, j
+        sampled.append(series[max_index])
+        a = max_index
+    sampled.append(series[-1])
+    return sampled
@@ -1,10 +1,13 @@
+from typing import Any, Dict, Iterable, Tuple
+
 import arrow
-from flask import request
+from flask import current_app, request
 
 from actor_libs.errors import ParameterInvalid
+from actor_libs.utils import format_timestamp
 
 
-__all__ = ['validate_time_range']
+__all__ = ['validate_time_range', 'point_value', 'latest_value_index']
 
 
 def validate_time_range(limit_days: int = 7) -> None:
@@ -24,3 +27,31 @@ def validate_time_range(limit_days: int = 7) -> None:
 
     if end_time.day - start_time.day > limit_days:
         raise ParameterInvalid('Time range is greater than 7 days')
+
+
+def point_value(msg_time, value) -> Tuple[Any, Any]:
+    """ Data point value may be {'time': timestamp, 'value': value} """
+
+    if isinstance(value, dict):
+        ts = value.get('time')
+        if ts and len(str(ts)) == 10:
+            msg_time = format_timestamp(ts, current_app.config['TIMEZONE'])
+        value = value.get('value')
+    return msg_time, value
+
+
+def latest_value_index(events: Iterable) -> Dict[str, Dict]:
+    """
+    Latest value of stream points, built in one pass of events
+    :return: {'streamID:dataPointID': {'msgTime': xx, 'value': xx}}
+    """
+
+    value_index = {}
+    for event in events:
+        _key = f"{event.streamID}:{event.dataPointID}"
+        latest_value = value_index.get(_key)
+        if latest_value and latest_value['eventTime'] >= event.msgTime:
+            continue
+        msg_time, value = point_value(event.msgTime, event.value)
+        value_index[_key] = {'eventTime': event.msgTime, 'msgTime': msg_time, 'value': value}
+    return value_index
@@ -1,21 +1,19 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify
 from sqlalchemy import func, column
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import ParameterInvalid
-from actor_libs.utils import format_timestamp
 from app import auth
 from app.services.devices.models import (
     Device, Group, GroupDevice, EndDevice
 )
-from app.services.products.models import (
-    Product, DataStream, DataPoint, StreamPoint
-)
+from app.services.products.models import Product
 from app.services.device_data.models import (
     DeviceEvent, DeviceEventLatest
 )
 from app.services.device_data.views import bp
-from ._utils import validate_time_range
+from ._utils import validate_time_range, point_value
 
 
 @bp.route('/devices/<int:device_id>/capability_data')
@@ -141,16 +139,10 @@ def _get_capability_data(events, data_points):
         name_dict = data_points.get(data_point_key)
         if not name_dict:
             continue
-        item['streamName'] = name_dict.get('stream_name')
-        item['dataPointName'] = name_dict.get('data_point_name')
-
+        item['streamName'] = name_dict['streamName']
+        item['dataPointName'] = name_dict['dataPointName']
         # get data point value and msgTime
-        value = item.get('value')
-        if isinstance(value, dict):
-            ts = value.get('time')
-            if len(str(ts)) == 10:
-                item['msgTime'] = format_timestamp(ts, current_app.config['TIMEZONE'])
-            item['value'] = value.get('value')
+        item['msgTime'], item['value'] = point_value(item.get('msgTime'), item.get('value'))
         items_with_name.append(item)
     return items_with_name
 
@@ -158,23 +150,8 @@ def _get_capability_data(events, data_points):
 def _get_data_points(products_uid):
     """
     :return: {
-        'stream_id:data_point_id': {'data_point_name': 'xxx', 'stream_name': 'yyy'}
+        'stream_id:data_point_id': {'dataPointName': 'xxx', 'streamName': 'yyy', ...}
     }
     """
-    data_points = DataPoint.query \
-        .join(StreamPoint, StreamPoint.c.dataPointIntID == DataPoint.id) \
-        .join(DataStream, DataStream.id == StreamPoint.c.dataStreamIntID) \
-        .with_entities(DataStream.streamID, DataStream.streamName,
-                       DataPoint.dataPointID, DataPoint.dataPointName) \
-        .filter(DataStream.productID.in_(products_uid)) \
-        .many()
-
-    data_points_dict = {}
-    for stream_id, stream_name, data_point_id, data_point_name in data_points:
-        key = f'{stream_id}:{data_point_id}'
-        data_points_dict[key] = {
-            'data_point_name': data_point_name,
-            'stream_name': stream_name
-        }
-
-    return data_points_dict
+
+    return product_meta_cache.get_stream_points(products_uid)
@@ -2,19 +2,20 @@ from collections import defaultdict
 from operator import itemgetter
 
 import arrow
-from flask import jsonify, request, current_app
+from flask import jsonify, request
 from sqlalchemy import func, column, desc
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import ParameterInvalid
 from actor_libs.types.orm import BaseQueryT
-from actor_libs.utils import format_timestamp
 from app import auth
 from app.services.devices.models import Device
 from app.services.device_data.models import DeviceEvent, DeviceEventLatest
-from app.services.products.models import StreamPoint, DataStream, DataPoint
 
 from app.services.device_data.views import bp
+from ._downsample import query_downsampled_charts, CHART_POINTS_LIMIT
+from ._utils import point_value, latest_value_index
 
 
 @bp.route('/devices/<int:device_id>/charts')
@@ -24,6 +25,12 @@ def list_device_charts(device_id):
         .with_entities(Device.deviceID, Device.tenantID, Device.productID) \
         .filter(Device.id == device_id).first_or_404()
 
+    if 'points' in request.args:
+        points = request.args.get('points', type=int)
+        if points is None:
+            raise ParameterInvalid(field='points')
+        # downsampled chart of the whole window
+        return jsonify(_downsampled_charts(device, points))
     query = db.session \
         .query(DeviceEvent.msgTime, DeviceEvent.streamID,
                column('key').label('dataPointID'), column('value')) \
@@ -50,34 +57,30 @@ def list_last_data_charts(device_id):
         .filter(DeviceEventLatest.dataType == 1,
                 DeviceEventLatest.tenantID == device.tenantID,
                 DeviceEventLatest.deviceID == device.deviceID).all()
+    latest_values = latest_value_index(latest_device_events)
     records = []
     stream_point_info = _query_stream_points(device.productID)
     for _key, _info in stream_point_info.items():
+        latest_value = latest_values.get(_key)
         record = {
             'streamID': _key.split(':')[0],
             'dataPointID': _key.split(':')[1],
             'chartName': f"{_info['streamName']}/{_info['dataPointName']}",
             'chartData': None
         }
-        for device_event in latest_device_events:
-            event_dict = device_event_to_dict(device_event)
-            event_key = f"{event_dict['streamID']}:{event_dict['dataPointID']}"
-            if _key == event_key:
-                record['chartData'] = {
-                    'time': event_dict['msgTime'],
-                    'value': event_dict['value']
-                }
-            else:
-                continue
+        if latest_value:
+            record['chartData'] = {
+                'time': latest_value['msgTime'],
+                'value': latest_value['value']
+            }
         records.append(record)
     return jsonify(records)
 
 
-def _filter_request_args(query: BaseQueryT) -> BaseQueryT:
-    """ filter timeUnit args """
+def _get_start_time(date_now):
+    """ start time of timeUnit args """
 
     time_unit = request.args.get('timeUnit', type=str)
-    date_now = arrow.now()
     time_unit_dict = {
         '5m': date_now.shift(minutes=-5),
         '1h': date_now.shift(hours=-1),
@@ -88,6 +91,13 @@ def _filter_request_args(query: BaseQueryT) -> BaseQueryT:
     start_time = time_unit_dict.get(time_unit)
     if not start_time:
         raise ParameterInvalid(field='timeUnit')
+    return start_time
+
+
+def _filter_request_args(query: BaseQueryT) -> BaseQueryT:
+    """ filter timeUnit args """
+
+    start_time = _get_start_time(arrow.now())
     str_start_time = start_time.format()
     query = query \
         .filter(DeviceEvent.msgTime > str_start_time) \
@@ -96,28 +106,44 @@ def _filter_request_args(query: BaseQueryT) -> BaseQueryT:
     return query
 
 
+def _downsampled_charts(device, points: int):
+    """ Charts with a fixed number of points per series """
+
+    if not 2 <= points <= CHART_POINTS_LIMIT:
+        raise ParameterInvalid(field='points')
+    aggregate = request.args.get('aggregate', 'avg', type=str)
+    if aggregate not in ('avg', 'lttb'):
+        raise ParameterInvalid(field='aggregate')
+    date_now = arrow.now()
+    start_time = _get_start_time(date_now)
+    stream_point_info = _query_stream_points(device.productID)
+    charts_data = query_downsampled_charts(
+        device, stream_point_info.keys(), start_time.naive, date_now.naive,
+        points, aggregate=aggregate
+    )
+    records = []
+    for _key, _info in stream_point_info.items():
+        record = {
+            'streamID': _key.split(':')[0],
+            'dataPointID': _key.split(':')[1],
+            'chartName': f"{_info['streamName']}/{_info['dataPointName']}",
+            'chartData': charts_data[_key]
+        }
+        records.append(record)
+    return records
+
+
 def _query_stream_points(product_uid):
     """
     stream_point info format:
         {"streamID:dataPointID": {"streamName": xx, "dataPointName": xx}}
     """
-    stream_points = db.session \
-        .query(DataStream.streamID, DataStream.streamName,
-               DataPoint.dataPointID, DataPoint.dataPointName) \
-        .join(StreamPoint, DataStream.id == StreamPoint.c.dataStreamIntID) \
-        .join(DataPoint, DataPoint.id == StreamPoint.c.dataPointIntID) \
-        .filter(DataStream.productID == product_uid,
-                DataPoint.pointDataType == 1) \
-        .all()
-
-    stream_point_info = defaultdict(dict)
-    for stream_point in stream_points:
-        _key = f"{stream_point.streamID}:{stream_point.dataPointID}"
-        _value = {
-            'streamName': stream_point.streamName,
-            'dataPointName': stream_point.dataPointName
-        }
-        stream_point_info[_key] = _value
+
+    stream_points = product_meta_cache.get_stream_points([product_uid])
+    stream_point_info = {
+        _key: _info for _key, _info in stream_points.items()
+        if _info['pointDataType'] == 1
+    }
     return stream_point_info
 
 
@@ -165,18 +191,11 @@ def _handle_device_events(device_events, product_uid):
 
 
 def device_event_to_dict(device_event):
+    msg_time, value = point_value(device_event.msgTime, device_event.value)
     event_dict = {
-        'msgTime': device_event.msgTime,
+        'msgTime': msg_time,
         'dataPointID': device_event.dataPointID,
         'streamID': device_event.streamID,
+        'value': value
     }
-    value = device_event.value
-    if isinstance(value, dict):
-        if value.get('time'):
-            ts = value.get('time')
-            if len(str(ts)) == 10:
-                event_dict['msgTime'] = format_timestamp(ts, current_app.config['TIMEZONE'])
-        event_dict['value'] = value.get('value')
-    else:
-        event_dict['value'] = value
     return event_dict
@@ -19,5 +19,5 @@ def view_connect_logs(device_id):
     if not (request.args.get('start_time') or not request.args.get('end_time')):
         # if no specified start_time or end_time, return last 7 day of data
         query = query.filter(ConnectLog.msgTime >= text("NOW() - INTERVAL '7 DAYS'"))
-    records = query.pagination(code_list=['connectStatus'])
+    records = query.pagination(code_list=['connectStatus'], cursor_sort='msgTime')
     return jsonify(records)
@@ -16,7 +16,7 @@ def list_device_events(device_id):
         .filter(Device.id == device_id).first_or_404()
 
     events_query = DeviceEvent.query.filter(DeviceEvent.deviceID == device.deviceID)
-    records = events_query.pagination(code_list=['dataType'])
+    records = events_query.pagination(code_list=['dataType'], cursor_sort='msgTime')
 
     return jsonify(records)
 
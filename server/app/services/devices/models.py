@@ -7,8 +7,8 @@ from actor_libs.utils import generate_uuid
 __all__ = [
     'Device', 'EndDevice', 'Gateway', 'Group', 'GroupDevice',
     'Cert', 'CertDevice', 'Lwm2mObject', 'Lwm2mItem',
-    'DeviceCountHour', 'DeviceCountDay', 'DeviceCountMonth',
-    'EmqxBill', 'EmqxBillHour', 'EmqxBillDay', 'EmqxBillMonth'
+    'DeviceCountHour', 'DeviceCountDay', 'DeviceCountMonth', 'DeviceStatusCount',
+    'EmqxBill', 'EmqxBillHour', 'EmqxBillDay', 'EmqxBillMonth', 'EmqxBillHourAggr'
 ]
 
 
@@ -183,6 +183,14 @@ class DeviceCountMonth(BaseModel):
         'tenants.tenantID', onupdate="CASCADE", ondelete="CASCADE"))
 
 
+class DeviceStatusCount(ModelMixin, db.Model):
+    """ Current devices count of status, maintained by devices triggers in continuous aggregate mode """
+    __tablename__ = 'device_status_counts'
+    tenantID = db.Column(db.String, primary_key=True)
+    deviceStatus = db.Column(db.SmallInteger, primary_key=True)  # 0:离线 1:在线 2:休眠
+    deviceCount = db.Column(db.Integer, nullable=False, server_default='0')
+
+
 EmqxBill = db.Table(
     'emqx_bills',
     db.Column('msgTime', db.DateTime, nullable=False),  # 消息时间
@@ -227,3 +235,15 @@ class EmqxBillMonth(BaseModel):
     countTime = db.Column(db.DateTime)  # 统计时间
     tenantID = db.Column(db.String, db.ForeignKey(
         'tenants.tenantID', onupdate="CASCADE", ondelete="CASCADE"))
+
+
+# continuous aggregate of emqx_bills in continuous aggregate mode,
+# a view which is not created by create_all
+EmqxBillHourAggr = db.table(
+    'emqx_bills_hour_cagg',
+    db.column('countTime'),
+    db.column('msgType'),
+    db.column('msgCount'),
+    db.column('msgSize'),
+    db.column('tenantID')
+)
@@ -15,6 +15,7 @@ from actor_libs.errors import (
     DataExisted, DataNotFound, FormInvalid, ResourceLimited
 )
 from actor_libs.schemas import BaseSchema
+from actor_libs.schemas.loaders import BatchLoader
 from actor_libs.schemas.devices import BaseDeviceSchema
 from actor_libs.schemas.fields import (
     EmqDict, EmqFloat, EmqInteger, EmqList, EmqString
@@ -34,7 +35,39 @@ __all__ = [
 ]
 
 
+def _load_devices_groups(devices_id: List[int]):
+    return Group.query \
+        .join(GroupDevice, GroupDevice.c.groupID == Group.groupID) \
+        .filter(GroupDevice.c.deviceIntID.in_(devices_id)) \
+        .with_entities(GroupDevice.c.deviceIntID, Group).all()
+
+
+def _load_devices_certs(devices_id: List[int]):
+    return Cert.query \
+        .join(CertDevice, CertDevice.c.certIntID == Cert.id) \
+        .filter(CertDevice.c.deviceIntID.in_(devices_id)) \
+        .with_entities(CertDevice.c.deviceIntID, Cert).all()
+
+
+def _load_devices_name(devices_id: List[int]):
+    return Device.query \
+        .filter(Device.id.in_(devices_id)) \
+        .with_entities(Device.id, Device.deviceName).all()
+
+
+device_groups_loader = BatchLoader('_groups', _load_devices_groups)
+device_certs_loader = BatchLoader('_certs', _load_devices_certs)
+parent_device_name_loader = BatchLoader(
+    '_parentDeviceName', _load_devices_name, key='parentDevice', many=False
+)
+gateway_name_loader = BatchLoader(
+    '_gatewayName', _load_devices_name, key='gateway', many=False
+)
+
+
 class DeviceSchema(BaseSchema, BaseDeviceSchema):
+    batch_loaders = [device_groups_loader, device_certs_loader]
+
     @validates('deviceType')
     def device_name_is_exist(self, value):
         device_type = self.get_origin_obj('deviceType')
@@ -120,18 +153,11 @@ class DeviceSchema(BaseSchema, BaseDeviceSchema):
             data['lwm2m']['IMEI'] = self.get_origin_obj('deviceID')
         return data
 
-    @post_dump
-    def handle_dump_data(self, data):
-        device_id = data['id']
-        device_certs = Cert.query \
-            .join(CertDevice, CertDevice.c.certIntID == Cert.id) \
-            .filter(CertDevice.c.deviceIntID == device_id).all()
-        device_groups = Group.query \
-            .join(GroupDevice, GroupDevice.c.groupID == Group.groupID) \
-            .filter(GroupDevice.c.deviceIntID == device_id).all()
+    @post_dump(pass_original=True)
+    def handle_dump_data(self, data, original):
         groups = []
         group_index = []
-        for group in device_groups:
+        for group in device_groups_loader.get_value(original):
             groups.append(group.groupID)
             group_index.append({'value': group.id, 'label': group.groupName})
         data['groups'] = groups
@@ -140,7 +166,7 @@ class DeviceSchema(BaseSchema, BaseDeviceSchema):
             # cert auth
             certs = []
             cert_index = []
-            for cert in device_certs:
+            for cert in device_certs_loader.get_value(original):
                 certs.append(cert.id)
                 cert_index.append({'value': cert.id, 'label': cert.certName})
             data['certs'] = certs
@@ -149,6 +175,10 @@ class DeviceSchema(BaseSchema, BaseDeviceSchema):
 
 
 class EndDeviceSchema(DeviceSchema):
+    batch_loaders = DeviceSchema.batch_loaders + [
+        parent_device_name_loader, gateway_name_loader
+    ]
+
     loraData = EmqDict(allow_none=True)  # lora  data extend
     lwm2mData = EmqDict(allow_none=True)  # lwm2m data extend
     upLinkSystem = EmqInteger(required=True)  # 1:cloud 2:device 3:gateway
@@ -215,18 +245,12 @@ class EndDeviceSchema(DeviceSchema):
             raise FormInvalid(field=error_fields.get(cloud_protocol, 'cloudProtocol'))
         return data
 
-    @post_dump
-    def handle_uplink_system(self, data):
+    @post_dump(pass_original=True)
+    def handle_uplink_system(self, data, original):
         if data['upLinkSystem'] == 2:
-            parentDevice = data['parentDevice']
-            parent_device = Device.query.filter(Device.id == parentDevice) \
-                .with_entities(Device.deviceName).first()
-            data['parentDeviceName'] = parent_device.deviceName
+            data['parentDeviceName'] = parent_device_name_loader.get_value(original)
         elif data['upLinkSystem'] == 3:
-            gateway = data['gateway']
-            gateway = Device.query.filter(Device.id == gateway) \
-                .with_entities(Device.deviceName).first()
-            data['gatewayName'] = gateway.deviceName
+            data['gatewayName'] = gateway_name_loader.get_value(original)
         return data
 
 
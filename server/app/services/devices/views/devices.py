@@ -1,14 +1,13 @@
-from typing import Tuple
+from typing import List, Tuple
 
 from flask import request, jsonify, url_for, current_app, g
 from flask_uploads import UploadNotAllowed
-from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 
 from actor_libs.database.orm import db
 from actor_libs.decorators import limit_upload_file
 from actor_libs.errors import (
-    ReferencedError, FormInvalid, ResourceLimited,
+    ReferencedError, FormInvalid, ParameterInvalid,
     APIException, DataNotFound
 )
 from actor_libs.http_tools.responses import handle_task_scheduler_response
@@ -79,6 +78,7 @@ def update_device(device_id):
     else:
         request_dict = GatewaySchema.validate_request(obj=device)
     updated_device = device.update(request_dict)
+    invalidate_device_auth_cache([updated_device.deviceID])
     record = updated_device.to_dict()
     return jsonify(record), 201
 
@@ -100,28 +100,32 @@ def delete_device():
     if gateway_device > 0:
         raise ReferencedError(field='endDevice')
     query_results = Device.query.filter(Device.id.in_(delete_ids)).many()
+    devices_uid = [device.deviceID for device in query_results]
     try:
         for device in query_results:
             db.session.delete(device)
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    invalidate_device_auth_cache(devices_uid)
     return '', 204
 
 
 @bp.route('/devices_export')
 @auth.login_required
 def export_devices():
-    device_count = db.session.query(func.count(Device.id)) \
-        .filter(Device.tenantID == g.tenant_uid).scalar()
-    if device_count and device_count > 10000:
-        raise ResourceLimited(field='devices')
-    if device_count == 0:
+    export_format = request.args.get('format', 'xlsx', type=str)
+    if export_format not in ('xlsx', 'csv'):
+        raise ParameterInvalid(field='format')
+    device_exists = db.session.query(Device.id) \
+        .filter(Device.tenantID == g.tenant_uid).first()
+    if not device_exists:
         raise DataNotFound(field='devices')
     export_url = current_app.config.get('EXPORT_EXCEL_TASK_URL')
     request_json = {
         'tenantID': g.tenant_uid,
-        'language': g.language
+        'language': g.language,
+        'format': export_format
     }
     with SyncHttp() as sync_http:
         response = sync_http.post(export_url, json=request_json)
@@ -218,3 +222,18 @@ def device_request_args_filter(query: BaseQueryT) -> BaseQueryT:
         query = query.join(EndDevice, EndDevice.id == Device.id) \
             .filter(EndDevice.gateway == request_args['gateway'])
     return query
+
+
+def invalidate_device_auth_cache(devices_uid: List[str]) -> None:
+    """ Drop the devices auth info cached by the emqx auth hook """
+
+    if not devices_uid:
+        return
+    cache_url = current_app.config.get('DEVICE_AUTH_CACHE_URL')
+    request_json = {'devices': devices_uid}
+    with SyncHttp() as sync_http:
+        response = sync_http.delete(cache_url, json=request_json)
+    if response.responseCode != 200:
+        current_app.logger.error(
+            f"invalidate device auth cache failed: {response.responseContent}"
+        )
@@ -2,14 +2,12 @@ import json
 from datetime import datetime
 
 from flask import jsonify, request, current_app
-from sqlalchemy import func
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import DataNotFound, AuthFailed
 from actor_libs.http_tools import SyncHttp
-from app.services.products.models import Product
 from app.services.devices.models import Device, Cert, CertDevice
-from app.services.base.models import DictCode
 from app.services.device_data.models import ConnectLog
 from app.services.publish.models import PublishLog
 from app.services.devices.views import bp
@@ -22,12 +20,8 @@ def device_auth():
     cn = request_form.get('cn')
     connect_date = datetime.now()
     # query device info
-    query = db.session \
-        .query(Device, func.lower(DictCode.enLabel).label('protocol')) \
-        .join(Product, Product.productID == Device.productID) \
-        .join(DictCode, DictCode.codeValue == Product.cloudProtocol) \
-        .filter(Device.deviceID == device_uid, Device.blocked == 0,
-                DictCode.code == 'cloudProtocol')
+    query = Device.query \
+        .filter(Device.deviceID == device_uid, Device.blocked == 0)
     if cn is None or cn == 'undefined':
         # token auth
         query = query.filter(Device.authType == 1)
@@ -37,10 +31,11 @@ def device_auth():
             .join(CertDevice, CertDevice.c.deviceIntID == Device.id) \
             .join(Cert, Cert.id == CertDevice.c.certIntID) \
             .filter(Device.authType == 2, Cert.CN == cn, Cert.enable == 1)
-    device_info = query.first()
-    if not device_info:
+    device = query.first()
+    product = product_meta_cache.get_product(device.productID) if device else None
+    if not product:
         raise AuthFailed(field='device')
-    device, protocol = device_info
+    protocol = product['protocol']
     auth_status = _validate_connect_auth(device, protocol, request_form)
     # insert connect_logs
     connect_dict = {
@@ -122,18 +117,16 @@ def client_connected_callback(request_dict) -> None:
     if not device_id:
         return
     device = db.session \
-        .query(Device.tenantID, Device.productID,
-               Device.deviceID, func.lower(DictCode.enLabel).label('protocol')) \
-        .join(Product, Product.productID == Device.productID) \
-        .join(DictCode, DictCode.codeValue == Product.cloudProtocol) \
-        .filter(Device.deviceID == device_id, DictCode.code == 'cloudProtocol') \
+        .query(Device.tenantID, Device.productID, Device.deviceID) \
+        .filter(Device.deviceID == device_id) \
         .first()
-    if not device or device.protocol == 'lwm2m':
+    product = product_meta_cache.get_product(device.productID) if device else None
+    if not product or product['protocol'] == 'lwm2m':
         # if device protocol is lwm2m pass
         return
 
     auto_sub_topic = (
-        f"/{device.protocol}/{device.tenantID}"
+        f"/{product['protocol']}/{device.tenantID}"
         f"/{device.productID}/{device.deviceID}/inbox"
     )
     request_json = {
@@ -1,7 +1,7 @@
 from flask import jsonify
 from sqlalchemy.exc import IntegrityError
 
-from actor_libs.database.orm import db
+from actor_libs.database.orm import db, groups_scope
 from actor_libs.errors import ReferencedError
 from actor_libs.utils import get_delete_ids
 from app import auth
@@ -72,6 +72,7 @@ def delete_group():
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    groups_scope.invalidate()
     return '', 204
 
 
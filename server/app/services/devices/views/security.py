@@ -13,6 +13,7 @@ from app.services.base.models import User
 from app.services.devices.models import Cert, Device, CertDevice
 from app.services.devices.schemas import CertSchema, CertDeviceSchema
 from app.services.devices.views import bp
+from app.services.devices.views.devices import invalidate_device_auth_cache
 
 
 @bp.route('/certs')
@@ -65,6 +66,9 @@ def update_cert(cert_id):
     cert = Cert.query.filter(Cert.id == cert_id).first_or_404()
     request_dict = CertSchema.validate_request(obj=cert)
     updated_cert = cert.update(request_dict)
+    invalidate_device_auth_cache(
+        [device.deviceID for device in updated_cert.devices]
+    )
     record = updated_cert.to_dict()
     return jsonify(record)
 
@@ -126,6 +130,7 @@ def delete_cert_devices(cert_id):
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    invalidate_device_auth_cache([device.deviceID for device in devices])
     return '', 204
 
 
@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from sqlalchemy.exc import IntegrityError
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import (
     ParameterInvalid, ReferencedError
@@ -46,6 +47,7 @@ def create_data_point():
     request_dict = DataPointSchema.validate_request()
     data_point = DataPoint()
     created_point = data_point.create(request_dict)
+    product_meta_cache.invalidate([created_point.productID])
     record = created_point.to_dict()
     return jsonify(record), 201
 
@@ -56,6 +58,7 @@ def update_data_point(point_id):
     data_point = DataPoint.query.filter(DataPoint.id == point_id).first_or_404()
     request_dict = DataPointUpdateSchema.validate_request(obj=data_point)
     updated_record = data_point.update(request_dict)
+    product_meta_cache.invalidate([updated_record.productID])
     record = updated_record.to_dict()
     return jsonify(record)
 
@@ -67,6 +70,7 @@ def delete_data_points():
     data_points = DataPoint.query \
         .filter(DataPoint.id.in_(delete_ids)) \
         .many(allow_none=False, expect_result=len(delete_ids))
+    products_uid = {data_point.productID for data_point in data_points}
     try:
         for data_point in data_points:
             if data_point.dataStreams.count() > 0:
@@ -75,5 +79,6 @@ def delete_data_points():
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    product_meta_cache.invalidate(products_uid)
     return '', 204
 
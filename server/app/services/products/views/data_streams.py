@@ -1,6 +1,7 @@
 from flask import jsonify, request
 from sqlalchemy.exc import IntegrityError
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import (
     ParameterInvalid, ReferencedError
@@ -45,6 +46,7 @@ def create_data_stream():
     request_dict = DataStreamSchema.validate_request()
     data_stream = DataStream()
     created_stream = data_stream.create(request_dict)
+    product_meta_cache.invalidate([created_stream.productID])
     record = created_stream.to_dict()
     return jsonify(record), 201
 
@@ -55,6 +57,7 @@ def update_data_stream(stream_id):
     data_stream = DataStream.query.filter(DataStream.id == stream_id).first_or_404()
     request_dict = UpdateDataStreamSchema.validate_request(obj=data_stream)
     updated_stream = data_stream.update(request_dict)
+    product_meta_cache.invalidate([updated_stream.productID])
     record = updated_stream.to_dict()
     return jsonify(record)
 
@@ -66,10 +69,12 @@ def delete_data_streams():
     data_streams = DataStream.query \
         .filter(DataStream.id.in_(delete_ids)) \
         .many(allow_none=False, expect_result=len(delete_ids))
+    products_uid = {data_stream.productID for data_stream in data_streams}
     try:
         for data_stream in data_streams:
             db.session.delete(data_stream)
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    product_meta_cache.invalidate(products_uid)
     return '', 204
@@ -2,6 +2,7 @@ from flask import jsonify
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.orm import db
 from actor_libs.errors import ReferencedError
 from actor_libs.utils import get_delete_ids
@@ -74,12 +75,14 @@ def delete_product():
         .scalar()
     if device_count:
         raise ReferencedError(field='device')
+    products_uid = [product.productID for product in query_results]
     try:
         for product in query_results:
             db.session.delete(product)
         db.session.commit()
     except IntegrityError:
         raise ReferencedError()
+    product_meta_cache.invalidate(products_uid)
     return '', 204
 
 
@@ -1,5 +1,6 @@
 from flask import request, jsonify
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.errors import ParameterInvalid
 from app import auth
 from app.services.products.models import Product, DataStream, DataPoint, StreamPoint
@@ -110,16 +111,14 @@ def list_select_options_topics():
                 'value': 'ad/#'
             }]
     else:
-        topics = DataStream.query \
-            .with_entities(DataStream.topic) \
-            .filter(DataStream.productID == product_uid) \
-            .many()
+        # product is checked by tenant query above, topics are read from cache
+        product_meta = product_meta_cache.get_product(product_uid) or {}
         record = [
             {
-                'key': topic.topic,
-                'value': topic.topic
+                'key': data_stream['topic'],
+                'value': data_stream['topic']
             }
-            for topic in topics
+            for data_stream in product_meta.get('dataStreams', {}).values()
         ]
 
     return jsonify(record)
@@ -1,5 +1,6 @@
 from flask import jsonify
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.utils import get_delete_ids
 from app import auth
 from app.services.products.models import StreamPoint, DataStream, DataPoint
@@ -30,6 +31,7 @@ def create_stream_points(stream_id):
     created_point = data_point.create(request_dict, commit=False)
     data_stream.dataPoints.append(created_point)
     data_stream.update()
+    product_meta_cache.invalidate([data_stream.productID])
     record = data_point.to_dict()
     return jsonify(record), 201
 
@@ -43,6 +45,7 @@ def update_stream_points(stream_id):
     data_points = request_dict['dataPoints']
     data_stream.dataPoints = data_points
     data_stream.update()
+    product_meta_cache.invalidate([data_stream.productID])
     record = {
         'dataPoints': [data_point.id for data_point in data_points]
     }
@@ -63,4 +66,5 @@ def delete_stream_points(stream_id):
     for delete_data_point in delete_data_points:
         data_stream.dataPoints.remove(delete_data_point)
     data_stream.update()
+    product_meta_cache.invalidate([data_stream.productID])
     return '', 204
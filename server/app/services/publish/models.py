@@ -28,6 +28,9 @@ class PublishLog(ModelMixin, db.Model):
 
 class TimerPublish(BaseModel):
     __tablename__ = 'timer_publish'
+    __table_args__ = (
+        db.Index('timer_publish_nextFireTime_idx', "nextFireTime"),
+    )
     taskName = db.Column(db.String)  # 任务名
     taskStatus = db.Column(db.SmallInteger, server_default='2')  # 任务状态2 执行 3 成功
     timerType = db.Column(db.SmallInteger)  # 定时类型1 固定 , 2 间隔
@@ -35,6 +38,7 @@ class TimerPublish(BaseModel):
     payload = db.Column(JSONB)  # 下发消息内容
     intervalTime = db.Column(JSONB)  # 间隔时间{'weekday': 'hour': 'minute'}
     crontabTime = db.Column(db.DateTime)  # 指定下发时间
+    nextFireTime = db.Column(db.DateTime)  # 下次下发时间
     deviceIntID = db.Column(db.Integer, db.ForeignKey(
         'devices.id', onupdate="CASCADE", ondelete="CASCADE"))  # 设备id
     userIntID = db.Column(db.Integer, db.ForeignKey(
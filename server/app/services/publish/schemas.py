@@ -12,7 +12,7 @@ from actor_libs.schemas import BaseSchema
 from actor_libs.schemas.fields import (
     EmqString, EmqInteger, EmqDateTime, EmqDict
 )
-from actor_libs.utils import check_interval_time
+from actor_libs.utils import check_interval_time, get_next_fire_time
 
 
 __all__ = [
@@ -45,6 +45,7 @@ class TimerPublishSchema(BaseSchema):
     crontabTime = EmqDateTime(allow_none=True)
     deviceIntID = EmqInteger(allow_none=True)  # client index id
     taskStatus = EmqInteger(dump_only=True)
+    nextFireTime = EmqDateTime(dump_only=True)
 
     @post_load
     def handle_data(self, data):
@@ -55,6 +56,7 @@ class TimerPublishSchema(BaseSchema):
         data['payload'] = result['payload']
         data['topic'] = result['topic'] if result.get('topic') else None
         data['payload'] = json.loads(data['payload'])
+        data['nextFireTime'] = self.get_next_fire_time(data)
         return data
 
     @staticmethod
@@ -77,3 +79,17 @@ class TimerPublishSchema(BaseSchema):
         else:
             raise FormInvalid(field='timerType')
         return data
+
+    @staticmethod
+    def get_next_fire_time(data):
+        """ crontabTime is stored as wall clock, timer tasks are indexed by next fire time """
+
+        date_now = arrow.now(tz=current_app.config['TIMEZONE']).naive
+        crontab_time = data.get('crontabTime')
+        if crontab_time:
+            crontab_time = arrow.get(crontab_time).naive
+        next_fire_time = get_next_fire_time(
+            data['timerType'], date_now,
+            crontab_time=crontab_time, interval_time=data.get('intervalTime')
+        )
+        return next_fire_time
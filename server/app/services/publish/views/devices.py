@@ -42,7 +42,7 @@ def view_device_publish_logs(device_id):
 
     query = PublishLog.query \
         .filter(PublishLog.deviceID == device.deviceID)
-    records = query.pagination(code_list=['publishStatus'])
+    records = query.pagination(code_list=['publishStatus'], cursor_sort='msgTime')
     return jsonify(records)
 
 
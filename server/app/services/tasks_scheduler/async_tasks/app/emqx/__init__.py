@@ -1,4 +1,6 @@
-from .auth import device_auth
+from ._connect_buffer import connect_buffer
+from ._subscribe_queue import subscribe_queue
+from .auth import device_auth, invalidate_device_auth
 from .callback import backend_callback
-from .publish import device_publish_task
+from .publish import device_publish_task, devices_publish_batch_task
 
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from actor_libs.database.async_db import db
+from ._flusher import PeriodicFlusher
+from .sql_statements import update_devices_status_sql
+from ..config import project_config
+
+
+__all__ = ['connect_buffer']
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectEventBuffer(PeriodicFlusher):
+    """
+    Write-behind buffer of device connect events, connect logs are
+    copied in bulk and device status is updated with one statement per flush.
+    Events of a failed flush are kept for the next flush, at most max_pending
+    connect logs and devices status are kept, the oldest are dropped
+    """
+
+    name = 'connect events'
+    log_columns = ['IP', 'connectStatus', 'msgTime', 'deviceID', 'tenantID']
+
+    def __init__(self, flush_size: int = 1000, flush_interval: float = 1,
+                 max_pending: int = 100000):
+        super().__init__(flush_interval)
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._connect_logs: List[Tuple] = []
+        # {deviceID: (deviceStatus, lastConnection)}, keep the last state only
+        self._devices_status: Dict[str, Tuple[int, datetime]] = {}
+        self._flush_lock = None
+        self._flush_pending = False
+        # connect logs kept by failed flush, not trigger flush by size again
+        self._requeued_size = 0
+
+    def add_event(self, *, device_uid: str, tenant_uid: str, connect_status: int,
+                  msg_time: datetime, ip: str = None,
+                  device_status: int = None) -> None:
+        """
+        :param connect_status: 0:Offline, 1:Online, 2:AuthenticateFailed
+        :param device_status: 0:offline 1:online 2:sleep, not update if None
+        """
+
+        self._connect_logs.append(
+            (ip, connect_status, msg_time, device_uid, tenant_uid)
+        )
+        if device_status is not None:
+            last_connection = msg_time if device_status == 1 else None
+            self._devices_status[device_uid] = (device_status, last_connection)
+        buffered_size = len(self._connect_logs) - self._requeued_size
+        if buffered_size >= self.flush_size and not self._flush_pending:
+            self._flush_pending = True
+            asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        if not self._flush_lock:
+            # create lock in the running loop
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            self._flush_pending = False
+            connect_logs, self._connect_logs = self._connect_logs, []
+            devices_status, self._devices_status = self._devices_status, {}
+            self._requeued_size = 0
+            if connect_logs and not await self._copy_connect_logs(connect_logs):
+                logger.error(f"copy {len(connect_logs)} connect logs failed")
+                self._requeue_connect_logs(connect_logs)
+            if devices_status and not await self._update_devices_status(devices_status):
+                logger.error(f"update {len(devices_status)} devices status failed")
+                self._requeue_devices_status(devices_status)
+
+    async def _copy_connect_logs(self, connect_logs: List[Tuple]) -> bool:
+        try:
+            return await db.copy_records_to_table(
+                'connect_logs', records=connect_logs, columns=self.log_columns
+            )
+        except Exception as error:
+            logger.error(f"copy connect logs: {error}")
+            return False
+
+    @staticmethod
+    async def _update_devices_status(devices_status: Dict) -> bool:
+        devices_uid = list(devices_status.keys())
+        status, last_connections = zip(*devices_status.values())
+        try:
+            return await db.execute(
+                update_devices_status_sql,
+                devices_uid, list(status), list(last_connections)
+            )
+        except Exception as error:
+            logger.error(f"update devices status: {error}")
+            return False
+
+    def _requeue_connect_logs(self, connect_logs: List[Tuple]) -> None:
+        # failed logs go before the logs buffered during the flush
+        self._connect_logs = connect_logs + self._connect_logs
+        dropped_size = len(self._connect_logs) - self.max_pending
+        if dropped_size > 0:
+            logger.error(f"drop {dropped_size} connect logs over max pending")
+            del self._connect_logs[:dropped_size]
+        self._requeued_size = min(len(connect_logs), len(self._connect_logs))
+
+    def _requeue_devices_status(self, devices_status: Dict) -> None:
+        # status buffered during the flush is newer and wins
+        devices_status.update(self._devices_status)
+        dropped_size = len(devices_status) - self.max_pending
+        if dropped_size > 0:
+            logger.error(f"drop {dropped_size} devices status over max pending")
+            for device_uid in list(devices_status)[:dropped_size]:
+                del devices_status[device_uid]
+        self._devices_status = devices_status
+
+
+connect_buffer = ConnectEventBuffer(
+    flush_size=project_config.get('CONNECT_EVENTS_FLUSH_SIZE', 1000),
+    flush_interval=project_config.get('CONNECT_EVENTS_FLUSH_INTERVAL', 1),
+    max_pending=project_config.get('CONNECT_EVENTS_MAX_PENDING', 100000)
+)
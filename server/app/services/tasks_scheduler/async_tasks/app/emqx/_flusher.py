@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+
+__all__ = ['PeriodicFlusher']
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher(ABC):
+    """
+    Base of write-behind buffers: flush runs every flush_interval
+    seconds after start and once more on stop, subclasses implement flush
+    and keep the items of a failed flush for the next one
+    """
+
+    name = 'buffer'
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._flush_task = None
+
+    @abstractmethod
+    async def flush(self) -> None:
+        pass
+
+    async def _periodic_flush(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as error:
+                logger.error(f"flush {self.name}: {error}")
+
+    def start(self) -> None:
+        if not self._flush_task:
+            self._flush_task = asyncio.ensure_future(self._periodic_flush())
+
+    async def stop(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from actor_libs.database.async_db import db
+from actor_libs.http_tools.responses import handle_emqx_rule_response
+from ._flusher import PeriodicFlusher
+from .sql_statements import query_subscribe_devices_sql
+from ..config import project_config
+from ..extra import emqx_http
+
+
+__all__ = ['subscribe_queue']
+
+
+logger = logging.getLogger(__name__)
+
+
+class SubscribeQueue(PeriodicFlusher):
+    """
+    Coalesce connected devices over a short window and
+    subscribe their inbox topics with emqx batch subscribe api.
+    Devices of a failed query or batch are kept for the next flush,
+    at most max_pending devices are kept
+    """
+
+    name = 'subscribe queue'
+
+    def __init__(self, window: float = 0.2, batch_size: int = 500,
+                 concurrency: int = 4, max_pending: int = 100000):
+        super().__init__(window)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        # {deviceID: deviceUsername}, repeated connects of a device coalesce
+        self._connected_devices: Dict[str, str] = {}
+        self._semaphore = None
+
+    def add_device(self, device_uid: str, device_username: str) -> None:
+        self._connected_devices[device_uid] = device_username
+
+    async def flush(self) -> None:
+        connected_devices, self._connected_devices = self._connected_devices, {}
+        if not connected_devices:
+            return
+        query_results = await db.fetch_many(
+            query_subscribe_devices_sql,
+            list(connected_devices.keys()), list(connected_devices.values())
+        )
+        if query_results is None:
+            # query error is logged by async_db
+            self._requeue_devices(connected_devices)
+            return
+        subscribe_items = [
+            {
+                'topic': (
+                    f"/{device['protocol']}/{device['tenantID']}"
+                    f"/{device['productID']}/{device['deviceID']}/inbox"
+                ),
+                'qos': 1,
+                'client_id': device['deviceID']
+            }
+            for device in query_results
+            if device['protocol'] != 'lwm2m'  # lwm2m protocol not subscribe
+        ]
+        batches = [
+            subscribe_items[i:i + self.batch_size]
+            for i in range(0, len(subscribe_items), self.batch_size)
+        ]
+        batches_result = await asyncio.gather(
+            *[self._subscribe_batch(batch) for batch in batches],
+            return_exceptions=True
+        )
+        for batch, batch_result in zip(batches, batches_result):
+            if isinstance(batch_result, Exception):
+                logger.error(
+                    f"subscribe {len(batch)} devices inbox: {batch_result!r}"
+                )
+            if batch_result is not True:
+                self._requeue_devices({
+                    item['client_id']: connected_devices[item['client_id']]
+                    for item in batch
+                })
+
+    async def _subscribe_batch(self, subscribe_items: List[Dict]) -> bool:
+        """ Return True if the batch is subscribed """
+
+        if not self._semaphore:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        emqx_sub_url = f"{project_config['EMQX_API']}/mqtt/subscribe_batch"
+        async with self._semaphore:
+            response = await emqx_http.post_url(url=emqx_sub_url, json=subscribe_items)
+        handled_response = handle_emqx_rule_response(response)
+        if handled_response['status'] != 3:
+            logger.error(
+                f"subscribe {len(subscribe_items)} devices inbox failed: "
+                f"{handled_response.get('error')}"
+            )
+            return False
+        return True
+
+    def _requeue_devices(self, connected_devices: Dict[str, str]) -> None:
+        # devices connected during the flush are newer and win
+        connected_devices.update(self._connected_devices)
+        dropped_size = len(connected_devices) - self.max_pending
+        if dropped_size > 0:
+            logger.error(f"drop {dropped_size} subscribe devices over max pending")
+            for device_uid in list(connected_devices)[:dropped_size]:
+                del connected_devices[device_uid]
+        self._connected_devices = connected_devices
+
+
+subscribe_queue = SubscribeQueue(
+    window=project_config.get('AUTO_SUB_WINDOW', 0.2),
+    batch_size=project_config.get('AUTO_SUB_BATCH_SIZE', 500),
+    concurrency=project_config.get('AUTO_SUB_CONCURRENCY', 4),
+    max_pending=project_config.get('AUTO_SUB_MAX_PENDING', 100000)
+)
@@ -1,51 +1,45 @@
 from datetime import datetime
+from typing import Dict, Iterable
 
+from actor_libs.cache import TTLCache, product_meta_cache
 from actor_libs.database.async_db import db
-from .sql_statements import (
-    query_base_devices_sql, device_cert_auth_sql,
-    insert_connect_logs_sql, update_device_sql
-)
+from ._connect_buffer import connect_buffer
+from .sql_statements import query_base_devices_sql, device_cert_auth_sql
+from ..config import project_config
 from ..extra import HttpException
 from actor_libs.logs import create_logger
 logger = create_logger('backend', log_level='info')
 
-__all__ = ['device_auth']
+__all__ = ['device_auth', 'invalidate_device_auth']
+
+
+# {deviceID: {CN or None: device_info}}
+device_auth_cache = TTLCache(
+    maxsize=project_config.get('DEVICE_AUTH_CACHE_SIZE', 200000),
+    ttl=project_config.get('DEVICE_AUTH_CACHE_TTL', 300)
+)
 
 
 async def device_auth(request_form):
     device_uid = request_form.get('username')
     cn = request_form.get('cn')
 
-    logger.info(request_form)
+    logger.debug(request_form)
 
-    connect_date = str(datetime.now())
+    connect_date = datetime.now()
     if cn and cn != 'undefined':
-        query_sql = device_cert_auth_sql.format(
-            deviceID=device_uid, CN=cn
-        )
         auth_type = 2
     else:
-        query_sql = query_base_devices_sql.format(
-            deviceID=device_uid
-        )
+        cn = None
         auth_type = 1
 
-    logger.info(query_sql)
-
-    query_result = await db.fetch_row(query_sql)
-
-    if not query_result:
+    device_info = await _get_auth_device_info(device_uid, cn)
+    if not device_info:
         raise HttpException(404, field='device')
 
-    logger.info("row 37")
-
-    device_info = dict(query_result)
-
     if auth_type != device_info['authType']:
         raise HttpException(404, field='authType')
 
-    logger.info("row 44")
-
     if device_info['protocol'] == 'lwm2m' or auth_type == 2:
         auth_status = True
     elif all([auth_type == 1,
@@ -54,27 +48,53 @@ async def device_auth(request_form):
         auth_status = True
     else:
         auth_status = False
-    connect_dict = {
-        'IP': request_form.get('ip'),
-        'msgTime': connect_date,
-        'deviceID': device_info['deviceID'],
-        'tenantID': device_info['tenantID']
-    }
     if auth_status:
-        connect_dict['connectStatus'] = 1
+        connect_status = 1
         mountpoint = (
             f"/{device_info['protocol']}/{device_info['tenantID']}"
             f"/{device_info['productID']}/{device_info['deviceID']}/"
         )
         record, code = {'mountpoint': mountpoint}, 200
     else:
-        connect_dict['connectStatus'] = 2
+        connect_status = 2
         record, code = {'status': 401}, 401
-    await db.execute(insert_connect_logs_sql.format(**connect_dict))
-    await db.execute(
-        update_device_sql.format(
-            lastConnection=connect_date,
-            deviceStatus=1,
-            deviceID=device_info['deviceID']
-        ))
+    connect_buffer.add_event(
+        device_uid=device_info['deviceID'], tenant_uid=device_info['tenantID'],
+        connect_status=connect_status, msg_time=connect_date,
+        ip=request_form.get('ip'), device_status=1
+    )
     return record, code
+
+
+def invalidate_device_auth(devices_uid: Iterable[str] = None) -> None:
+    """ Drop cached auth info of devices, drop all if devices_uid is None """
+
+    if devices_uid is None:
+        device_auth_cache.clear()
+    else:
+        device_auth_cache.pop_many(devices_uid)
+
+
+async def _get_auth_device_info(device_uid, cn=None) -> Dict:
+    """ Get device auth info from cache, query database when cache miss """
+
+    cached_device = device_auth_cache.get(device_uid)
+    if cached_device and cn in cached_device:
+        return cached_device[cn]
+
+    if cn:
+        query_result = await db.fetch_row(device_cert_auth_sql, device_uid, cn)
+    else:
+        query_result = await db.fetch_row(query_base_devices_sql, device_uid)
+    if not query_result:
+        return {}
+    device_info = dict(query_result)
+    products = await product_meta_cache.get_products_async([device_info['productID']])
+    product = products.get(device_info['productID'])
+    if not product:
+        return {}
+    device_info['protocol'] = product['protocol']
+    cached_device = device_auth_cache.get(device_uid) or {}
+    cached_device[cn] = device_info
+    device_auth_cache.set(device_uid, cached_device)
+    return device_info
@@ -3,12 +3,9 @@ import logging
 from datetime import datetime
 
 from actor_libs.database.async_db import db
-from actor_libs.http_tools.async_http import AsyncHttp
-from .sql_statements import (
-    query_base_devices_sql, insert_connect_logs_sql,
-    update_publish_logs_sql, update_device_status_sql
-)
-from ..config import project_config
+from ._connect_buffer import connect_buffer
+from ._subscribe_queue import subscribe_queue
+from .sql_statements import query_username_devices_sql, update_publish_logs_sql
 from ..extra import HttpException
 
 
@@ -38,47 +35,21 @@ async def client_disconnected_callback(request_dict) -> None:
         request_dict.get('client_id'),
         request_dict.get('username'),
     )
-    connect_dict = {
-        'msgTime': request_dict['callback_date'],
-        'deviceID': device_info['deviceID'],
-        'tenantID': device_info['tenantID'],
-        'connectStatus': 0,
-        'IP': 'NULL'
-    }
-    update_device = {
-        'deviceStatus': 0,
-        'id': device_info['id']
-    }
-    await db.execute(insert_connect_logs_sql.format(**connect_dict))
-    await db.execute(update_device_status_sql.format(**update_device))
+    connect_buffer.add_event(
+        device_uid=device_info['deviceID'], tenant_uid=device_info['tenantID'],
+        connect_status=0, msg_time=request_dict['callback_date'],
+        device_status=0
+    )
 
 
 async def client_connected_callback(request_dict) -> None:
-    """ Device connected subscribe inbox topic """
+    """ Device connected subscribe inbox topic, subscribed in batches later """
 
-    device_info = await _query_device_info(
-        request_dict.get('client_id'),
-        request_dict.get('username'),
-    )
-    if device_info['protocol'] == 'lwm2m':
-        # if device protocol is lwm2m pass
-        return
-
-    auto_sub_topic = (
-        f"/{device_info['protocol']}/{device_info['tenantID']}"
-        f"/{device_info['productID']}/{device_info['deviceID']}/inbox"
-    )
-    request_json = {
-        'topic': auto_sub_topic,
-        'qos': 1,
-        'client_id': device_info['deviceID']
-    }
-    emqx_sub_url = f"{project_config['EMQX_API']}/mqtt/subscribe"
-    async with AsyncHttp(auth=project_config['EMQX_AUTH']) as async_http:
-        response = await async_http.post_url(
-            url=emqx_sub_url, json=request_json
-        )
-        logger.info(response)
+    device_id = request_dict.get('client_id')
+    device_username = request_dict.get('username')
+    if not device_id or not device_username:
+        raise HttpException(code=404, field='devices')
+    subscribe_queue.add_device(device_id, device_username)
 
 
 async def message_acked_callback(request_dict) -> None:
@@ -99,18 +70,14 @@ async def message_acked_callback(request_dict) -> None:
     if not task_id:
         raise HttpException(code=404)
 
-    await db.execute(
-        update_publish_logs_sql.format(publishStatus=2, taskID=task_id)
-    )
+    await db.execute(update_publish_logs_sql, 2, task_id)
 
 
 async def _query_device_info(device_id, device_username):
     if not device_id or not device_username:
         raise HttpException(code=404, field='devices')
-    filter_username_sql = """ AND devices."deviceUsername" = '{deviceUsername}' """
-    device_query_sql = query_base_devices_sql + filter_username_sql
     query_result = await db.fetch_row(
-        device_query_sql.format(deviceID=device_id, deviceUsername=device_username)
+        query_username_devices_sql, device_id, device_username
     )
     if not query_result:
         raise HttpException(404, field='device')
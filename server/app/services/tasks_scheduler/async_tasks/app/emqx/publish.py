@@ -1,18 +1,23 @@
+import asyncio
 import json
 import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
 
 from actor_libs.database.async_db import db
 from actor_libs.emqx.publish.protocol import PROTOCOL_PUBLISH_JSON_FUNC
-from actor_libs.http_tools import AsyncHttp
 from actor_libs.http_tools.responses import handle_emqx_publish_response
 from actor_libs.tasks.backend import get_task_result
 from actor_libs.types import TaskResult
 from actor_libs.utils import generate_uuid
-from .sql_statements import insert_publish_logs_sql, update_publish_logs_sql
+from .sql_statements import (
+    insert_publish_logs_sql, update_publish_logs_sql, update_batch_publish_logs_sql
+)
 from ..config import project_config
+from ..extra import emqx_http
 
 
-__all__ = ['device_publish_task']
+__all__ = ['device_publish_task', 'devices_publish_batch_task']
 
 
 logger = logging.getLogger(__name__)
@@ -31,8 +36,11 @@ async def device_publish_task(request_dict) -> TaskResult:
     if not request_dict.get('streamID'):
         request_dict['streamID'] = None
     # insert publish logs
-    insert_sql = insert_publish_logs_sql.format(**request_dict)
-    insert_status = await db.execute(sql=insert_sql)
+    insert_status = await db.execute(
+        insert_publish_logs_sql,
+        request_dict['topic'], request_dict['streamID'], request_dict['payload'],
+        task_id, device_uid, request_dict['tenantID']
+    )
     if not insert_status:
         message = f"insert {device_uid} publish logs errors!"
         return get_task_result(status=4, message=message)
@@ -45,14 +53,90 @@ async def device_publish_task(request_dict) -> TaskResult:
     publish_json = publish_json_func(request_dict)
     # emqx publish
     task_result = await _emqx_device_publish(publish_json, device_uid, task_id)
+    if task_result['status'] != 3:
+        await db.execute(update_publish_logs_sql, 0, task_id)
     return task_result
 
 
-async def _emqx_device_publish(publish_json, device_uid, task_id):
+async def devices_publish_batch_task(requests_list: List[Dict]) -> List[TaskResult]:
+    """
+    Publish to many devices in one request:
+    publish logs are copied in a single statement, emqx publishes
+    are fanned out with a concurrency limit, failed logs are marked in bulk
+    :param requests_list: list of device_publish_task request_dict
+    :return: task result of each request, in request order
+    """
+    task_results: List[TaskResult] = [None] * len(requests_list)
+    publish_records, publish_jobs = [], []
+    # msgTime is part of publish_logs primary key, now() is fixed in a transaction
+    base_time = datetime.now()
+    for index, request_dict in enumerate(requests_list):
+        task_id = generate_uuid()
+        device_uid = request_dict.get('deviceID')
+        publish_json_func = PROTOCOL_PUBLISH_JSON_FUNC.get(request_dict.get('protocol'))
+        if not publish_json_func:
+            message = f"{device_uid} publish not support this protocol"
+            task_results[index] = get_task_result(status=4, message=message)
+            continue
+        try:
+            payload = json.loads(request_dict['payload'])
+        except (KeyError, TypeError, ValueError):
+            message = f"{device_uid} publish payload invalid"
+            task_results[index] = get_task_result(status=4, message=message)
+            continue
+        publish_records.append((
+            request_dict['topic'], request_dict.get('streamID') or None,
+            request_dict['payload'], 1, task_id, device_uid,
+            request_dict['tenantID'], base_time + timedelta(microseconds=index)
+        ))
+        publish_json = publish_json_func({
+            **request_dict, 'taskID': task_id, 'payload': payload
+        })
+        publish_jobs.append((index, publish_json, device_uid, task_id))
+    if not publish_jobs:
+        return task_results
+    # insert publish logs
+    insert_status = await db.copy_records_to_table(
+        'publish_logs', records=publish_records,
+        columns=['topic', 'streamID', 'payload', 'publishStatus',
+                 'taskID', 'deviceID', 'tenantID', 'msgTime']
+    )
+    if not insert_status:
+        for index, _, device_uid, _ in publish_jobs:
+            message = f"insert {device_uid} publish logs errors!"
+            task_results[index] = get_task_result(status=4, message=message)
+        return task_results
+    # emqx publish
+    semaphore = asyncio.Semaphore(project_config.get('PUBLISH_BATCH_CONCURRENCY', 50))
+
+    async def _limited_publish(publish_json, device_uid, task_id):
+        async with semaphore:
+            return await _emqx_device_publish(publish_json, device_uid, task_id)
+
+    publish_results = await asyncio.gather(
+        *[_limited_publish(publish_json, device_uid, task_id)
+          for _, publish_json, device_uid, task_id in publish_jobs],
+        return_exceptions=True
+    )
+    failed_tasks_id = []
+    for (index, _, device_uid, task_id), task_result in zip(publish_jobs, publish_results):
+        if isinstance(task_result, Exception):
+            task_result = get_task_result(
+                status=4, message=str(task_result) or 'Device publish failed',
+                task_id=task_id, result={'deviceID': device_uid, 'taskID': task_id}
+            )
+        if task_result['status'] != 3:
+            failed_tasks_id.append(task_id)
+        task_results[index] = task_result
+    if failed_tasks_id:
+        await db.execute(update_batch_publish_logs_sql, 0, failed_tasks_id)
+    return task_results
+
+
+async def _emqx_device_publish(publish_json, device_uid, task_id) -> TaskResult:
     emqx_pub_url = project_config['EMQX_PUBLISH_URL']
-    async with AsyncHttp(auth=project_config['EMQX_AUTH']) as async_http:
-        response = await async_http.post_url(emqx_pub_url, json=publish_json)
-        logger.info(response)
+    response = await emqx_http.post_url(emqx_pub_url, json=publish_json)
+    logger.info(response)
     handled_response = handle_emqx_publish_response(response)
     base_result = {
         'deviceID': device_uid,
@@ -69,6 +153,4 @@ async def _emqx_device_publish(publish_json, device_uid, task_id):
             status=4, message=error_message,
             task_id=task_id, result=base_result
         )
-        update_sql = update_publish_logs_sql.format(taskID=task_id, publishStatus=0)
-        await db.execute(sql=update_sql)
     return task_result
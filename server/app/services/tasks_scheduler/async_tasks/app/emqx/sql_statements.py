@@ -1,6 +1,21 @@
-query_base_devices_sql = """
+from actor_libs.database.async_db import db
+
+
+# protocol of device is read from product meta cache
+query_base_devices_sql = db.register_statement('query_base_devices', """
 SELECT
-       devices.id, devices."authType", devices."deviceID", 
+       devices.id, devices."authType", devices."deviceID",
+       devices."deviceUsername", devices.token,
+       devices."productID", devices."tenantID"
+FROM devices
+WHERE
+      devices."deviceID" = $1
+  AND devices.blocked = 0
+""")
+
+query_username_devices_sql = db.register_statement('query_username_devices', """
+SELECT
+       devices.id, devices."authType", devices."deviceID",
        devices."deviceUsername", devices.token,
        devices."productID", devices."tenantID",
        lower(dict_code."enLabel") AS protocol
@@ -8,59 +23,69 @@ FROM devices
 JOIN products  ON devices."productID" = products."productID"
 JOIN dict_code ON dict_code."codeValue" = products."cloudProtocol"
 WHERE
-      devices."deviceID" = '{deviceID}'
+      devices."deviceID" = $1
+  AND devices."deviceUsername" = $2
   AND devices.blocked = 0
   AND dict_code.code = 'cloudProtocol'
-"""
+""")
 
-device_cert_auth_sql = """
+# protocol of device is read from product meta cache
+device_cert_auth_sql = db.register_statement('device_cert_auth', """
 SELECT
-       devices.id, devices."authType", devices."deviceID", 
+       devices.id, devices."authType", devices."deviceID",
        devices."deviceUsername", devices.token,
-       devices."productID", devices."tenantID",
-       lower(dict_code."enLabel") AS protocol
+       devices."productID", devices."tenantID"
 FROM devices
 JOIN certs_devices ON certs_devices."deviceIntID" = devices.id
 JOIN certs ON certs.id = certs_devices."certIntID"
-JOIN products  ON devices."productID" = products."productID"
-JOIN dict_code ON dict_code."codeValue" = products."cloudProtocol"
 WHERE
-      devices."deviceID" = '{deviceID}'
+      devices."deviceID" = $1
   AND devices.blocked = 0
-  AND certs."CN" = '{CN}'
+  AND certs."CN" = $2
   AND certs.enable = 1
-  AND dict_code.code = 'cloudProtocol'
-"""
+""")
 
-insert_connect_logs_sql = """
-INSERT INTO "connect_logs"
-    ("IP", "connectStatus", "msgTime", "deviceID", "tenantID") 
-VALUES('{IP}', {connectStatus}, '{msgTime}', '{deviceID}', '{tenantID}') 
-"""
-
-update_device_sql = """
-UPDATE "devices" 
-SET 
-    "lastConnection"='{lastConnection}', 
-    "deviceStatus"={deviceStatus} 
-WHERE 
-     devices."deviceID" = '{deviceID}'
-"""
-
-insert_publish_logs_sql = """
+insert_publish_logs_sql = db.register_statement('insert_publish_logs', """
 INSERT INTO "publish_logs"
-    ("topic", "streamID", "payload", "publishStatus", 
+    ("topic", "streamID", "payload", "publishStatus",
     "taskID", "deviceID", "tenantID")
-VALUES ('{topic}', '{streamID}', '{payload}', '1', '{taskID}',
-         '{deviceID}', '{tenantID}')
-"""
+VALUES ($1, $2, $3, 1, $4, $5, $6)
+""")
+
+update_devices_status_sql = db.register_statement('update_devices_status', """
+UPDATE devices
+SET "deviceStatus" = devices_status."deviceStatus",
+    "lastConnection" = COALESCE(devices_status."lastConnection",
+                                devices."lastConnection")
+FROM unnest($1::varchar[], $2::smallint[], $3::timestamp[])
+         AS devices_status("deviceID", "deviceStatus", "lastConnection")
+WHERE devices."deviceID" = devices_status."deviceID"
+""")
 
-update_device_status_sql = """
-UPDATE devices SET "deviceStatus"={deviceStatus} WHERE "id"={id}
-"""
+update_publish_logs_sql = db.register_statement('update_publish_logs', """
+UPDATE publish_logs
+SET "publishStatus" = $1
+WHERE publish_logs."taskID" = $2
+""")
 
-update_publish_logs_sql = """
+update_batch_publish_logs_sql = db.register_statement('update_batch_publish_logs', """
 UPDATE publish_logs
-SET "publishStatus"={publishStatus}
-WHERE publish_logs."taskID"='{taskID}'
-"""
+SET "publishStatus" = $1
+WHERE publish_logs."taskID" = ANY ($2::varchar[])
+""")
+
+query_subscribe_devices_sql = db.register_statement('query_subscribe_devices', """
+SELECT
+       devices."deviceID", devices."productID", devices."tenantID",
+       lower(dict_code."enLabel") AS protocol
+FROM devices
+JOIN unnest($1::varchar[], $2::varchar[])
+         AS connected_devices("deviceID", "deviceUsername")
+     ON connected_devices."deviceID" = devices."deviceID"
+    AND connected_devices."deviceUsername" = devices."deviceUsername"
+JOIN products  ON devices."productID" = products."productID"
+JOIN dict_code ON dict_code."codeValue" = products."cloudProtocol"
+WHERE
+      devices.blocked = 0
+  AND dict_code.code = 'cloudProtocol'
+""")
@@ -1,27 +1,146 @@
-from typing import Dict, Any
+import csv
+import gzip
+import os
+from typing import Any, Dict, Iterator, List
 
 import pandas as pd
+import xlrd
+import xlsxwriter
 
 
-__all__ = ['read_excel', 'pg_to_excel']
+__all__ = ['ExcelRows', 'ExportWriter', 'pg_to_excel']
 
 
-async def read_excel(file_path: str, rename_dict: dict = None, replace_dict: dict = None):
+class ExcelRows:
     """
-    Read excel
-    :param file_path: excel file path
-    :param rename_dict: excel rename dict
-    :param replace_dict: excel replace dict
-    :return: dataFrame
+    Read rows of the first sheet in fixed-size chunks as records,
+    without building a dataFrame of the whole workbook
     """
-    data_frame = pd.read_excel(file_path, encoding='utf-8')
-    if rename_dict:
-        if len(rename_dict) != len(data_frame.columns):
-            raise Exception('Excel data is not corresponding with template!')
-        data_frame = data_frame[rename_dict.keys()].rename(columns=rename_dict)
-    if replace_dict:
-        data_frame = data_frame.replace(replace_dict)
-    return data_frame
+
+    def __init__(self, file_path: str, rename_dict: dict = None, replace_dict: dict = None):
+        """
+        :param file_path: excel file path
+        :param rename_dict: excel rename dict, {excel column: record key}
+        :param replace_dict: excel replace dict, {record key: {excel value: value}}
+        """
+        self.workbook = xlrd.open_workbook(file_path, on_demand=True)
+        self.sheet = self.workbook.sheet_by_index(0)
+        self.replace_dict = replace_dict or {}
+        header = [str(value) for value in self.sheet.row_values(0)] if self.sheet.nrows else []
+        if rename_dict:
+            if len(rename_dict) != len(header):
+                raise Exception('Excel data is not corresponding with template!')
+            # {column index: record key}
+            self.columns = {
+                header.index(column): key for column, key in rename_dict.items()
+            }
+        else:
+            self.columns = dict(enumerate(header))
+
+    @property
+    def total(self) -> int:
+        return max(self.sheet.nrows - 1, 0)
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[List[Dict]]:
+        chunk = []
+        for row_index in range(1, self.sheet.nrows):
+            chunk.append(self._get_record(self.sheet.row(row_index)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self) -> None:
+        self.workbook.release_resources()
+
+    def _get_record(self, row_cells) -> Dict:
+        record = {}
+        for index, key in self.columns.items():
+            value = self._cell_value(row_cells[index]) if index < len(row_cells) else None
+            replace_values = self.replace_dict.get(key)
+            if replace_values and value in replace_values:
+                value = replace_values[value]
+            record[key] = value
+        return record
+
+    def _cell_value(self, cell) -> Any:
+        """ Convert like pandas: empty -> None, integral float -> int """
+
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell.ctype == xlrd.XL_CELL_TEXT:
+            return cell.value if cell.value != '' else None
+        if cell.ctype == xlrd.XL_CELL_NUMBER:
+            return int(cell.value) if cell.value.is_integer() else cell.value
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate.xldate_as_datetime(cell.value, self.workbook.datemode)
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        return cell.value
+
+
+class ExportWriter:
+    """
+    Write export rows incrementally, xlsx is written in constant memory mode,
+    csv is gzip compressed
+    """
+
+    # excel max rows of a sheet, include header
+    XLSX_SHEET_ROWS = 1048576
+
+    def __init__(self, export_path: str, table_name: str, tenant_uid: str = None,
+                 header: List[str] = None, file_format: str = 'xlsx'):
+        tenant_uid = tenant_uid if tenant_uid else 'admin'
+        self.file_format = file_format
+        self.header = header or []
+        if file_format == 'csv':
+            self.filename = ''.join(['actorcloud', table_name, tenant_uid, '.csv.gz'])
+            self._file = gzip.open(
+                os.path.join(export_path, self.filename), 'wt',
+                encoding='utf-8-sig', newline=''
+            )
+            self._csv_writer = csv.writer(self._file)
+            self._csv_writer.writerow(self.header)
+        else:
+            self.filename = ''.join(['actorcloud', table_name, tenant_uid, '.xlsx'])
+            self._workbook = xlsxwriter.Workbook(
+                os.path.join(export_path, self.filename),
+                {'constant_memory': True,
+                 'default_date_format': 'yyyymmdd hh:mm:ss'}
+            )
+            self._worksheet = None
+            self._sheet_row = self.XLSX_SHEET_ROWS
+        self.rows = 0
+
+    def write_row(self, row: List) -> None:
+        if self.file_format == 'csv':
+            self._csv_writer.writerow(['' if value is None else value for value in row])
+        else:
+            if self._sheet_row >= self.XLSX_SHEET_ROWS:
+                self._add_worksheet()
+            self._worksheet.write_row(self._sheet_row, 0, row)
+            self._sheet_row += 1
+        self.rows += 1
+
+    def close(self) -> Dict[str, Any]:
+        if self.file_format == 'csv':
+            self._file.close()
+        else:
+            if not self._worksheet:
+                self._add_worksheet()
+            self._workbook.close()
+        export_excel = f'download?filename={self.filename}&fileType=export_excel'
+        task_result = {
+            'status': 3,
+            'excelPath': export_excel
+        }
+        return task_result
+
+    def _add_worksheet(self) -> None:
+        self._worksheet = self._workbook.add_worksheet()
+        self._worksheet.write_row(0, 0, self.header)
+        self._sheet_row = 1
 
 
 async def pg_to_excel(export_path: str, table_name: str = None, tenant_uid: str = None,
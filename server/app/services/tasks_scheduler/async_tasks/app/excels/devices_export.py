@@ -1,10 +1,9 @@
-import pandas as pd
-
+from actor_libs.cache import dict_code_cache
 from actor_libs.database.async_db import db
 from actor_libs.tasks.backend import update_task
-from ._utils import pg_to_excel
+from ._utils import ExportWriter
 from .multi_language import EXPORT_RENAME_ZH
-from .sql_statements import dict_code_sql, end_devices_export_sql
+from .sql_statements import end_devices_export_sql
 from ..config import project_config
 
 
@@ -13,30 +12,43 @@ __all__ = ['devices_export_task']
 
 async def devices_export_task(request_dict):
     """
-    Export device to excel
+    Export device to excel or csv(gzip), rows are streamed from
+    a server-side cursor and written incrementally
     :return export result include status and download url
     """
 
     task_id = request_dict['taskID']
     language = request_dict.get('language')
     tenant_uid = request_dict.get('tenantID')
-    dict_code = {}
-    dict_result = await db.fetch_many(dict_code_sql.format(language=language))
-    for item in dict_result:
-        dict_code[item[0]] = dict(zip(item[1], item[2]))
+    file_format = 'csv' if request_dict.get('format') == 'csv' else 'xlsx'
     column_sort = list(EXPORT_RENAME_ZH.keys())
-    query_sql = end_devices_export_sql
-    if tenant_uid:
-        query_sql += f""" where users."tenantID" = '{tenant_uid}'"""
-    device_data = await db.fetch_many(query_sql)
-    device_data = [dict(record) for record in device_data]
-    data_frame = pd.DataFrame(device_data)[column_sort].replace(dict_code)
+    # {column: {value: label}}, only code columns which are exported
+    dict_codes = await dict_code_cache.refresh_async()
+    columns_code = [
+        dict_code_cache.labels(column, language) if column in dict_codes else None
+        for column in column_sort
+    ]
     if language != 'en':
-        data_frame = data_frame.rename(columns=EXPORT_RENAME_ZH)
-    export_excel_path = project_config['EXPORT_EXCEL_PATH']
-    result = await pg_to_excel(
-        export_excel_path, 'devices', tenant_uid, data_frame
+        header = [EXPORT_RENAME_ZH[column] for column in column_sort]
+    else:
+        header = column_sort
+    export_writer = ExportWriter(
+        project_config['EXPORT_EXCEL_PATH'], 'devices', tenant_uid,
+        header=header, file_format=file_format
     )
+    try:
+        async for record in db.iterate(
+                end_devices_export_sql, tenant_uid or None,
+                prefetch=project_config.get('EXPORT_FETCH_SIZE', 1000)):
+            row = []
+            for column, code_labels in zip(column_sort, columns_code):
+                value = record[column]
+                if code_labels and value in code_labels:
+                    value = code_labels[value]
+                row.append(value)
+            export_writer.write_row(row)
+    finally:
+        result = export_writer.close()
     task_result = {
         'status': result.get('status'),
         'message': 'Devices export success',
@@ -2,21 +2,21 @@ import json
 import logging
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict, AnyStr
+from typing import Dict, AnyStr, List
 
 import pandas as pd
 
+from actor_libs.cache import dict_code_cache
 from actor_libs.database.async_db import db
 from actor_libs.tasks.backend import update_task
 from actor_libs.tasks.exceptions import TaskException
 from actor_libs.utils import generate_uuid
-from ._utils import pg_to_excel
-from ._utils import read_excel
+from ._utils import ExcelRows, pg_to_excel
 from .multi_language import (
     ImportStatus, STATUS_MESSAGE, IMPORT_RENAME_ZH, IMPORT_ERROR_RENAME
 )
 from .sql_statements import (
-    device_import_sql, dict_code_sql,
+    create_import_staging_sql, merge_import_devices_sql,
     query_tenant_devices_limit_sql,
 )
 from .validate import validates_schema
@@ -29,9 +29,26 @@ __all__ = ['devices_import_task']
 logger = logging.getLogger(__name__)
 
 
+# import_devices staging table columns and the type of copied values
+IMPORT_COLUMNS = [
+    ('createAt', None), ('deviceName', str), ('deviceType', int), ('productID', str),
+    ('authType', int), ('upLinkNetwork', int), ('deviceID', str),
+    ('deviceUsername', str), ('token', str),
+    ('location', str), ('latitude', float), ('longitude', float),
+    ('manufacturer', str), ('serialNumber', str), ('softVersion', str),
+    ('hardwareVersion', str), ('deviceConsoleIP', str),
+    ('deviceConsoleUsername', str), ('deviceConsolePort', int),
+    ('mac', str), ('userIntID', int), ('tenantID', str),
+    ('upLinkSystem', int), ('gateway', int), ('parentDevice', int),
+    ('loraData', str), ('lwm2mData', str)
+]
+
+
 async def devices_import_task(request_dict):
     """
     {'taskID', 'language', 'filePath', 'tenantID', 'userIntID'}
+    Rows are read, validated and imported in chunks of IMPORT_CHUNK_SIZE,
+    each chunk is committed in its own transaction
     """
 
     task_id = request_dict['taskID']
@@ -40,25 +57,22 @@ async def devices_import_task(request_dict):
         import_status=ImportStatus.UPLOADED
     )
     dict_code = await get_dict_code(request_dict['language'])
-    import_records = await read_devices_excels(
+    excel_rows = await read_devices_excels(
         request_dict, dict_code
     )
-    if not import_records:
+    if not excel_rows.total:
+        excel_rows.close()
         await _update_task_progress(
             request_dict['taskID'], status=4,
             progress=15, import_status=ImportStatus.FAILED
         )
         raise TaskException(code=500, error_code='FAILED')
-    correct_records, error_records = await handle_import_records(
-        import_records, request_dict
-    )
-    correct_num, error_nums = len(correct_records), len(error_records)
-    result_info = {
-        'success': correct_num,
-        'failed': error_nums
-    }
-    if correct_num > 0:
-        await _import_correct_rows(correct_records, correct_num, request_dict)
+    try:
+        result_info, error_records = await _import_excel_rows(
+            excel_rows, request_dict
+        )
+    finally:
+        excel_rows.close()
     if error_records:
         try:
             export_path = await _export_error_rows(
@@ -75,25 +89,23 @@ async def devices_import_task(request_dict):
 
 
 async def get_dict_code(language: AnyStr) -> Dict:
-    dict_code = {}
-    query_dict_code = await db.fetch_many(
-        dict_code_sql.format(language=language)
-    )
-    for item in query_dict_code:
-        # {code:{label:value}...}
-        dict_code[item[0]] = dict(zip(item[2], item[1]))
+    """ {code: {label: value}} of the shared dict code """
+
+    dict_codes = await dict_code_cache.refresh_async()
+    dict_code = {
+        code: dict_code_cache.values(code, language)
+        for code in dict_codes
+    }
     return dict_code
 
 
-async def read_devices_excels(request_dict: Dict, dict_code):
+async def read_devices_excels(request_dict: Dict, dict_code) -> ExcelRows:
     try:
         rename_dict = IMPORT_RENAME_ZH if request_dict['language'] != 'en' else None
-        data_frame = await read_excel(
+        excel_rows = ExcelRows(
             request_dict['filePath'], rename_dict=rename_dict,
             replace_dict=dict_code
         )
-        data_frame = await _handle_data_frame(data_frame)
-        import_records = data_frame.to_dict('records')
         await _update_task_progress(
             request_dict['taskID'], status=2,
             progress=30, import_status=ImportStatus.READING
@@ -105,15 +117,57 @@ async def read_devices_excels(request_dict: Dict, dict_code):
             progress=35, import_status=ImportStatus.TEMPLATE_ERROR
         )
         raise TaskException(code=500, error_code='TEMPLATE_ERROR')
-    return import_records
+    return excel_rows
+
+
+async def _import_excel_rows(excel_rows: ExcelRows, request_dict):
+    """ Validate and import excel rows chunk by chunk, report progress per chunk """
+
+    chunk_size = project_config.get('IMPORT_CHUNK_SIZE', 1000)
+    result_info = {'success': 0, 'failed': 0}
+    error_records = []
+    read_num = 0
+    chunks = excel_rows.iter_chunks(chunk_size)
+    while True:
+        try:
+            import_records = next(chunks, None)
+            if import_records is None:
+                break
+            import_records = _handle_records(import_records)
+        except Exception as e:
+            logger.error(f"read_devices_excels: {e}")
+            await _update_task_progress(
+                request_dict['taskID'], status=4, progress=35,
+                import_status=ImportStatus.TEMPLATE_ERROR, result=result_info
+            )
+            raise TaskException(code=500, error_code='TEMPLATE_ERROR')
+        correct_records, chunk_error_records = await handle_import_records(
+            import_records, request_dict
+        )
+        if correct_records:
+            await _import_correct_rows(
+                correct_records, len(correct_records), request_dict, result_info
+            )
+        error_records.extend(chunk_error_records)
+        read_num += len(import_records)
+        result_info['success'] += len(correct_records)
+        result_info['failed'] += len(chunk_error_records)
+        # chunks progress from 30 to 90
+        await _update_task_progress(
+            request_dict['taskID'], status=2,
+            progress=30 + int(60 * read_num / excel_rows.total),
+            import_status=ImportStatus.IMPORTING, result=dict(result_info)
+        )
+    return result_info, error_records
 
 
-async def _handle_data_frame(data_frame):
+def _handle_records(import_records: List[Dict]) -> List[Dict]:
     cover_float = ['longitude', 'latitude']
-    data_frame[cover_float] = data_frame[cover_float].astype(float)
-    # nan -> None
-    data_frame = data_frame.where((pd.notnull(data_frame)), None)
-    return data_frame
+    for record in import_records:
+        for key in cover_float:
+            if record.get(key) is not None:
+                record[key] = float(record[key])
+    return import_records
 
 
 async def handle_import_records(import_records, request_dict):
@@ -127,10 +181,6 @@ async def handle_import_records(import_records, request_dict):
         validated_result = await validates_schema(
             import_records, request_dict
         )
-        await _update_task_progress(
-            request_dict['taskID'], status=2, progress=50,
-            import_status=ImportStatus.VALIDATING
-        )
     except Exception as e:
         logger.error(f"validates_schema: {e}")
         await _update_task_progress(
@@ -159,25 +209,21 @@ async def handle_import_records(import_records, request_dict):
     return correct_records, error_records
 
 
-async def _import_correct_rows(correct_records, correct_num, request_dict):
+async def _import_correct_rows(correct_records, correct_num, request_dict, result_info):
     is_exceed_limit = await _check_devices_limit(correct_num, request_dict)
     if is_exceed_limit:
         await _update_task_progress(
             request_dict['taskID'], status=4, progress=70,
-            import_status=ImportStatus.LIMITED
+            import_status=ImportStatus.LIMITED, result=dict(result_info)
         )
         raise TaskException(code=500, error_code='LIMITED')
     try:
         await _insert_correct_rows(correct_records, request_dict)
-        await _update_task_progress(
-            request_dict['taskID'], status=2,
-            progress=80, import_status=ImportStatus.IMPORTING
-        )
     except Exception as e:
         logger.error(f"_import_correct_rows: {e}")
         await _update_task_progress(
             request_dict['taskID'], status=4,
-            progress=85, import_status=ImportStatus.FAILED
+            progress=85, import_status=ImportStatus.FAILED, result=dict(result_info)
         )
         raise TaskException(code=500, error_code='FAILED')
 
@@ -189,10 +235,9 @@ async def _check_devices_limit(correct_num, request_dict) -> bool:
     """
 
     check_status = False
-    query_sql = query_tenant_devices_limit_sql.format(
-        tenantID=request_dict['tenantID']
+    query_result = await db.fetch_row(
+        query_tenant_devices_limit_sql, request_dict['tenantID']
     )
-    query_result = await db.fetch_row(query_sql)
     if query_result:
         device_sum, devices_limit = query_result
         if device_sum + correct_num > devices_limit:
@@ -201,28 +246,34 @@ async def _check_devices_limit(correct_num, request_dict) -> bool:
 
 
 async def _insert_correct_rows(correct_records, request_dict):
-    default_columns = [
-        "createAt", "deviceName", "deviceType", "productID",
-        "authType", "upLinkNetwork", "deviceID", "deviceUsername", "token",
-        "location", "latitude", "longitude",
-        "manufacturer", "serialNumber", "softVersion", "hardwareVersion",
-        "deviceConsoleIP", "deviceConsoleUsername", "deviceConsolePort",
-        "mac", "upLinkSystem", "gateway", "parentDevice",
-        "loraData", "lwm2mData", "userIntID", "tenantID"
-    ]
+    """ Copy records to a staging table and merge to devices in one statement """
+
     create_at = datetime.now()
+    for record in correct_records:
+        record['createAt'] = create_at
+        record['userIntID'] = request_dict['userIntID']
+        record['tenantID'] = request_dict['tenantID']
     async with db.pool.acquire() as conn:
         async with conn.transaction():
-            for record in correct_records:
-                record['createAt'] = create_at
-                record['userIntID'] = request_dict['userIntID']
-                record['tenantID'] = request_dict['tenantID']
-                miss_columns = set(default_columns) - set(record.keys())
-                record.update({c: None for c in miss_columns})
-                execute_sql = device_import_sql.format(**record)
-                execute_sql = execute_sql.replace("'None'", "NULL")
-                execute_sql = execute_sql.replace("'NULL'", "NULL")
-                await conn.execute(execute_sql)
+            await db.conn_execute(conn, create_import_staging_sql)
+            await conn.copy_records_to_table(
+                'import_devices',
+                records=[tuple(_get_import_args(record)) for record in correct_records],
+                columns=[column for column, _ in IMPORT_COLUMNS]
+            )
+            await db.conn_execute(conn, merge_import_devices_sql)
+
+
+def _get_import_args(record: Dict) -> List:
+    """ Staging table record values, order by IMPORT_COLUMNS """
+
+    import_args = []
+    for column, column_type in IMPORT_COLUMNS:
+        value = record.get(column)
+        if value is not None and column_type is not None:
+            value = column_type(value)
+        import_args.append(value)
+    return import_args
 
 
 async def _export_error_rows(errors_rows, dict_code, request_dict):
@@ -1,12 +1,8 @@
-dict_code_sql = """
-SELECT code,
-       array_agg("codeValue") AS values,
-       array_agg("{language}Label") AS labels
-FROM dict_code
-GROUP BY code
-"""
+from actor_libs.database.async_db import db
 
-end_devices_export_sql = """
+
+# $1: tenantID, export all tenants if NULL
+end_devices_export_sql = db.register_statement('end_devices_export', """
 SELECT devices.*, end_devices.*,
        users.username AS "createUser",
        products."productName" AS product,
@@ -15,9 +11,29 @@ FROM devices
        JOIN end_devices ON end_devices.id = devices.id
        JOIN users ON users.id = devices."userIntID"
        JOIN products ON products."productID" = devices."productID"
-"""
+WHERE $1::varchar IS NULL OR users."tenantID" = $1::varchar
+""")
+
+# staging table of a import chunk, columns types same as devices and end_devices
+create_import_staging_sql = db.register_statement('create_import_staging', """
+CREATE TEMP TABLE import_devices ON COMMIT DROP AS
+SELECT
+    devices."createAt", devices."deviceName", devices."deviceType", devices."productID",
+    devices."authType", devices."upLinkNetwork", devices."deviceID",
+    devices."deviceUsername", devices."token",
+    devices."location", devices."latitude", devices."longitude",
+    devices."manufacturer", devices."serialNumber", devices."softVersion",
+    devices."hardwareVersion", devices."deviceConsoleIP",
+    devices."deviceConsoleUsername", devices."deviceConsolePort",
+    devices."mac", devices."userIntID", devices."tenantID",
+    end_devices."upLinkSystem", end_devices.gateway, end_devices."parentDevice",
+    end_devices."loraData", end_devices."lwm2mData"
+FROM devices
+    JOIN end_devices ON end_devices.id = devices.id
+WITH NO DATA
+""")
 
-device_import_sql = """
+merge_import_devices_sql = db.register_statement('merge_import_devices', """
 WITH devices AS (
     INSERT INTO devices(
         "createAt", "deviceName", "deviceType", "productID",
@@ -27,60 +43,60 @@ WITH devices AS (
         "deviceConsoleIP", "deviceConsoleUsername", "deviceConsolePort",
         "mac", "userIntID", "tenantID"
         )
-    VALUES (
-        '{createAt}', '{deviceName}', '{deviceType}', '{productID}',
-        '{authType}', '{upLinkNetwork}', '{deviceID}', '{deviceUsername}', '{token}',
-        '{location}', '{latitude}', '{longitude}',
-        '{manufacturer}', '{serialNumber}', '{softVersion}', '{hardwareVersion}',
-        '{deviceConsoleIP}', '{deviceConsoleUsername}', '{deviceConsolePort}',
-        '{mac}', '{userIntID}', '{tenantID}'
-        )
-    RETURNING id
+    SELECT
+        "createAt", "deviceName", "deviceType", "productID",
+        "authType", "upLinkNetwork", "deviceID", "deviceUsername", "token",
+        "location", "latitude", "longitude",
+        "manufacturer", "serialNumber", "softVersion", "hardwareVersion",
+        "deviceConsoleIP", "deviceConsoleUsername", "deviceConsolePort",
+        "mac", "userIntID", "tenantID"
+    FROM import_devices
+    RETURNING id, "deviceID"
 )
 INSERT INTO end_devices(
         id, "upLinkSystem", gateway, "parentDevice",
         "loraData", "lwm2mData"
     )
-SELECT id, 
-      '{upLinkSystem}', '{gateway}', '{parentDevice}',
-      '{loraData}', '{lwm2mData}'
-FROM devices;
-"""
-
+SELECT devices.id, import_devices."upLinkSystem", import_devices.gateway,
+       import_devices."parentDevice", import_devices."loraData",
+       import_devices."lwm2mData"
+FROM devices
+    JOIN import_devices ON import_devices."deviceID" = devices."deviceID"
+""")
 
-query_devices_name_sql = """
+query_devices_name_sql = db.register_statement('query_devices_name', """
 SELECT "deviceName"
 FROM devices
-WHERE "deviceName" = ANY ('{{{devicesName}}}'::varchar[])
-    AND "tenantID"='{tenantID}';
-"""
+WHERE "deviceName" = ANY ($1::varchar[])
+    AND "tenantID" = $2;
+""")
 
-query_product_sql = """
+query_product_sql = db.register_statement('query_product', """
 SELECT "productName", "productID", "cloudProtocol"
 FROM products
     JOIN users ON products."userIntID" = users.id
-WHERE "productName" = ANY ('{{{productsName}}}'::varchar[])
-    AND users."tenantID" = '{tenantID}';
-"""
+WHERE "productName" = ANY ($1::varchar[])
+    AND users."tenantID" = $2;
+""")
 
-query_device_uid_sql = """
+query_device_uid_sql = db.register_statement('query_device_uid', """
 SELECT "deviceID"
 FROM devices
-WHERE "deviceID" = ANY ('{{{devicesID}}}'::varchar[])
-"""
+WHERE "deviceID" = ANY ($1::varchar[])
+""")
 
-query_gateway_sql = """
+query_gateway_sql = db.register_statement('query_gateway', """
 SELECT devices."deviceName", devices.id
 FROM devices
     JOIN gateways ON devices.id = gateways.id
-WHERE devices."deviceName" = ANY ('{{{gatewaysName}}}'::varchar[])
-    AND devices."tenantID" = '{tenantID}';
-"""
+WHERE devices."deviceName" = ANY ($1::varchar[])
+    AND devices."tenantID" = $2;
+""")
 
-query_tenant_devices_limit_sql = """
+query_tenant_devices_limit_sql = db.register_statement('query_tenant_devices_limit', """
 SELECT COUNT(devices.id), tenants."deviceCount"
 FROM devices
     JOIN tenants on tenants."tenantID" = devices."tenantID"
-WHERE tenants."tenantID" = '{tenantID}'
+WHERE tenants."tenantID" = $1
 GROUP BY tenants."deviceCount"
-"""
+""")
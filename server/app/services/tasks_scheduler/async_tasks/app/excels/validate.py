@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, List
 
 from marshmallow import Schema
@@ -6,6 +7,7 @@ from marshmallow.validate import OneOf
 from actor_libs.database.async_db import db
 from actor_libs.schemas.devices import BaseDeviceSchema
 from actor_libs.schemas.fields import EmqInteger, EmqString
+from actor_libs.tasks.exceptions import TaskException
 from .multi_language import Error, get_row_error_message
 from .sql_statements import (
     query_devices_name_sql, query_product_sql, query_device_uid_sql,
@@ -63,21 +65,17 @@ async def _validate_import_device_info(validated_records: List[Dict],
             rows_gateway[row] = record.get('gateway')
         if record.get('deviceID'):
             rows_device_uid[row] = record.get('deviceID')
-    errors_device_name = await _validate_devices_name(
-        rows_device_name, language, tenant_uid
-    )
+    # one bound array query for each check, run concurrently
+    errors_device_name, (errors_product, products_info), \
+        errors_device_uid, (errors_gateway, gateways_info) = await asyncio.gather(
+            _validate_devices_name(rows_device_name, language, tenant_uid),
+            _validate_products(rows_product, language, tenant_uid),
+            _validate_devices_uid(rows_device_uid, language),
+            _validate_gateway(rows_gateway, language, tenant_uid)
+        )
     rows_error_msg.update(errors_device_name)
-    errors_product, products_info = await _validate_products(
-        rows_product, language, tenant_uid
-    )
     rows_error_msg.update(errors_product)
-    errors_device_uid = await _validate_devices_uid(
-        rows_device_uid, language
-    )
     rows_error_msg.update(errors_device_uid)
-    errors_gateway, gateways_info = await _validate_gateway(
-        rows_gateway, language, tenant_uid
-    )
     rows_error_msg.update(errors_gateway)
     devices_attr_info = {
         'products_info': products_info,
@@ -92,7 +90,7 @@ async def _validate_devices_name(rows_device_name, language, tenant_uid):
     :param device_name: dict {row_id: deviceName}
     """
     rows_error_msg = {}
-    validate_names = []
+    validate_names = set()
     for row, device_name in rows_device_name.items():
         if device_name in validate_names:
             error_msg: str = get_row_error_message(
@@ -102,18 +100,16 @@ async def _validate_devices_name(rows_device_name, language, tenant_uid):
                 'deviceName': error_msg % device_name
             }
         else:
-            validate_names.append(device_name)
+            validate_names.add(device_name)
 
     if validate_names:
-        devices_name = ','.join(set(validate_names))
-        query_sql = query_devices_name_sql.format(
-            devicesName=devices_name, tenantID=tenant_uid
+        query_result = await _fetch_validate_rows(
+            query_devices_name_sql, list(validate_names), tenant_uid
         )
-        query_result = await db.fetch_many(query_sql)
         if not query_result:
             # no identical device name
             return rows_error_msg
-        query_names = [i[0] for i in query_result]
+        query_names = {i[0] for i in query_result}
         for row, device_name in rows_device_name.items():
             if rows_error_msg.get(row):
                 continue
@@ -135,11 +131,12 @@ async def _validate_products(rows_product, language, tenant_uid):
 
     rows_error_msg = {}
     products_info = {}
-    products_name = ','.join(set(rows_product.values()))
-    query_sql = query_product_sql.format(
-        productsName=products_name, tenantID=tenant_uid
+    if not rows_product:
+        return rows_error_msg, products_info
+    products_name = list(set(rows_product.values()))
+    query_result = await _fetch_validate_rows(
+        query_product_sql, products_name, tenant_uid
     )
-    query_result = await db.fetch_many(query_sql)
     # collect devices product info
     for record in query_result:
         products_info[record['productName']] = {
@@ -165,7 +162,7 @@ async def _validate_devices_uid(rows_device_uid, language):
     """
 
     rows_error_msg = {}
-    validate_devices_uid = []
+    validate_devices_uid = set()
     for row, device_uid in rows_device_uid.items():
         if device_uid in validate_devices_uid:
             error_msg: str = get_row_error_message(
@@ -175,13 +172,13 @@ async def _validate_devices_uid(rows_device_uid, language):
                 'deviceID': error_msg % device_uid
             }
         else:
-            validate_devices_uid.append(device_uid)
+            validate_devices_uid.add(device_uid)
 
     if validate_devices_uid:
-        devices_uid = ','.join(set(validate_devices_uid))
-        query_sql = query_device_uid_sql.format(devicesID=devices_uid)
-        query_result = await db.fetch_many(query_sql)
-        query_devices_uid = [i[0] for i in query_result]
+        query_result = await _fetch_validate_rows(
+            query_device_uid_sql, list(validate_devices_uid)
+        )
+        query_devices_uid = {i[0] for i in query_result}
         for row, device_uid in rows_device_uid.items():
             if rows_error_msg.get(row):
                 continue
@@ -203,12 +200,10 @@ async def _validate_gateway(rows_gateway, language, tenant_uid):
     rows_error_msg = {}
     if not rows_gateway:
         return rows_error_msg, {}
-    gateways_name = ','.join(set(rows_gateway.values()))
-    query_sql = query_gateway_sql.format(
-        gatewaysName=gateways_name,
-        tenantID=tenant_uid
+    gateways_name = list(set(rows_gateway.values()))
+    query_result = await _fetch_validate_rows(
+        query_gateway_sql, gateways_name, tenant_uid
     )
-    query_result = await db.fetch_many(query_sql)
     gateways_info = dict(query_result)
     for row, gateway_name in rows_gateway.items():
         if not gateways_info.get(gateway_name):
@@ -219,3 +214,12 @@ async def _validate_gateway(rows_gateway, language, tenant_uid):
                 'gateway': error_msg % gateway_name
             }
     return rows_error_msg, gateways_info
+
+
+async def _fetch_validate_rows(sql, *args) -> List:
+    """ Failed query is not an empty result, fail the import task """
+
+    query_result = await db.fetch_many(sql, *args)
+    if query_result is None:
+        raise TaskException(code=500, error_code='ABNORMAL')
+    return query_result
@@ -3,8 +3,10 @@ from typing import Callable, Any, Dict
 from starlette.background import BackgroundTask
 from starlette.requests import Request
 
+from actor_libs.http_tools import AsyncHttp
 from actor_libs.types.exceptions import ExceptionT
 from actor_libs.utils import generate_uuid
+from .config import project_config
 
 
 CODE_ERROR_DICT = {
@@ -23,6 +25,16 @@ CODE_MESSAGE_DICT = {
 }
 
 
+# emqx rest api client, opened on app startup and reused by every emqx call
+emqx_http = AsyncHttp(
+    auth=project_config['EMQX_AUTH'], lazy=True,
+    limit=project_config.get('EMQX_HTTP_LIMIT', 100),
+    limit_per_host=project_config.get('EMQX_HTTP_LIMIT_PER_HOST', 50),
+    timeout=project_config.get('EMQX_HTTP_TIMEOUT', 3),
+    retries=project_config.get('EMQX_HTTP_RETRIES', 0)
+)
+
+
 class ActorBackgroundTask(BackgroundTask):
     taskID = generate_uuid()
 
@@ -3,13 +3,17 @@ from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from actor_libs.cache import dict_code_cache, product_meta_cache
 from actor_libs.database.async_db import db
 from actor_libs.tasks.backend import store_task
 from .config import project_config
-from .emqx import device_publish_task, device_auth, backend_callback
+from .emqx import (
+    device_publish_task, devices_publish_batch_task, device_auth, backend_callback,
+    invalidate_device_auth, connect_buffer, subscribe_queue
+)
 from .excels import devices_export_task, devices_import_task
 from .extra import (
-    ActorBackgroundTask, HttpException,
+    ActorBackgroundTask, HttpException, emqx_http,
     validate_request_json, validate_request_form
 )
 
@@ -27,13 +31,31 @@ async def open_database_connection_poll():
         min_size=5, max_size=10
     )
     await db.open(_pool)
+    dict_code_cache.check_interval = project_config.get('DICT_CODE_CHECK_INTERVAL', 10)
+    product_meta_cache.maxsize = project_config.get('PRODUCT_META_CACHE_SIZE', 1000)
+    product_meta_cache.ttl = project_config.get('PRODUCT_META_CACHE_TTL', 300)
+    await dict_code_cache.refresh_async()
+    connect_buffer.start()
+    subscribe_queue.start()
+
+
+@app.on_event('startup')
+async def open_http_client():
+    await emqx_http.open()
 
 
 @app.on_event('shutdown')
 async def close_database_connection_poll():
+    await subscribe_queue.stop()
+    await connect_buffer.stop()
     await db.close()
 
 
+@app.on_event('shutdown')
+async def close_http_client():
+    await emqx_http.close()
+
+
 @app.exception_handler(HttpException)
 async def http_exception(request: Request, exc: HttpException):
     _json = {
@@ -77,6 +99,16 @@ async def device_publish_view(request):
     return JSONResponse(result)
 
 
+@app.route('/api/v1/device_publish/batch', methods=['POST'])
+async def devices_publish_batch_view(request):
+    request_dict = await validate_request_json(request)
+    requests_list = request_dict.get('publishes')
+    if not isinstance(requests_list, list):
+        raise HttpException(code=400, field='publishes')
+    results = await devices_publish_batch_task(requests_list)
+    return JSONResponse({'results': results})
+
+
 @app.route('/api/v1/emqx/auth', methods=['POST'])
 async def device_auth_view(request):
     request_dict = await validate_request_form(request)
@@ -89,3 +121,20 @@ async def backend_callback_view(request):
     request_dict = await validate_request_json(request)
     result, code = await backend_callback(request_dict)
     return JSONResponse(result, status_code=code)
+
+
+@app.route('/api/v1/emqx/auth_cache', methods=['DELETE'])
+async def device_auth_cache_view(request):
+    request_dict = await validate_request_json(request)
+    devices_uid = request_dict.get('devices')
+    if not isinstance(devices_uid, list):
+        raise HttpException(code=400, field='devices')
+    invalidate_device_auth(devices_uid)
+    return JSONResponse({'status': 200})
+
+
+@app.route('/api/v1/statements_stats', methods=['GET'])
+async def statements_stats_view(request):
+    """ Latency stats of registered SQL statements """
+
+    return JSONResponse(db.statements_stats())
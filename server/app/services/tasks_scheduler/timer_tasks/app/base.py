@@ -1,32 +1,38 @@
-import asyncpg
-
+from actor_libs.cache import dict_code_cache, product_meta_cache
 from actor_libs.database.async_db import db
 from actor_libs.tasks.timer import App
 from .api_count import api_count_task
 from .config import project_config
 from .device_count import device_count_task
-from .device_events import device_events_aggr_task
+from .device_events import device_events_rollup_task, device_events_aggr_task
 from .emqx_bills import emqx_bills_aggr_task
+from .extra import publish_batch_http, create_postgres_pool
 from .timer_publish import timer_publish_task
 
 
 __all__ = ['app']
 
 
-app = App(node_id='timer_task')
+app = App(
+    node_id='timer_task',
+    heartbeat_interval=project_config.get('TIMER_NODE_HEARTBEAT_INTERVAL', 10),
+    node_ttl=project_config.get('TIMER_NODE_TTL', 30)
+)
 
 
 @app.on_event('startup')
 async def open_database_connection_poll():
-    _pool = await asyncpg.create_pool(
-        host=project_config.get('POSTGRES_HOST', 'localhost'),
-        port=project_config.get('POSTGRES_PORT', 5432),
-        user=project_config.get('POSTGRES_USER', 'actorcloud'),
-        password=project_config.get('POSTGRES_PASSWORD', 'public'),
-        database=project_config.get('POSTGRES_DATABASE', 'actorcloud'),
-        min_size=5, max_size=10
-    )
+    _pool = await create_postgres_pool(min_size=5, max_size=10)
     await db.open(_pool)
+    dict_code_cache.check_interval = project_config.get('DICT_CODE_CHECK_INTERVAL', 10)
+    product_meta_cache.maxsize = project_config.get('PRODUCT_META_CACHE_SIZE', 1000)
+    product_meta_cache.ttl = project_config.get('PRODUCT_META_CACHE_TTL', 300)
+    await dict_code_cache.refresh_async()
+
+
+@app.on_event('startup')
+async def open_http_client():
+    await publish_batch_http.open()
 
 
 @app.on_event('shutdown')
@@ -34,6 +40,11 @@ async def close_database_connection_poll():
     await db.close()
 
 
+@app.on_event('shutdown')
+async def close_http_client():
+    await publish_batch_http.close()
+
+
 @app.crontab(cron_format='2 * * * *', timezone=project_config['TIMEZONE'])
 @app.task_backend
 async def device_count():
@@ -58,15 +69,21 @@ async def emqx_bills_aggr():
     return task_result
 
 
-@app.crontab(cron_format='7 * * * *', timezone=project_config['TIMEZONE'])
+@app.timer(interval=project_config.get('DEVICE_EVENTS_ROLLUP_INTERVAL', 300))
+async def device_event_rollup():
+    """  Aggregate new device events to hour rollup every 5 minutes """
+    await device_events_rollup_task()
+
+
+@app.crontab(cron_format='7 0 * * *', timezone=project_config['TIMEZONE'])
 @app.task_backend
 async def device_event_aggr():
-    """  Aggregate device events at seven minute of every hour """
+    """  Aggregate device events of day and month at 00:07 every day """
     task_result = await device_events_aggr_task()
     return task_result
 
 
 @app.timer(interval=60)
 async def timer_publish():
-    """  Check for timer tasks every 59 seconds  """
-    await timer_publish_task()
+    """  Check for timer tasks of this node partition every 59 seconds  """
+    await timer_publish_task(*app.coordinator.partition)
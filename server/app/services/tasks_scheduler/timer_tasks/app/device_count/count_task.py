@@ -3,7 +3,7 @@ import arrow
 from actor_libs.database.async_db import db
 from actor_libs.tasks.backend import get_task_result
 from actor_libs.types import TaskResult
-from .sql_statements import devices_count_sql
+from .sql_statements import devices_count_sql, devices_status_count_sql
 from ..config import project_config
 
 
@@ -32,8 +32,15 @@ async def device_count_task() -> TaskResult:
     return task_result
 
 
+def _get_count_sql() -> str:
+    if project_config.get('CONTINUOUS_AGGREGATE'):
+        # count of status instead of scanning devices
+        return devices_status_count_sql
+    return devices_count_sql
+
+
 async def _hour_device_count() -> bool:
-    hour_aggr_sql = devices_count_sql.format(
+    hour_aggr_sql = _get_count_sql().format(
         table='device_count_hour', time_unit='hour'
     )
     execute_result = await db.execute(hour_aggr_sql)
@@ -41,7 +48,7 @@ async def _hour_device_count() -> bool:
 
 
 async def _day_device_count() -> bool:
-    day_aggr_sql = devices_count_sql.format(
+    day_aggr_sql = _get_count_sql().format(
         table='device_count_day', time_unit='day'
     )
     execute_result = await db.execute(day_aggr_sql)
@@ -49,7 +56,7 @@ async def _day_device_count() -> bool:
 
 
 async def _month_device_count() -> bool:
-    month_aggr_sql = devices_count_sql.format(
+    month_aggr_sql = _get_count_sql().format(
         table='device_count_month', time_unit='month'
     )
     execute_status = await db.execute(month_aggr_sql)
@@ -7,12 +7,32 @@ SELECT current_timestamp                                        AS "createAt",
                   current_timestamp - INTERVAL '1 {time_unit}') AS "countTime",
        devices."tenantID",
        COUNT(*)                                                 AS "deviceCount",
-       COUNT(
-           CASE WHEN "deviceStatus" = 0 THEN 1 ELSE NULL END)   AS "deviceOfflineCount",
        COUNT(
            CASE WHEN "deviceStatus" = 1 THEN 1 ELSE NULL END)   AS "deviceOnlineCount",
+       COUNT(
+           CASE WHEN "deviceStatus" = 0 THEN 1 ELSE NULL END)   AS "deviceOfflineCount",
        COUNT(
            CASE WHEN "deviceStatus" = 2 THEN 1 ELSE NULL END)   AS "deviceSleepCount"
 FROM devices
 GROUP BY devices."tenantID"
 """
+
+# continuous aggregate mode, counts of status are maintained by devices triggers
+devices_status_count_sql = """
+INSERT INTO {table}("createAt", "countTime", "tenantID",
+                    "deviceCount", "deviceOnlineCount",
+                    "deviceOfflineCount", "deviceSleepCount")
+SELECT current_timestamp                                        AS "createAt",
+       date_trunc('{time_unit}',
+                  current_timestamp - INTERVAL '1 {time_unit}') AS "countTime",
+       "tenantID",
+       SUM("deviceCount")                                       AS "deviceCount",
+       SUM(CASE WHEN "deviceStatus" = 1
+                THEN "deviceCount" ELSE 0 END)                  AS "deviceOnlineCount",
+       SUM(CASE WHEN "deviceStatus" = 0
+                THEN "deviceCount" ELSE 0 END)                  AS "deviceOfflineCount",
+       SUM(CASE WHEN "deviceStatus" = 2
+                THEN "deviceCount" ELSE 0 END)                  AS "deviceSleepCount"
+FROM device_status_counts
+GROUP BY "tenantID"
+"""
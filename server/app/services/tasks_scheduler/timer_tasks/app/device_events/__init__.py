@@ -1,4 +1,4 @@
-from .aggr_task import device_events_aggr_task
+from .aggr_task import device_events_rollup_task, device_events_aggr_task
 
 
-__all__ = ['device_events_aggr_task']
+__all__ = ['device_events_rollup_task', 'device_events_aggr_task']
@@ -1,31 +1,64 @@
+import logging
+from datetime import timedelta
+
 import arrow
 from actor_libs.tasks.backend import get_task_result
 
 from actor_libs.database.async_db import db
 from actor_libs.types import TaskResult
 from .sql_statement import (
-    device_events_hour_aggr_sql, device_events_day_aggr_sql,
-    device_events_month_aggr_sql
+    cast_to_numeric_sql, device_events_hour_aggr_sql, device_events_hour_rolled_up_sql,
+    device_events_day_aggr_sql, device_events_month_aggr_sql
 )
 from ..config import project_config
+from ..rollup import IncrementalRollup
+
+
+__all__ = ['device_events_rollup_task', 'device_events_aggr_task']
+
+
+logger = logging.getLogger(__name__)
+
+
+device_events_hour_rollup = IncrementalRollup(
+    'device_events_hour', device_events_hour_aggr_sql,
+    slice_interval=timedelta(
+        seconds=project_config.get('DEVICE_EVENTS_ROLLUP_SLICE', 600)
+    ),
+    lag=timedelta(seconds=project_config.get('DEVICE_EVENTS_ROLLUP_LAG', 60)),
+    rolled_up_sql=device_events_hour_rolled_up_sql
+)
 
+_cast_function_created = False
 
-__all__ = ['device_events_aggr_task']
+
+async def device_events_rollup_task() -> bool:
+    """ Aggregate device events after the watermark to device_events_hour """
+
+    global _cast_function_created
+
+    if not _cast_function_created:
+        _cast_function_created = await db.execute(cast_to_numeric_sql)
+    try:
+        rollup_result = await device_events_hour_rollup.run()
+    except Exception as error:
+        logger.error(f"device_events_hour rollup: {error}")
+        return False
+    logger.debug(rollup_result)
+    return True
 
 
 async def device_events_aggr_task() -> TaskResult:
-    aggr_result = {}
-    aggr_device_events_hour = await db.execute(
-        device_events_hour_aggr_sql
-    )
-    aggr_result['device_events_hour'] = aggr_device_events_hour
+    """ Aggregate the previous day, and the previous month on the first day """
 
+    aggr_result = {}
     date_now = arrow.now(tz=project_config['TIMEZONE'])
-    if date_now.hour == 0:
-        aggr_result['device_events_day'] = await db.execute(
-            device_events_day_aggr_sql
-        )
-    if date_now.day == 1 and date_now.hour == 0:
+    # catch up hour rollup before aggregate the previous day
+    aggr_result['device_events_hour'] = await device_events_rollup_task()
+    aggr_result['device_events_day'] = await db.execute(
+        device_events_day_aggr_sql
+    )
+    if date_now.day == 1:
         aggr_result['device_events_month'] = await db.execute(
             device_events_month_aggr_sql
         )
@@ -1,4 +1,7 @@
-device_events_hour_aggr_sql = """
+from actor_libs.database.async_db import db
+
+
+cast_to_numeric_sql = """
 create or replace function cast_to_numeric(jsonb) returns numeric as $$
 begin
     return Coalesce($1->>'value', $1::text)::numeric;
@@ -6,8 +9,11 @@ exception when invalid_text_representation then
     return NULL;
 end;
 $$ language plpgsql immutable;
+"""
 
-
+# $1, $2: device_events msgTime range [$1, $2), merge partial aggregates of late events,
+# count is the number of numeric values, the denominator of avgValue
+device_events_hour_aggr_sql = db.register_statement('device_events_hour_aggr', """
 INSERT INTO device_events_hour("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
                                count, "minValue", "maxValue", "avgValue", "sumValue")
 SELECT
@@ -17,7 +23,7 @@ SELECT
     ) AS "countTime",
     device_events."tenantID", device_events."deviceID",
     device_events."streamID", key AS "dataPointID",
-    count(*) as count,
+    count(cast_to_numeric(value)) as count,
     min(cast_to_numeric(value)) AS "minValue",
     max(cast_to_numeric(value)) AS "maxValue",
     avg(cast_to_numeric(value)) AS "avgValue",
@@ -26,14 +32,28 @@ FROM
     device_events, jsonb_each(device_events.data)
 WHERE
     device_events."dataType" = 1
-    AND device_events."msgTime" >= date_trunc('hour', current_timestamp) - interval '1 hour'
-    AND device_events."msgTime" < date_trunc('hour', current_timestamp)
+    AND device_events."msgTime" >= $1
+    AND device_events."msgTime" < $2
 GROUP BY
     "countTime", "tenantID", "deviceID", "streamID", "dataPointID"
-ON CONFLICT DO NOTHING
-"""
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID")
+DO UPDATE SET
+    count = device_events_hour.count + excluded.count,
+    "minValue" = LEAST(device_events_hour."minValue", excluded."minValue"),
+    "maxValue" = GREATEST(device_events_hour."maxValue", excluded."maxValue"),
+    "sumValue" = COALESCE(device_events_hour."sumValue" + excluded."sumValue",
+                          device_events_hour."sumValue", excluded."sumValue"),
+    "avgValue" = COALESCE(device_events_hour."sumValue" + excluded."sumValue",
+                          device_events_hour."sumValue", excluded."sumValue")
+                 / NULLIF(device_events_hour.count + excluded.count, 0)
+""")
+
+# $1: hour, true if device_events_hour has buckets from the hour
+device_events_hour_rolled_up_sql = db.register_statement('device_events_hour_rolled_up', """
+SELECT EXISTS(SELECT 1 FROM device_events_hour WHERE "countTime" >= $1)
+""")
 
-device_events_day_aggr_sql = """
+device_events_day_aggr_sql = db.register_statement('device_events_day_aggr', """
 INSERT INTO device_events_day("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
                               "minValue", "maxValue", "avgValue", "sumValue")
 SELECT
@@ -41,7 +61,7 @@ SELECT
     "tenantID", "deviceID", "streamID", "dataPointID",
     min("minValue") AS "minValue",
     max("maxValue") AS "maxValue",
-    sum("sumValue") / sum(count) AS "avgValue",
+    sum("sumValue") / NULLIF(sum(count), 0) AS "avgValue",
     sum("sumValue") AS "sumValue"
 FROM
     device_events_hour
@@ -50,10 +70,15 @@ WHERE
     AND "countTime" < CURRENT_DATE
 GROUP BY
     "countDay", "tenantID", "deviceID", "streamID", "dataPointID"
-ON CONFLICT DO NOTHING
-"""
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID")
+DO UPDATE SET
+    "minValue" = excluded."minValue",
+    "maxValue" = excluded."maxValue",
+    "avgValue" = excluded."avgValue",
+    "sumValue" = excluded."sumValue"
+""")
 
-device_events_month_aggr_sql = """
+device_events_month_aggr_sql = db.register_statement('device_events_month_aggr', """
 INSERT INTO device_events_month("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
                                 "minValue", "maxValue", "avgValue", "sumValue")
 SELECT
@@ -61,7 +86,7 @@ SELECT
     "tenantID", "deviceID", "streamID", "dataPointID",
     min("minValue") AS "minValue",
     max("maxValue") AS "maxValue",
-    sum("sumValue") / sum(count) AS "avgValue",
+    sum("sumValue") / NULLIF(sum(count), 0) AS "avgValue",
     sum("sumValue") AS "sumValue"
 FROM
     device_events_hour
@@ -70,5 +95,10 @@ WHERE
     AND "countTime" < date_trunc('month', CURRENT_DATE)
 GROUP BY
     "countMonth", "tenantID", "deviceID", "streamID", "dataPointID"
-ON CONFLICT DO NOTHING
-"""
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID")
+DO UPDATE SET
+    "minValue" = excluded."minValue",
+    "maxValue" = excluded."maxValue",
+    "avgValue" = excluded."avgValue",
+    "sumValue" = excluded."sumValue"
+""")
@@ -14,6 +14,11 @@ __all__ = ['emqx_bills_aggr_task']
 
 
 async def emqx_bills_aggr_task() -> TaskResult:
+    if project_config.get('CONTINUOUS_AGGREGATE'):
+        # emqx_bills_hour_cagg is refreshed by timescaledb
+        return get_task_result(
+            status=3, message='Emqx bills continuous aggregate', result={}
+        )
     aggr_result = {}
     date_now = arrow.now(tz=project_config['TIMEZONE'])
 
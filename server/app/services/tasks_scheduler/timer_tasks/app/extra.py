@@ -0,0 +1,32 @@
+import asyncpg
+
+from actor_libs.http_tools import AsyncHttp
+from .config import project_config
+
+
+__all__ = ['publish_batch_http', 'create_postgres_pool']
+
+
+# batch publish client of async tasks service, opened on app startup.
+# A batch fans out up to PUBLISH_BATCH_SIZE emqx publishes, so the timeout
+# is sized for the whole batch and a batch is never retried (not idempotent)
+publish_batch_http = AsyncHttp(
+    lazy=True,
+    limit=project_config.get('PUBLISH_BATCH_HTTP_LIMIT', 100),
+    timeout=project_config.get('PUBLISH_BATCH_HTTP_TIMEOUT', 60),
+    retries=0
+)
+
+
+async def create_postgres_pool(min_size: int = 5, max_size: int = 10):
+    """ Connection pool of timer tasks database """
+
+    pool = await asyncpg.create_pool(
+        host=project_config.get('POSTGRES_HOST', 'localhost'),
+        port=project_config.get('POSTGRES_PORT', 5432),
+        user=project_config.get('POSTGRES_USER', 'actorcloud'),
+        password=project_config.get('POSTGRES_PASSWORD', 'public'),
+        database=project_config.get('POSTGRES_DATABASE', 'actorcloud'),
+        min_size=min_size, max_size=max_size
+    )
+    return pool
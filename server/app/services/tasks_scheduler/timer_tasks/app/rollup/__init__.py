@@ -0,0 +1,5 @@
+from .backfill import ROLLUP_BACKFILLS, ROLLUP_GROUPS, backfill_rollups
+from .watermark import IncrementalRollup
+
+
+__all__ = ['IncrementalRollup', 'ROLLUP_BACKFILLS', 'ROLLUP_GROUPS', 'backfill_rollups']
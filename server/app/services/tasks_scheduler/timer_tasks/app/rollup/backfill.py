@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+import arrow
+
+from actor_libs.database.async_db import db, Statement
+from .sql_statements import (
+    query_watermark_sql,
+    api_count_hour_backfill_sql, api_count_day_backfill_sql, api_count_month_backfill_sql,
+    emqx_bills_hour_backfill_sql, emqx_bills_day_backfill_sql, emqx_bills_month_backfill_sql,
+    device_events_hour_backfill_sql, device_events_day_backfill_sql,
+    device_events_month_backfill_sql
+)
+
+
+__all__ = ['ROLLUP_BACKFILLS', 'ROLLUP_GROUPS', 'backfill_rollups']
+
+
+logger = logging.getLogger(__name__)
+
+
+class RollupBackfill(NamedTuple):
+    table: str  # rollup table
+    unit: str  # bucket unit of rollup table
+    chunk_unit: str  # range of one backfill statement
+    backfill_sql: Statement
+    # rows after the watermark belong to the incremental rollup,
+    # backfill_sql takes the source upper bound as $3
+    watermark: bool = False
+
+
+# device_count is a snapshot of current devices, which can't be rebuilt for the past
+ROLLUP_BACKFILLS = {
+    'api_count_hour': RollupBackfill(
+        'app_api_logs_hour', 'hour', 'day', api_count_hour_backfill_sql
+    ),
+    'api_count_day': RollupBackfill(
+        'app_api_logs_day', 'day', 'month', api_count_day_backfill_sql
+    ),
+    'api_count_month': RollupBackfill(
+        'app_api_logs_month', 'month', 'year', api_count_month_backfill_sql
+    ),
+    'emqx_bills_hour': RollupBackfill(
+        'emqx_bills_hour', 'hour', 'day', emqx_bills_hour_backfill_sql
+    ),
+    'emqx_bills_day': RollupBackfill(
+        'emqx_bills_day', 'day', 'month', emqx_bills_day_backfill_sql
+    ),
+    'emqx_bills_month': RollupBackfill(
+        'emqx_bills_month', 'month', 'year', emqx_bills_month_backfill_sql
+    ),
+    'device_events_hour': RollupBackfill(
+        'device_events_hour', 'hour', 'day', device_events_hour_backfill_sql,
+        watermark=True
+    ),
+    'device_events_day': RollupBackfill(
+        'device_events_day', 'day', 'month', device_events_day_backfill_sql
+    ),
+    'device_events_month': RollupBackfill(
+        'device_events_month', 'month', 'year', device_events_month_backfill_sql
+    ),
+}
+
+# group name -> rollups in dependency order
+ROLLUP_GROUPS = {
+    group_name: [f'{group_name}_{unit}' for unit in ('hour', 'day', 'month')]
+    for group_name in ('api_count', 'emqx_bills', 'device_events')
+}
+
+
+async def backfill_rollups(rollups_name: List[str], start_time: datetime,
+                           end_time: datetime, concurrency: int = 4,
+                           replay: bool = False) -> Dict:
+    """
+    Aggregate the missing buckets of rollups in [start_time, end_time),
+    rollups are run in order, chunks of a rollup are run concurrently.
+    :param rollups_name: rollup or group name, eg: api_count, emqx_bills_day
+    :param replay: delete and aggregate again the existing buckets
+    :return: {rollup: {'chunks': n, 'failed': [chunk start]}}
+    """
+
+    backfill_names = []
+    for rollup_name in rollups_name:
+        for backfill_name in ROLLUP_GROUPS.get(rollup_name, [rollup_name]):
+            if backfill_name not in ROLLUP_BACKFILLS:
+                raise ValueError(f"rollup {backfill_name} can't be backfilled")
+            if backfill_name not in backfill_names:
+                backfill_names.append(backfill_name)
+    if any(name.startswith('device_events') for name in backfill_names):
+        from ..device_events.sql_statement import cast_to_numeric_sql
+        await db.execute(cast_to_numeric_sql)
+    semaphore = asyncio.Semaphore(concurrency)
+    backfill_result = {}
+    for backfill_name in backfill_names:
+        rollup_backfill = ROLLUP_BACKFILLS[backfill_name]
+        rollup_end, watermark = end_time, None
+        if rollup_backfill.watermark:
+            watermark = await db.fetch_val(query_watermark_sql, backfill_name)
+            if watermark:
+                rollup_end = min(rollup_end, watermark)
+        chunks = _split_range(
+            start_time, rollup_end, rollup_backfill.unit, rollup_backfill.chunk_unit
+        )
+        chunks_status = await asyncio.gather(*[
+            _backfill_chunk(
+                semaphore, rollup_backfill, chunk_start, chunk_end, replay, watermark
+            )
+            for chunk_start, chunk_end in chunks
+        ])
+        failed_chunks = [
+            str(chunk_start)
+            for (chunk_start, _), status in zip(chunks, chunks_status) if not status
+        ]
+        backfill_result[backfill_name] = {'chunks': len(chunks), 'failed': failed_chunks}
+        logger.info(f"{backfill_name} backfill: {backfill_result[backfill_name]}")
+    return backfill_result
+
+
+async def _backfill_chunk(semaphore: asyncio.Semaphore, rollup_backfill: RollupBackfill,
+                          chunk_start: datetime, chunk_end: datetime,
+                          replay: bool, watermark: datetime = None) -> bool:
+    backfill_args = [chunk_start, chunk_end]
+    if rollup_backfill.watermark:
+        source_end = chunk_end + timedelta(days=1)
+        backfill_args.append(min(source_end, watermark) if watermark else source_end)
+    async with semaphore:
+        try:
+            async with db.pool.acquire() as conn:
+                async with conn.transaction():
+                    if replay:
+                        # buckets are rebuilt from the same range they are deleted
+                        await db.conn_execute(
+                            conn,
+                            f'DELETE FROM {rollup_backfill.table} '
+                            f'WHERE "countTime" >= $1 AND "countTime" < $2',
+                            chunk_start, chunk_end
+                        )
+                    await db.conn_execute(
+                        conn, rollup_backfill.backfill_sql, *backfill_args
+                    )
+        except Exception as error:
+            logger.error(
+                f"{rollup_backfill.table} backfill [{chunk_start}, {chunk_end}): {error}"
+            )
+            return False
+    return True
+
+
+def _split_range(start_time: datetime, end_time: datetime,
+                 unit: str, chunk_unit: str) -> List[Tuple[datetime, datetime]]:
+    """ Align the range to whole buckets of unit and split it into chunks of chunk_unit """
+
+    range_start = arrow.get(start_time).floor(unit)
+    range_end = arrow.get(end_time).floor(unit)
+    if range_end < arrow.get(end_time):
+        range_end = range_end.shift(**{f'{unit}s': 1})
+    chunks = []
+    chunk_start = range_start
+    while chunk_start < range_end:
+        chunk_end = min(chunk_start.floor(chunk_unit).shift(**{f'{chunk_unit}s': 1}), range_end)
+        chunks.append((chunk_start.naive, chunk_end.naive))
+        chunk_start = chunk_end
+    return chunks
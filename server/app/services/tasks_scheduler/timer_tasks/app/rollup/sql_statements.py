@@ -0,0 +1,249 @@
+from actor_libs.database.async_db import db
+
+
+# $1: rollupName, $2: initial watermark
+init_watermark_sql = db.register_statement('init_watermark', """
+INSERT INTO rollup_watermarks("rollupName", watermark, "updateAt")
+VALUES ($1, $2, localtimestamp)
+ON CONFLICT ("rollupName") DO NOTHING
+""")
+
+# lock the watermark row, rollups of the same table are serialized
+lock_watermark_sql = db.register_statement('lock_watermark', """
+SELECT watermark
+FROM rollup_watermarks
+WHERE "rollupName" = $1
+FOR UPDATE
+""")
+
+update_watermark_sql = db.register_statement('update_watermark', """
+UPDATE rollup_watermarks
+SET watermark = $2, "updateAt" = localtimestamp
+WHERE "rollupName" = $1
+""")
+
+query_localtimestamp_sql = db.register_statement('query_localtimestamp', """
+SELECT localtimestamp
+""")
+
+query_watermark_sql = db.register_statement('query_watermark', """
+SELECT watermark
+FROM rollup_watermarks
+WHERE "rollupName" = $1
+""")
+
+
+# Backfill statements, $1, $2: bucket range [$1, $2) aligned to the rollup unit.
+# Every bucket of the range is aggregated by one statement, source rows are
+# selected by the same time column as the bucket, so chunks never share a bucket.
+# Buckets which already exist in the rollup table (same tenant, msgType, device..)
+# are skipped, by ON CONFLICT on tables with a primary key, else by NOT EXISTS.
+
+api_count_hour_backfill_sql = db.register_statement('api_count_hour_backfill', """
+INSERT INTO app_api_logs_hour("createAt", "countTime", "apiCount", "tenantID")
+SELECT current_timestamp, aggr."countTime", aggr."apiCount", aggr."tenantID"
+FROM (
+    SELECT date_trunc('hour', "createAt") AS "countTime",
+           COUNT(*)                       AS "apiCount",
+           "tenantID"
+    FROM app_api_logs
+    WHERE "createAt" >= $1
+      AND "createAt" < $2
+    GROUP BY 1, "tenantID"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM app_api_logs_hour
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" IS NOT DISTINCT FROM aggr."tenantID"
+)
+""")
+
+api_count_day_backfill_sql = db.register_statement('api_count_day_backfill', """
+INSERT INTO app_api_logs_day("createAt", "countTime", "apiCount", "tenantID")
+SELECT current_timestamp, aggr."countTime", aggr."apiCount", aggr."tenantID"
+FROM (
+    SELECT date_trunc('day', "countTime") AS "countTime",
+           SUM("apiCount")                AS "apiCount",
+           "tenantID"
+    FROM app_api_logs_hour
+    WHERE "countTime" >= $1
+      AND "countTime" < $2
+    GROUP BY 1, "tenantID"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM app_api_logs_day
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" IS NOT DISTINCT FROM aggr."tenantID"
+)
+""")
+
+api_count_month_backfill_sql = db.register_statement('api_count_month_backfill', """
+INSERT INTO app_api_logs_month("createAt", "countTime", "apiCount", "tenantID")
+SELECT current_timestamp, aggr."countTime", aggr."apiCount", aggr."tenantID"
+FROM (
+    SELECT date_trunc('month', "countTime") AS "countTime",
+           SUM("apiCount")                  AS "apiCount",
+           "tenantID"
+    FROM app_api_logs_day
+    WHERE "countTime" >= $1
+      AND "countTime" < $2
+    GROUP BY 1, "tenantID"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM app_api_logs_month
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" IS NOT DISTINCT FROM aggr."tenantID"
+)
+""")
+
+emqx_bills_hour_backfill_sql = db.register_statement('emqx_bills_hour_backfill', """
+INSERT INTO emqx_bills_hour("countTime", "msgType", "msgCount", "msgSize", "tenantID")
+SELECT aggr."countTime", aggr."msgType", aggr."msgCount", aggr."msgSize", aggr."tenantID"
+FROM (
+    SELECT date_trunc('hour', emqx_bills."msgTime") AS "countTime",
+           emqx_bills."msgType"                     AS "msgType",
+           COUNT(*)                                 AS "msgCount",
+           SUM(emqx_bills."msgSize")                AS "msgSize",
+           emqx_bills."tenantID"
+    FROM emqx_bills
+           JOIN tenants ON tenants."tenantID" = emqx_bills."tenantID"
+    WHERE emqx_bills."msgTime" >= $1
+      AND emqx_bills."msgTime" < $2
+      AND tenants.enable = 1
+    GROUP BY 1, emqx_bills."tenantID", emqx_bills."msgType"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM emqx_bills_hour
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" = aggr."tenantID"
+      AND "msgType" = aggr."msgType"
+)
+""")
+
+emqx_bills_day_backfill_sql = db.register_statement('emqx_bills_day_backfill', """
+INSERT INTO emqx_bills_day("createAt", "countTime", "msgType", "msgCount", "msgSize", "tenantID")
+SELECT current_timestamp, aggr."countTime", aggr."msgType",
+       aggr."msgCount", aggr."msgSize", aggr."tenantID"
+FROM (
+    SELECT date_trunc('day', "countTime") AS "countTime",
+           "msgType",
+           SUM("msgCount")                AS "msgCount",
+           SUM("msgSize")                 AS "msgSize",
+           "tenantID"
+    FROM emqx_bills_hour
+    WHERE "countTime" >= $1
+      AND "countTime" < $2
+    GROUP BY 1, "tenantID", "msgType"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM emqx_bills_day
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" = aggr."tenantID"
+      AND "msgType" = aggr."msgType"
+)
+""")
+
+# countTime of a month is its last day, the same as emqx_bills_month_aggr_sql
+emqx_bills_month_backfill_sql = db.register_statement('emqx_bills_month_backfill', """
+INSERT INTO emqx_bills_month("createAt", "countTime", "msgType", "msgCount", "msgSize", "tenantID")
+SELECT current_timestamp, aggr."countTime", aggr."msgType",
+       aggr."msgCount", aggr."msgSize", aggr."tenantID"
+FROM (
+    SELECT date_trunc('month', "countTime") + INTERVAL '1 month' - INTERVAL '1 day'
+                                     AS "countTime",
+           "msgType",
+           SUM("msgCount")           AS "msgCount",
+           SUM("msgSize")            AS "msgSize",
+           "tenantID"
+    FROM emqx_bills_day
+    WHERE "countTime" >= $1
+      AND "countTime" < $2
+    GROUP BY 1, "tenantID", "msgType"
+) aggr
+WHERE NOT EXISTS (
+    SELECT 1 FROM emqx_bills_month
+    WHERE "countTime" = aggr."countTime"
+      AND "tenantID" = aggr."tenantID"
+      AND "msgType" = aggr."msgType"
+)
+""")
+
+# events are bucketed by data time as the incremental rollup, and selected by
+# data time in [$1, $2). msgTime is only bounded to use its index:
+# [$1 - 1 day, $3), $3 is the rollup watermark or $2 + 1 day,
+# events whose data time is more than a day away from msgTime are not backfilled
+device_events_hour_backfill_sql = db.register_statement('device_events_hour_backfill', """
+INSERT INTO device_events_hour("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
+                               count, "minValue", "maxValue", "avgValue", "sumValue")
+SELECT *
+FROM (
+    SELECT
+        time_bucket('1 hours', events."dataTime") AS "countTime",
+        events."tenantID", events."deviceID", events."streamID", events."dataPointID",
+        count(events."numericValue") as count,
+        min(events."numericValue") AS "minValue",
+        max(events."numericValue") AS "maxValue",
+        avg(events."numericValue") AS "avgValue",
+        sum(events."numericValue") AS "sumValue"
+    FROM (
+        SELECT
+            Coalesce(to_timestamp((value->>'time')::float)::timestamp without time zone,
+                     device_events."msgTime") AS "dataTime",
+            device_events."tenantID", device_events."deviceID",
+            device_events."streamID", key AS "dataPointID",
+            cast_to_numeric(value) AS "numericValue"
+        FROM
+            device_events, jsonb_each(device_events.data)
+        WHERE
+            device_events."dataType" = 1
+            AND device_events."msgTime" >= $1::timestamp - INTERVAL '1 day'
+            AND device_events."msgTime" < $3
+    ) events
+    WHERE
+        events."dataTime" >= $1
+        AND events."dataTime" < $2
+    GROUP BY
+        1, "tenantID", "deviceID", "streamID", "dataPointID"
+) aggr
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID") DO NOTHING
+""")
+
+device_events_day_backfill_sql = db.register_statement('device_events_day_backfill', """
+INSERT INTO device_events_day("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
+                              "minValue", "maxValue", "avgValue", "sumValue")
+SELECT
+    time_bucket('1 days', "countTime") AS "countTime",
+    "tenantID", "deviceID", "streamID", "dataPointID",
+    min("minValue") AS "minValue",
+    max("maxValue") AS "maxValue",
+    sum("sumValue") / NULLIF(sum(count), 0) AS "avgValue",
+    sum("sumValue") AS "sumValue"
+FROM
+    device_events_hour
+WHERE
+    "countTime" >= $1
+    AND "countTime" < $2
+GROUP BY
+    1, "tenantID", "deviceID", "streamID", "dataPointID"
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID") DO NOTHING
+""")
+
+device_events_month_backfill_sql = db.register_statement('device_events_month_backfill', """
+INSERT INTO device_events_month("countTime", "tenantID", "deviceID", "streamID", "dataPointID",
+                                "minValue", "maxValue", "avgValue", "sumValue")
+SELECT
+    date_trunc('month', "countTime") AS "countTime",
+    "tenantID", "deviceID", "streamID", "dataPointID",
+    min("minValue") AS "minValue",
+    max("maxValue") AS "maxValue",
+    sum("sumValue") / NULLIF(sum(count), 0) AS "avgValue",
+    sum("sumValue") AS "sumValue"
+FROM
+    device_events_hour
+WHERE
+    "countTime" >= $1
+    AND "countTime" < $2
+GROUP BY
+    1, "tenantID", "deviceID", "streamID", "dataPointID"
+ON CONFLICT ("countTime", "tenantID", "deviceID", "streamID", "dataPointID") DO NOTHING
+""")
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+from actor_libs.database.async_db import db, Statement
+from .sql_statements import (
+    init_watermark_sql, lock_watermark_sql, update_watermark_sql,
+    query_localtimestamp_sql, query_watermark_sql
+)
+
+
+__all__ = ['IncrementalRollup']
+
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalRollup:
+    """
+    Aggregate source rows after the persisted watermark of a rollup table,
+    in slices of slice_interval, each slice upsert-merged with
+    the watermark update in one transaction. Rows newer than
+    now - lag are left to the next run for in flight inserts
+    """
+
+    def __init__(self, rollup_name: str, aggr_sql: Statement,
+                 slice_interval: timedelta = timedelta(minutes=10),
+                 lag: timedelta = timedelta(minutes=1),
+                 rolled_up_sql: Statement = None):
+        """
+        :param rollup_name: rollup table name
+        :param aggr_sql: upsert statement of rows in [$1, $2)
+        :param rolled_up_sql: select true if rollup table has buckets from $1,
+        a new rollup starts from the previous hour unless it is rolled up
+        """
+        self.rollup_name = rollup_name
+        self.aggr_sql = aggr_sql
+        self.rolled_up_sql = rolled_up_sql
+        self.slice_interval = slice_interval
+        self.lag = lag
+
+    async def run(self) -> Dict:
+        """ Catch up to now - lag, return processed slices """
+
+        date_now = await db.fetch_val(query_localtimestamp_sql)
+        end_time = date_now - self.lag
+        if await db.fetch_val(query_watermark_sql, self.rollup_name) is None:
+            initial_watermark = await self._get_initial_watermark(date_now)
+            await db.execute(init_watermark_sql, self.rollup_name, initial_watermark)
+        slices = 0
+        while True:
+            watermark = await self._aggr_slice(end_time)
+            if watermark is None:
+                break
+            slices += 1
+        return {'rollup': self.rollup_name, 'slices': slices}
+
+    async def _get_initial_watermark(self, date_now: datetime) -> datetime:
+        """
+        Start from the previous hour, so events of the hour before deploy are
+        not skipped, or from the current hour if the previous hour has been
+        rolled up (eg: by the former hourly job), merging it again doubles it
+        """
+
+        current_hour = date_now.replace(minute=0, second=0, microsecond=0)
+        previous_hour = current_hour - timedelta(hours=1)
+        if self.rolled_up_sql and \
+                await db.fetch_val(self.rolled_up_sql, previous_hour) is not False:
+            return current_hour
+        return previous_hour
+
+    async def _aggr_slice(self, end_time: datetime):
+        """ Aggregate the next slice, return the new watermark or None if caught up """
+
+        async with db.pool.acquire() as conn:
+            async with conn.transaction():
+                watermark = await db.conn_execute(
+                    conn, lock_watermark_sql, self.rollup_name, fetch_type='val'
+                )
+                if watermark is None or watermark >= end_time:
+                    return None
+                slice_end = min(watermark + self.slice_interval, end_time)
+                await db.conn_execute(conn, self.aggr_sql, watermark, slice_end)
+                await db.conn_execute(
+                    conn, update_watermark_sql, self.rollup_name, slice_end
+                )
+        logger.debug(f"{self.rollup_name} aggregated [{watermark}, {slice_end})")
+        return slice_end
@@ -1,10 +1,13 @@
+import json
 from collections import defaultdict
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from actor_libs.cache import product_meta_cache
 from actor_libs.database.async_db import db
-from actor_libs.http_tools.async_http import AsyncHttp
-from actor_libs.http_tools.responses import handle_task_scheduler_response
+from actor_libs.http_tools.responses import handle_base_response
 from ..config import project_config
+from .sql_statements import query_devices_info_sql
+from ..extra import publish_batch_http
 
 
 __all__ = ['get_devices_info', 'build_device_publish_info', 'devices_publish']
@@ -15,25 +18,18 @@ async def get_devices_info(devices_id: List[int]) -> Dict:
 
     if not devices_id:
         return {}
-    device_query_sql = f"""
-    SELECT 
-       devices.id AS "deviceIntID", 
-       lower(dict_code."enLabel") AS protocol, devices."tenantID",
-       devices."productID", devices."deviceID"
-    FROM devices
-       JOIN products ON products."productID" = devices."productID"
-       JOIN dict_code ON dict_code."codeValue" = products."cloudProtocol"
-    WHERE dict_code.code = 'cloudProtocol'
-      AND devices.blocked = 0
-      AND devices.id = ANY ('{set(devices_id)}'::int[])
-    """
-    query_results = await db.fetch_many(sql=device_query_sql)
-    if query_results:
-        device_info = defaultdict(dict)
-        for result in query_results:
-            device_info[result['deviceIntID']] = dict(result)
-    else:
-        device_info = {}
+    query_results = await db.fetch_many(query_devices_info_sql, list(set(devices_id)))
+    if not query_results:
+        return {}
+    products = await product_meta_cache.get_products_async(
+        {result['productID'] for result in query_results}
+    )
+    device_info = defaultdict(dict)
+    for result in query_results:
+        product = products.get(result['productID'])
+        if not product:
+            continue
+        device_info[result['deviceIntID']] = dict(result, protocol=product['protocol'])
     return device_info
 
 
@@ -56,18 +52,43 @@ async def build_device_publish_info(time_task, device_info):
 
 
 async def devices_publish(publish_info: List[Dict]) -> Dict:
-    url = project_config['PUBLISH_TASK_URL']
-    async with AsyncHttp() as async_http:
-        responses = await async_http.post_url_args(url=url, requests_json=publish_info)
+    """ Publish to devices with the batch publish api of task scheduler """
+
+    url = project_config['PUBLISH_BATCH_TASK_URL']
+    batch_size = project_config.get('PUBLISH_BATCH_SIZE', 1000)
+    requests_json = [
+        {'publishes': publish_info[i:i + batch_size]}
+        for i in range(0, len(publish_info), batch_size)
+    ]
+    responses = await publish_batch_http.post_url_args(
+        url=url, requests_json=requests_json
+    )
     success, failed = 0, 0
-    for response in responses:
-        handled_response = handle_task_scheduler_response(response)
-        if handled_response.get('status') == 3:
-            success += 1
-        else:
-            failed += 1
+    for request_json, response in zip(requests_json, responses):
+        task_results = _get_batch_task_results(response)
+        if task_results is None:
+            failed += len(request_json['publishes'])
+            continue
+        for task_result in task_results:
+            if task_result and task_result.get('status') == 3:
+                success += 1
+            else:
+                failed += 1
     publish_result = {
         'success': success,
         'failed': failed
     }
     return publish_result
+
+
+def _get_batch_task_results(response) -> Optional[List[Dict]]:
+    if isinstance(response, Exception):
+        return None
+    handled_response = handle_base_response(response)
+    if handled_response.get('status') != 3:
+        return None
+    try:
+        response_dict = json.loads(response.responseContent)
+    except Exception:
+        return None
+    return response_dict.get('results')
@@ -1,81 +1,74 @@
 import json
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 
-from arrow import Arrow
-from arrow import now as date_now, get as date_get
-from arrow.parser import ParserError
+from arrow import now as date_now
 
 from actor_libs.database.async_db import db
+from actor_libs.utils import get_next_fire_time
+from .sql_statements import (
+    query_unscheduled_timers_sql, query_due_timers_sql, update_next_fire_time_sql
+)
 from ..config import project_config
 
 
 __all__ = ['get_due_tasks']
 
 
-async def get_due_tasks() -> List[int]:
-    """ Get a list of tasks that should be run now """
-
-    arrow_now = date_now(tz=project_config['TIMEZONE'])
-    query_timer_publish_sql = """
-    SELECT timer_publish.*
-    FROM timer_publish
-           JOIN users ON users.id = timer_publish."userIntID"
-           JOIN tenants ON tenants."tenantID" = users."tenantID"
-    WHERE "taskStatus" = 2
-      AND users.enable = 1
-      AND tenants.enable = 1
+async def get_due_tasks(partition_index: int = 0, partition_count: int = 1) -> List[Dict]:
+    """
+    Get tasks of the node partition that should be run now by the nextFireTime index,
+    next fire time of the due tasks is advanced in the same transaction,
+    locked rows are skipped so a task is never taken by two nodes
     """
-    query_timer_tasks = await db.fetch_many(
-        sql=query_timer_publish_sql
+
+    arrow_now = date_now(tz=project_config['TIMEZONE']).naive
+    misfire_grace = timedelta(
+        seconds=project_config.get('TIMER_PUBLISH_MISFIRE_GRACE', 300)
     )
-    due_tasks_id: List[int] = []
-    due_tasks_append = due_tasks_id.append
-    if not query_timer_tasks:
-        return due_tasks_id
-    for timer_task in query_timer_tasks:
-        is_due = await _tasks_is_due(arrow_now, timer_task)
-        if is_due:
-            due_tasks_append(timer_task.get('id'))
-    return due_tasks_id
+    due_tasks: List[Dict] = []
+    async with db.pool.acquire() as conn:
+        async with conn.transaction():
+            schedules = []
+            unscheduled_timers = await db.conn_execute(
+                conn, query_unscheduled_timers_sql, partition_count, partition_index,
+                fetch_type='many'
+            )
+            for timer_task in unscheduled_timers:
+                # the current minute of a new scheduled timer is still due
+                next_fire_time = _get_next_fire_time(
+                    timer_task, arrow_now - timedelta(minutes=1)
+                )
+                schedules.append(_get_schedule(timer_task, next_fire_time))
+            due_timers = await db.conn_execute(
+                conn, query_due_timers_sql, arrow_now, partition_count, partition_index,
+                fetch_type='many'
+            )
+            for timer_task in due_timers:
+                next_fire_time = _get_next_fire_time(timer_task, arrow_now)
+                schedules.append(_get_schedule(timer_task, next_fire_time))
+                # misfired timers (eg: service down) are skipped to the next fire time
+                if timer_task['enable'] and \
+                        timer_task['nextFireTime'] >= arrow_now - misfire_grace:
+                    due_tasks.append(dict(timer_task))
+            if schedules:
+                await db.conn_execute(conn, update_next_fire_time_sql, *zip(*schedules))
+    return due_tasks
 
 
-async def _tasks_is_due(arrow_now: Arrow, timer_task: Dict) -> bool:
-    """
-    Check if the task is due
-    :return True if the task should be run now otherwise False
-    """
-
-    is_due = False
-    interval_time = timer_task.get('intervalTime')
-    crontab_time = timer_task.get('crontabTime')
-    if timer_task.get('timerType') == 1 and crontab_time:
-        # schedule time
-        try:
-            crontab_time = date_get(crontab_time)
-            if all([crontab_time.year == arrow_now.year,
-                    crontab_time.month == arrow_now.month,
-                    crontab_time.day == arrow_now.day,
-                    crontab_time.hour == arrow_now.hour,
-                    crontab_time.minute == arrow_now.minute]):
-                is_due = True
-        except ParserError:
-            is_due = False
-    elif timer_task.get('timerType') == 2 and interval_time:
+def _get_next_fire_time(timer_task, after: datetime) -> Optional[datetime]:
+    interval_time = timer_task['intervalTime']
+    if interval_time:
         interval_time = json.loads(interval_time)
-        week_day = arrow_now.weekday()
-        interval_minute = interval_time.get('minute')
-        interval_hour = interval_time.get('hour')
-        interval_weekday = interval_time.get('weekday')
-        if all([interval_minute == arrow_now.minute,
-                interval_hour is None, interval_weekday is None]):
-            is_due = True
-        elif all([interval_minute == arrow_now.minute,
-                  interval_hour == arrow_now.hour,
-                  interval_weekday is None]):
-            is_due = True
-        elif all([interval_minute == arrow_now.minute,
-                  interval_hour == arrow_now.hour,
-                  interval_weekday == week_day]):
-            is_due = True
+    next_fire_time = get_next_fire_time(
+        timer_task['timerType'], after,
+        crontab_time=timer_task['crontabTime'], interval_time=interval_time
+    )
+    return next_fire_time
+
+
+def _get_schedule(timer_task, next_fire_time: Optional[datetime]) -> Tuple:
+    """ Finish the timer (taskStatus 3) which will not fire again """
 
-    return is_due
+    task_status = 2 if next_fire_time else 3
+    return timer_task['id'], next_fire_time, task_status
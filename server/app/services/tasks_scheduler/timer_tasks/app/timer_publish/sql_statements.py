@@ -0,0 +1,47 @@
+from actor_libs.database.async_db import db
+
+
+# active timers without next fire time, created before it was indexed
+# $1, $2: partition count and index of the node
+query_unscheduled_timers_sql = db.register_statement('query_unscheduled_timers', """
+SELECT id, "timerType", "intervalTime", "crontabTime"
+FROM timer_publish
+WHERE "nextFireTime" IS NULL
+  AND "taskStatus" = 2
+  AND id % $1 = $2
+FOR UPDATE SKIP LOCKED
+""")
+
+# $1: now, due timers by the nextFireTime index, $2, $3: partition count and index
+query_due_timers_sql = db.register_statement('query_due_timers', """
+SELECT timer_publish.*,
+       users."tenantID",
+       users.enable = 1 AND tenants.enable = 1 AS enable
+FROM timer_publish
+       JOIN users ON users.id = timer_publish."userIntID"
+       JOIN tenants ON tenants."tenantID" = users."tenantID"
+WHERE timer_publish."nextFireTime" <= $1
+  AND timer_publish."taskStatus" = 2
+  AND timer_publish.id % $2 = $3
+ORDER BY timer_publish."nextFireTime"
+FOR UPDATE OF timer_publish SKIP LOCKED
+""")
+
+# $1: timers id, $2: next fire time, $3: task status
+update_next_fire_time_sql = db.register_statement('update_next_fire_time', """
+UPDATE timer_publish
+SET "nextFireTime" = fire."nextFireTime",
+    "taskStatus"   = fire."taskStatus"
+FROM unnest($1::integer[], $2::timestamp[], $3::smallint[])
+       AS fire(id, "nextFireTime", "taskStatus")
+WHERE timer_publish.id = fire.id
+""")
+
+# $1: devices id, protocol of device is read from product meta cache
+query_devices_info_sql = db.register_statement('query_devices_info', """
+SELECT devices.id AS "deviceIntID", devices."tenantID",
+       devices."productID", devices."deviceID"
+FROM devices
+WHERE devices.blocked = 0
+  AND devices.id = ANY($1::int[])
+""")
@@ -110,6 +110,7 @@ class FlaskConfig:
     PUBLISH_TASK_URL: AnyStr = None
     IMPORT_EXCEL_TASK_URL: AnyStr = None
     EXPORT_EXCEL_TASK_URL: AnyStr = None
+    DEVICE_AUTH_CACHE_URL: AnyStr = None
 
     @property
     def config(self):
@@ -138,6 +139,7 @@ class FlaskConfig:
         task_schedule_node = f"http://{_base_config['ASYNC_TASKS_NODE']}"
         _cls.IMPORT_EXCEL_TASK_URL = f"{task_schedule_node}/api/v1/import_excels"
         _cls.EXPORT_EXCEL_TASK_URL = f"{task_schedule_node}/api/v1/export_excels"
+        _cls.DEVICE_AUTH_CACHE_URL = f"{task_schedule_node}/api/v1/emqx/auth_cache"
 
         for key, value in _cls.__dict__.items():
             if key.isupper():
@@ -174,6 +176,7 @@ class AsyncTaskConfig:
 
 class TimerTaskConfig:
     PUBLISH_TASK_URL: AnyStr = None
+    PUBLISH_BATCH_TASK_URL: AnyStr = None
 
     @property
     def config(self):
@@ -181,6 +184,7 @@ class TimerTaskConfig:
         _base_config = BaseConfig().config
         task_schedule_node = f"http://{_base_config['ASYNC_TASKS_NODE']}"
         _cls.PUBLISH_TASK_URL = f"{task_schedule_node}/api/v1/device_publish"
+        _cls.PUBLISH_BATCH_TASK_URL = f"{task_schedule_node}/api/v1/device_publish/batch"
 
         for key, value in _cls.__dict__.items():
             if key.isupper():
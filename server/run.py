@@ -52,6 +52,46 @@ def timer_tasks():
     worker.execute_from_commandline()
 
 
+@actorcloud_run.command()
+@click.option('--rollup', '-r', 'rollups_name', multiple=True, required=True,
+              help='Rollup or group name, eg: api_count, emqx_bills_day')
+@click.option('--start', 'start_time', type=click.DateTime(), required=True)
+@click.option('--end', 'end_time', type=click.DateTime(), required=True)
+@click.option('--concurrency', default=4, show_default=True,
+              help='Concurrent backfill statements')
+@click.option('--replay', is_flag=True, help='Aggregate existing buckets again')
+def rollup_backfill(rollups_name, start_time, end_time, concurrency, replay):
+    """ Backfill rollup tables in [start, end) """
+    import asyncio
+    import uvloop
+    from actor_libs.database.async_db import db
+    from app.services.tasks_scheduler.timer_tasks.app.extra import create_postgres_pool
+    from app.services.tasks_scheduler.timer_tasks.app.rollup import backfill_rollups
+
+    async def _backfill():
+        _pool = await create_postgres_pool(min_size=1, max_size=max(concurrency, 1))
+        await db.open(_pool)
+        try:
+            return await backfill_rollups(
+                list(rollups_name), start_time, end_time,
+                concurrency=concurrency, replay=replay
+            )
+        finally:
+            await db.close()
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    loop = asyncio.get_event_loop()
+    try:
+        backfill_result = loop.run_until_complete(_backfill())
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint='--rollup')
+    for rollup_name, rollup_result in backfill_result.items():
+        click.echo(
+            f"{rollup_name}: {rollup_result['chunks']} chunks, "
+            f"{len(rollup_result['failed'])} failed {rollup_result['failed']}"
+        )
+
+
 if __name__ == '__main__':
     backend()
     actorcloud_run()